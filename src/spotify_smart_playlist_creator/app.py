@@ -7,13 +7,9 @@ import sys
 import random
 import string
 import urllib.parse
-import base64
-from threading import Thread
 import uuid
-import time
 
 from flask import Flask, redirect, request, session, render_template, url_for, jsonify, Response
-import requests
 import json
 
 # Optionally load environment variables from a .env file (for local development)
@@ -25,7 +21,15 @@ except ImportError:
 
 # Local imports
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from spotify_smart_playlist_creator.spotify_crew import SpotifySmartPlaylistCreator
+from spotify_smart_playlist_creator import metrics, pipeline, progress
+from spotify_smart_playlist_creator.crew_pool import get_crew_pool
+from spotify_smart_playlist_creator.jobs import JobScheduler, JobRejected, JobCancelled
+from spotify_smart_playlist_creator.job_store import create_job_store
+from spotify_smart_playlist_creator.token_store import exchange_code, get_token_store
+from spotify_smart_playlist_creator.tools.playlist_sync import parse_playlist_id
+from spotify_smart_playlist_creator.tools.spotify_api import SpotifyAPIError
+from spotify_smart_playlist_creator.tools.spotify_client import get_client, set_token_provider
+from spotify_smart_playlist_creator.tools.track_resolver import search_metric_samples
 
 # -----------------------------------------------------------------------------
 # Configuration & Constants
@@ -36,16 +40,38 @@ CLIENT_SECRET = os.environ.get('CLIENT_SECRET')
 REDIRECT_URI = 'http://127.0.0.1:8888/callback'
 API_BASE_URL = "https://api.spotify.com/v1"
 AUTH_URL = "https://accounts.spotify.com/authorize"
+SCOPE = 'user-read-private user-read-email playlist-modify-private playlist-modify-public'
+DEFAULT_PROMPT = 'Create a chill evening playlist with 12 acoustic and folk songs.'
+SSE_HEARTBEAT_SECONDS = 15
 
 app = Flask(__name__)
-app.secret_key = os.urandom(24)
+# A fixed FLASK_SECRET_KEY keeps sessions (and so returning users' stored tokens) valid across restarts
+app.secret_key = os.environ.get('FLASK_SECRET_KEY') or os.urandom(24)
 
 # -----------------------------------------------------------------------------
-# In-memory store for agent results and logs (for development only)
+# Store for agent results and logs (in-memory, or Redis via JOB_STORE_URL so
+# several worker processes can serve the same job)
 # -----------------------------------------------------------------------------
 
-agent_results = {}
-agent_logs = {}
+job_store = create_job_store()
+
+# Bounded pool of workers that run the playlist jobs (see JOB_WORKERS / JOB_QUEUE_SIZE)
+job_scheduler = JobScheduler()
+
+# Encrypted OAuth tokens per Spotify user; the Spotify clients refresh through it
+token_store = get_token_store()
+set_token_provider(token_store)
+
+# Gauges and counters computed on each /metrics scrape
+metrics.register_collector(job_scheduler.metric_samples)
+metrics.register_collector(lambda: get_client().metric_samples())
+metrics.register_collector(lambda: get_crew_pool().metric_samples())
+metrics.register_collector(token_store.metric_samples)
+metrics.register_collector(search_metric_samples)
+
+# Agents, tools and the LLM client are built off the request path (see CREW_POOL_WARM);
+# crewai itself is only imported there, which keeps the app's cold start short
+get_crew_pool().warm_in_background()
 
 # -----------------------------------------------------------------------------
 # Utility Functions
@@ -56,13 +82,23 @@ def generate_random_string(length=16):
     return ''.join(random.choices(string.ascii_letters + string.digits, k=length))
 
 def add_log(job_id, message):
-    """Add a log message to the agent logs."""
-    if job_id not in agent_logs:
-        agent_logs[job_id] = []
-    agent_logs[job_id].append({
-        'timestamp': time.time(),
-        'message': message
-    })
+    """Add a log message to the agent logs and push it to connected subscribers."""
+    job_store.append_log(job_id, message)
+    sync_cancel(job_id)
+
+def sync_cancel(job_id):
+    """Cancel a job running here if /cancel reached another worker process (see JobStore.request_cancel)."""
+    if job_scheduler.get(job_id) and job_store.cancel_requested(job_id):
+        job_scheduler.cancel(job_id)
+
+def set_result(job_id, result):
+    """Store the job's final result and close its log channel."""
+    job_store.set_result(job_id, result)
+
+def stored_tokens():
+    """Valid (refreshed if needed) tokens of the user logged in on this session, if any."""
+    user_id = session.get('spotify_user_id')
+    return token_store.valid_tokens(user_id) if user_id else None
 
 # -----------------------------------------------------------------------------
 # Routes
@@ -75,143 +111,146 @@ def index():
 
 @app.route('/login', methods=['POST'])
 def login():
-    """Receive user prompt and redirect to Spotify login/authorization."""
+    """Receive user prompt and start the job, or redirect to Spotify login/authorization first."""
     user_prompt = request.form.get('user_prompt')
     session['user_prompt'] = user_prompt  # Save it in session for callback
+    # An existing playlist to update in place instead of creating a new one
+    session['playlist_id'] = parse_playlist_id(request.form.get('playlist', ''))
+
+    # Returning users whose tokens are stored (and still refreshable) skip the OAuth round-trip
+    tokens = stored_tokens()
+    if tokens:
+        return start_job(user_prompt or DEFAULT_PROMPT, tokens.access_token)
+
     state = generate_random_string(16)
     session['state'] = state
-    scope = 'user-read-private user-read-email playlist-modify-private playlist-modify-public'
     query_params = {
         'response_type': 'code',
         'client_id': CLIENT_ID,
-        'scope': scope,
+        'scope': SCOPE,
         'redirect_uri': REDIRECT_URI,
-        'state': state,
-        'show_dialog': 'true'
+        'state': state
     }
     auth_url = AUTH_URL + '?' + urllib.parse.urlencode(query_params)
     return redirect(auth_url)
 
 @app.route('/callback')
 def callback():
-    """Handle Spotify callback, exchange code for token, and start agent thread."""
+    """Handle Spotify callback, exchange code for tokens, store them and start the job."""
     code = request.args.get('code')
     state = request.args.get('state')
     saved_state = session.get('state')
     if state is None or state != saved_state:
         return redirect('/?error=state_mismatch')
+    if not code:
+        return redirect('/?error=' + urllib.parse.quote(request.args.get('error', 'access_denied')))
 
-    # Exchange code for access token
-    auth_header = base64.b64encode(f"{CLIENT_ID}:{CLIENT_SECRET}".encode()).decode()
-    token_data = {
-        'grant_type': 'authorization_code',
-        'code': code,
-        'redirect_uri': REDIRECT_URI
-    }
-    token_headers = {
-        'Authorization': f"Basic {auth_header}",
-        'Content-Type': 'application/x-www-form-urlencoded'
-    }
-    response = requests.post('https://accounts.spotify.com/api/token', data=token_data, headers=token_headers)
-    if response.status_code != 200:
-        return f"Token request failed: {response.text}"
-    token_json = response.json()
-    access_token = token_json['access_token']
+    # Exchange code for tokens and keep them (with the refresh token) for this user
+    try:
+        tokens = exchange_code(code, REDIRECT_URI)
+    except (SpotifyAPIError, OSError, ValueError) as e:
+        return f"Token request failed: {e}"
+    token_store.save(tokens)
+    session['spotify_user_id'] = tokens.user_id
+
+    return start_job(session.get('user_prompt') or DEFAULT_PROMPT, tokens.access_token)
+
+@app.route('/logout', methods=['POST'])
+def logout():
+    """Forget the stored Spotify tokens of this session's user."""
+    user_id = session.pop('spotify_user_id', None)
+    if user_id:
+        token_store.delete(user_id)
+    return redirect(url_for('index'))
 
+def start_job(user_prompt, access_token):
+    """Queue a playlist job for this session and send the browser to the loading page."""
     # Prepare agent inputs
-    user_prompt = session.get('user_prompt', 'Create a chill evening playlist with 12 acoustic and folk songs.')
     inputs = {
         'user_prompt': user_prompt,
         'access_token': access_token,
         'token': access_token
     }
+    if session.get('playlist_id'):
+        inputs['playlist_id'] = session['playlist_id']
 
     # Generate a unique job_id for this agent run
     job_id = str(uuid.uuid4())
     session['job_id'] = job_id
-    agent_results[job_id] = None  # Initialize as not ready
-    agent_logs[job_id] = []  # Initialize logs
+    job_store.create(job_id)  # Initialize as not ready, with empty logs
 
-    def run_agent(inputs, job_id):
-        """Run the SpotifySmartPlaylistCreator agent in a separate thread."""
+    def run_agent(job, inputs, job_id):
+        """Run the SpotifySmartPlaylistCreator agent on a job scheduler worker."""
         add_log(job_id, "🚀 Agent thread started!")
         add_log(job_id, "🔍 Starting playlist creation process...")
         add_log(job_id, f"📝 User prompt: {inputs['user_prompt']}")
         add_log(job_id, "🔐 Token received and validated")
         
-        # Set a timeout for the agent execution (5 minutes)
-        import signal
-        import threading
-        
-        def timeout_handler():
-            add_log(job_id, "⏰ Agent execution timed out after 5 minutes")
-            agent_results[job_id] = "timeout"
-        
-        # Set up timeout
-        timer = threading.Timer(300.0, timeout_handler)  # 5 minutes
-        timer.start()
-        
         try:
-            add_log(job_id, "🚀 Starting SpotifySmartPlaylistCreator crew...")
+            add_log(job_id, f"🚀 Starting SpotifySmartPlaylistCreator ({pipeline.PIPELINE_MODE} mode)...")
             add_log(job_id, "⚙️ Initializing agents and tasks...")
-            result = SpotifySmartPlaylistCreator().crew().kickoff(inputs=inputs)
-            timer.cancel()  # Cancel timeout if successful
+            with progress.reporting_to(lambda message: add_log(job_id, message)):
+                result = pipeline.kickoff(inputs, job=job)
             add_log(job_id, "✅ Agent completed successfully!")
-            add_log(job_id, f"🎵 Playlist created: {result}")
+            add_log(job_id, f"🎵 Playlist {'updated' if inputs.get('playlist_id') else 'created'}: {result.name}")
+        except JobCancelled:
+            add_log(job_id, f"🛑 Agent stopped ({job.status})")
+            raise
         except Exception as e:
-            timer.cancel()  # Cancel timeout on error
             add_log(job_id, f"❌ Error during agent execution: {e}")
             import traceback
             traceback.print_exc()
             result = None
         
-        # Try to extract playlist URL from result (if possible)
-        playlist_url = None
-        try:
-            add_log(job_id, f"🔍 Extracting playlist URL from result...")
-            
-            # Handle CrewOutput objects
-            if hasattr(result, 'raw'):
-                add_log(job_id, "📋 Processing CrewOutput result...")
-                result_data = result.raw
-                if isinstance(result_data, dict):
-                    playlist_url = result_data.get('playlist_url')
-                    add_log(job_id, f"✅ Extracted playlist URL: {playlist_url}")
-                elif isinstance(result_data, str):
-                    # Try to parse as JSON
-                    data = json.loads(result_data)
-                    playlist_url = data.get('playlist_url')
-                    add_log(job_id, f"✅ Extracted playlist URL from JSON: {playlist_url}")
-            
-            # Handle regular dict
-            elif isinstance(result, dict):
-                playlist_url = result.get('playlist_url')
-                add_log(job_id, f"✅ Extracted playlist URL from dict: {playlist_url}")
-            
-            # Handle string
-            elif isinstance(result, str):
-                # Try to parse as JSON
-                data = json.loads(result)
-                playlist_url = data.get('playlist_url')
-                add_log(job_id, f"✅ Extracted playlist URL from string: {playlist_url}")
-                
-        except Exception as e:
-            add_log(job_id, f"❌ Error extracting playlist URL: {e}")
-            playlist_url = None
-        
+        if job.cancelled:
+            # /cancel or the timeout handler already stored the job's final result
+            add_log(job_id, f"🛑 Result discarded, the job was {job.status}")
+            return
+
+        # pipeline.kickoff returns a PlaylistResult in both modes
+        playlist_url = result.playlist_url if result else None
+        if result and result.error:
+            add_log(job_id, f"⚠️ No playlist in the result ({result.error})")
+
         add_log(job_id, f"🎉 Final playlist URL: {playlist_url}")
-        agent_results[job_id] = playlist_url
         add_log(job_id, "🏁 Process completed!")
+        set_result(job_id, playlist_url)
 
-    thread = Thread(target=run_agent, args=(inputs, job_id))
-    thread.start()
+    def timeout_handler(job):
+        add_log(job_id, f"⏰ Agent execution timed out after {job_scheduler.default_timeout / 60:g} minutes")
+        set_result(job_id, "timeout")
+
+    try:
+        job_scheduler.submit(job_id, run_agent, inputs, job_id, on_timeout=timeout_handler)
+    except JobRejected:
+        job_store.delete(job_id)
+        return "Too many playlists are being generated right now. Please try again in a minute.", 503
+    position = job_scheduler.position(job_id)
+    if position:
+        add_log(job_id, f"⏳ Waiting in queue (position {position}, ~{job_scheduler.estimated_wait(job_id):.0f}s)")
     return redirect(url_for('loading'))
 
+@app.route('/cancel', methods=['POST'])
+def cancel():
+    """Cancel the current job, whether it is still queued or already running."""
+    job_id = session.get('job_id')
+    if not job_id:
+        return jsonify({'cancelled': False}), 404
+    if not job_scheduler.cancel(job_id):
+        # Not queued or running in this process: another worker may run it, and it
+        # stops at its next log line once it sees the request in the job store
+        if not job_store.exists(job_id) or job_store.get_result(job_id)[0]:
+            return jsonify({'cancelled': False}), 404
+        job_store.request_cancel(job_id)
+    add_log(job_id, "🛑 Playlist creation cancelled")
+    set_result(job_id, "cancelled")
+    return jsonify({'cancelled': True})
+
 @app.route('/loading')
 def loading():
     """Show loading page and poll for agent completion."""
     job_id = session.get('job_id')
-    if job_id and agent_results.get(job_id) is not None:
+    if job_id and job_store.get_result(job_id)[0]:
         return redirect(url_for('success'))
     return render_template('loading.html')
 
@@ -219,57 +258,70 @@ def loading():
 def status():
     """Return JSON status if agent is done for polling from loading page."""
     job_id = session.get('job_id')
-    done = job_id and agent_results.get(job_id) is not None
-    return jsonify({'done': done})
+    done = bool(job_id) and job_store.get_result(job_id)[0]
+    return jsonify({'done': done, 'queue_position': job_scheduler.position(job_id) if job_id else None})
 
 @app.route('/logs')
 def logs():
-    """Stream logs for the current job using Server-Sent Events."""
+    """Stream logs for the current job using Server-Sent Events.
+
+    Each entry is sent as soon as it is published, with its index as the event
+    id so a reconnecting EventSource resumes from `Last-Event-ID`. While the
+    job is quiet the stream only carries a comment every SSE_HEARTBEAT_SECONDS.
+    """
     job_id = session.get('job_id')
-    print(f"🔍 Logs endpoint called for job_id: {job_id}")
-    
+    known_job = bool(job_id) and job_store.exists(job_id)
+    try:
+        last_id = int(request.headers.get('Last-Event-ID', 0))
+    except ValueError:
+        last_id = 0
+
     def generate():
-        if not job_id:
-            print("❌ No job ID found in session")
+        if not known_job:
             yield f"data: {json.dumps({'error': 'No job ID found'})}\n\n"
             return
-        
-        print(f"📝 Starting log stream for job_id: {job_id}")
-        last_log_count = 0
-        
+
+        nonlocal last_id
+        yield "retry: 3000\n\n"
         while True:
-            if job_id in agent_logs:
-                current_logs = agent_logs[job_id]
-                print(f"📊 Current logs count: {len(current_logs)}, last sent: {last_log_count}")
-                
-                if len(current_logs) > last_log_count:
-                    # Send new logs
-                    for i in range(last_log_count, len(current_logs)):
-                        log_entry = current_logs[i]
-                        log_data = json.dumps(log_entry)
-                        print(f"📤 Sending log: {log_data}")
-                        yield f"data: {log_data}\n\n"
-                    last_log_count = len(current_logs)
-                
-                # Check if process is done
-                if agent_results.get(job_id) is not None:
-                    print(f"✅ Process done for job_id: {job_id}")
-                    yield f"data: {json.dumps({'status': 'done'})}\n\n"
-                    break
-            else:
-                print(f"⚠️ Job {job_id} not found in agent_logs")
-            
-            time.sleep(1)  # Wait 1 second before checking again
-    
-    return Response(generate(), mimetype='text/event-stream')
+            entries, closed = job_store.wait_for_logs(job_id, last_id, timeout=SSE_HEARTBEAT_SECONDS)
+            for log_entry in entries:
+                yield f"id: {log_entry['id']}\ndata: {json.dumps(log_entry)}\n\n"
+                last_id = log_entry['id']
+            if closed:
+                yield f"data: {json.dumps({'status': 'done'})}\n\n"
+                break
+            if not entries:
+                yield ": keep-alive\n\n"
+
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
 
 @app.route('/success')
 def success():
     """Show success page with playlist link."""
     job_id = session.get('job_id')
-    playlist_url = agent_results.get(job_id)
+    playlist_url = job_store.get_result(job_id)[1] if job_id else None
     return render_template('success.html', playlist_url=playlist_url)
 
+@app.route('/metrics')
+def metrics_endpoint():
+    """Expose pipeline, tool, HTTP and job metrics in the Prometheus text format."""
+    return Response(metrics.render(), mimetype=metrics.CONTENT_TYPE)
+
+@app.route('/traces/<job_id>')
+def trace(job_id):
+    """Return the finished spans of this session's job trace (OpenTelemetry-style JSON)."""
+    # A trace shows what a user's job did and when, so only the session that started it may read it
+    if session.get('job_id') != job_id:
+        return jsonify({'error': 'Unknown job or no spans recorded yet'}), 404
+    spans = metrics.get_trace(job_id)
+    if not spans:
+        return jsonify({'error': 'Unknown job or no spans recorded yet'}), 404
+    return jsonify({'job_id': job_id, 'spans': spans})
+
 # -----------------------------------------------------------------------------
 # Main
 # -----------------------------------------------------------------------------
@@ -0,0 +1,221 @@
+"""
+Batch mode: build many playlists from a JSONL or CSV file of prompts
+
+Jobs run in parallel in one process, so they share the HTTP connection pool,
+the track, curator and profile caches, the crew pool and the access token.
+Every finished job is appended to a JSONL results file, which doubles as the
+checkpoint: running the same command again skips the jobs already done.
+
+    batch prompts.jsonl --workers 8 --mode fast
+
+Each input row needs a `prompt` (or `user_prompt`) and may set `id`,
+`target_minutes`, `market` and `playlist_id` (update that playlist in place).
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Set
+
+# -----------------------------------------------------------------------------
+# Configuration & Constants
+# -----------------------------------------------------------------------------
+
+BATCH_WORKERS = int(os.environ.get("BATCH_WORKERS", os.environ.get("JOB_WORKERS", "4")))
+
+DONE, FAILED = "done", "failed"
+
+# -----------------------------------------------------------------------------
+# Prompt Files
+# -----------------------------------------------------------------------------
+
+def _job(row: dict, line: int) -> dict:
+    prompt = (row.get("prompt") or row.get("user_prompt") or "").strip()
+    if not prompt:
+        raise ValueError(f"Row {line} has no prompt")
+    job = {"id": str(row.get("id") or line), "user_prompt": prompt}
+    if row.get("target_minutes"):
+        job["target_minutes"] = float(row["target_minutes"])
+    if row.get("market"):
+        job["market"] = row["market"].strip().upper()
+    if row.get("playlist_id"):
+        from spotify_smart_playlist_creator.tools.playlist_sync import parse_playlist_id
+        job["playlist_id"] = parse_playlist_id(row["playlist_id"])
+        if not job["playlist_id"]:
+            raise ValueError(f"Row {line} has an invalid playlist_id: {row['playlist_id']!r}")
+    return job
+
+
+def load_jobs(path: str) -> List[dict]:
+    """Read prompt rows from a .csv (with a header) or JSONL file; ids default to the row number."""
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.lower().endswith(".csv"):
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [json.loads(line) for line in f if line.strip()]
+    jobs = [_job(row, line) for line, row in enumerate(rows, start=1)]
+    seen: Set[str] = set()
+    for job in jobs:
+        if job["id"] in seen:
+            raise ValueError(f"Duplicate job id {job['id']!r} in {path}")
+        seen.add(job["id"])
+    return jobs
+
+# -----------------------------------------------------------------------------
+# Results & Checkpoint
+# -----------------------------------------------------------------------------
+
+class ResultsFile:
+    """Append-only JSONL of job results; the jobs recorded as done are skipped on resume."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._end_torn_line()
+
+    def _end_torn_line(self) -> None:
+        # A crash mid-write leaves a partial last line; new records must start on a line of their own
+        if not os.path.exists(self.path) or not os.path.getsize(self.path):
+            return
+        with open(self.path, "rb+") as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+
+    def completed(self) -> Set[str]:
+        """Ids whose latest record is done (a torn last line from a crash is ignored)."""
+        latest: Dict[str, str] = {}
+        if not os.path.exists(self.path):
+            return set()
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                latest[str(record.get("id"))] = record.get("status")
+        return {job_id for job_id, status in latest.items() if status == DONE}
+
+    def append(self, record: dict) -> None:
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+# -----------------------------------------------------------------------------
+# Batch Run
+# -----------------------------------------------------------------------------
+
+def resolve_token(user_id: Optional[str]) -> str:
+    """Access token for the batch: the stored tokens of `user_id` (refreshed as needed) or SPOTIFY_ACCESS_TOKEN."""
+    from spotify_smart_playlist_creator.token_store import get_token_store
+    from spotify_smart_playlist_creator.tools.spotify_client import set_token_provider
+
+    if user_id:
+        store = get_token_store()
+        tokens = store.valid_tokens(user_id)
+        if tokens is None:
+            raise SystemExit(f"No stored Spotify tokens for user {user_id}; log in through the web app first")
+        set_token_provider(store)  # long batches keep refreshing the token
+        return tokens.access_token
+    token = os.environ.get("SPOTIFY_ACCESS_TOKEN")
+    if not token:
+        raise SystemExit("Set SPOTIFY_ACCESS_TOKEN or pass --user-id")
+    return token
+
+
+def run_job(job: dict, token: str, mode: str, log_dir: Optional[str]) -> dict:
+    """Build one playlist and return its result record (never raises)."""
+    from spotify_smart_playlist_creator import pipeline, progress
+
+    logs: List[str] = []
+    inputs = {key: value for key, value in job.items() if key != "id"}
+    inputs["token"] = token
+    started = time.perf_counter()
+    try:
+        with progress.reporting_to(logs.append):
+            result = pipeline.kickoff(inputs, mode)
+        record = {"status": DONE if not result.error else FAILED, **result.model_dump(exclude_none=True)}
+    except Exception as e:
+        record = {"status": FAILED, "error": f"{type(e).__name__}: {e}"}
+    record = {"id": job["id"], "prompt": job["user_prompt"], **record,
+              "seconds": round(time.perf_counter() - started, 3)}
+    if log_dir:
+        with open(os.path.join(log_dir, f"{job['id']}.log"), "w", encoding="utf-8") as f:
+            f.write("\n".join(logs) + "\n")
+    return record
+
+
+def run_batch(jobs: List[dict], results: ResultsFile, token: str, mode: str,
+              workers: int = BATCH_WORKERS, log_dir: Optional[str] = None) -> dict:
+    """Run the jobs not yet done in `results`, `workers` at a time, recording each as it finishes."""
+    done = results.completed()
+    pending = [job for job in jobs if job["id"] not in done]
+    counts = {DONE: 0, FAILED: 0, "skipped": len(jobs) - len(pending)}
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
+    print(f"🏁 {len(pending)} jobs to run ({counts['skipped']} already done), {workers} workers, {mode} mode")
+
+    started = time.perf_counter()
+    executor = ThreadPoolExecutor(max_workers=max(1, workers))
+    try:
+        futures = [executor.submit(run_job, job, token, mode, log_dir) for job in pending]
+        for future in as_completed(futures):
+            record = future.result()
+            results.append(record)
+            counts[record["status"]] += 1
+            mark = "✅" if record["status"] == DONE else "❌"
+            print(f"{mark} [{counts[DONE] + counts[FAILED]}/{len(pending)}] {record['id']}: "
+                  f"{record.get('playlist_url') or record.get('error')}")
+    except KeyboardInterrupt:
+        print("⏹️ Interrupted; finished jobs are saved, run the same command again to resume")
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    executor.shutdown()
+    elapsed = time.perf_counter() - started
+    counts["elapsed_s"] = round(elapsed, 3)
+    counts["jobs_per_min"] = round(60 * (counts[DONE] + counts[FAILED]) / elapsed, 2) if elapsed else 0.0
+    return counts
+
+# -----------------------------------------------------------------------------
+# Entry Point
+# -----------------------------------------------------------------------------
+
+def main():
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        pass  # python-dotenv is optional
+
+    parser = argparse.ArgumentParser(description="Build a playlist for every prompt in a JSONL or CSV file.")
+    parser.add_argument("prompts", help="JSONL or CSV file with a prompt (and optional id, target_minutes, market, "
+                        "playlist_id) per row")
+    parser.add_argument("--results", default="", help="JSONL results and checkpoint file (default: <prompts>.results.jsonl)")
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS, help="Playlists built at once")
+    parser.add_argument("--mode", choices=("fast", "crew"), default=os.environ.get("PIPELINE_MODE", "crew"),
+                        help="Pipeline mode (see PIPELINE_MODE)")
+    parser.add_argument("--user-id", default="", help="Use this Spotify user's stored tokens instead of SPOTIFY_ACCESS_TOKEN")
+    parser.add_argument("--log-dir", default="", help="Write each job's progress log to <log-dir>/<id>.log")
+    args = parser.parse_args()
+
+    # Crews are pooled per worker, so a pool as large as the batch keeps every worker busy
+    os.environ.setdefault("CREW_POOL_SIZE", str(args.workers))
+
+    jobs = load_jobs(args.prompts)
+    results = ResultsFile(args.results or os.path.splitext(args.prompts)[0] + ".results.jsonl")
+    token = resolve_token(args.user_id)
+    summary = run_batch(jobs, results, token, args.mode, args.workers, args.log_dir or None)
+    print(f"\n📊 {summary[DONE]} done, {summary[FAILED]} failed, {summary['skipped']} skipped "
+          f"in {summary['elapsed_s']}s ({summary['jobs_per_min']} jobs/min) → {results.path}")
+    sys.exit(1 if summary[FAILED] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""
+Load benchmark for the fast pipeline against the mock Spotify API and a scripted curator
+
+Reports jobs/sec and p50/p95/p99 latency per pipeline stage, so changes to
+pooling, caching or rate limiting can be measured without Spotify or an LLM.
+
+    benchmark --jobs 200 --concurrency 16 --latency-ms 40 --throttle-rate 0.02
+
+With --startup it instead measures cold import times and per-job crew setup,
+building a fresh crew per job versus checking one out of the crew pool:
+
+    benchmark --startup --jobs 20
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from spotify_smart_playlist_creator.mock_spotify import (
+    add_behavior_arguments,
+    behavior_from_args,
+    start_mock_server,
+)
+
+# -----------------------------------------------------------------------------
+# Statistics
+# -----------------------------------------------------------------------------
+
+STAGES = ("curate", "profile", "search", "plan", "create", "add", "total")
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of `values` (0 when empty)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(samples: Dict[str, List[float]]) -> Dict[str, dict]:
+    """Per stage: count, p50/p95/p99 and max, in milliseconds."""
+    summary = {}
+    for stage in STAGES:
+        values = samples.get(stage, [])
+        summary[stage] = {
+            "count": len(values),
+            **{f"p{pct}_ms": round(percentile(values, pct) * 1000, 2) for pct in (50, 95, 99)},
+            "max_ms": round(max(values, default=0.0) * 1000, 2),
+        }
+    return summary
+
+# -----------------------------------------------------------------------------
+# Benchmark Run
+# -----------------------------------------------------------------------------
+
+def run_benchmark(args) -> dict:
+    # Imported here so the environment set up in main() is picked up by the module-level config
+    from spotify_smart_playlist_creator.curator_stub import ScriptedCurator
+    from spotify_smart_playlist_creator.pipeline import FastPlaylistPipeline
+    from spotify_smart_playlist_creator.tools.spotify_client import get_client
+    from spotify_smart_playlist_creator.tools.track_resolver import get_search_flight
+
+    pipeline = FastPlaylistPipeline(
+        use_curator_cache=False,
+        curator=ScriptedCurator(latency_ms=args.llm_latency_ms, song_count=args.songs),
+    )
+    samples: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+    errors: List[str] = []
+
+    def run_job(index: int) -> None:
+        prompt = "benchmark playlist" if args.same_prompt else f"benchmark playlist #{index}"
+        # One token per job, like one user per job, so per-token limits behave as in production
+        inputs = {'token': f"benchmark-token-{index}", 'user_prompt': prompt}
+        timings = {}
+        started = time.perf_counter()
+        try:
+            pipeline.kickoff(inputs, timings=timings)
+        except Exception as e:
+            errors.append(f"{type(e).__name__}: {e}")
+            return
+        timings['total'] = time.perf_counter() - started
+        for stage, seconds in timings.items():
+            samples[stage].append(seconds)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        list(executor.map(run_job, range(args.jobs)))
+    elapsed = time.perf_counter() - started
+
+    completed = len(samples['total'])
+    client = get_client()
+    return {
+        "jobs": args.jobs,
+        "completed": completed,
+        "failed": len(errors),
+        "errors": sorted(set(errors))[:10],
+        "elapsed_s": round(elapsed, 3),
+        "jobs_per_sec": round(completed / elapsed, 2) if elapsed else 0.0,
+        "stages": summarize(samples),
+        "scheduler": client.scheduler.metrics(),
+        "pool": client.stats(),
+        "search_flight": get_search_flight().stats(),
+    }
+
+
+def print_report(result: dict, mock_requests=None) -> None:
+    print(f"\n📊 {result['completed']}/{result['jobs']} jobs in {result['elapsed_s']}s "
+          f"→ {result['jobs_per_sec']} jobs/sec ({result['failed']} failed)")
+    print(f"\n{'stage':<10}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for stage, row in result['stages'].items():
+        print(f"{stage:<10}{row['count']:>8}{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}{row['max_ms']:>10}")
+    scheduler = result['scheduler']
+    print(f"\n🚦 requests={scheduler.get('requests')} throttled={scheduler.get('throttled')} "
+          f"retries={scheduler.get('retries')} gave_up={scheduler.get('gave_up')}")
+    flight = result['search_flight']
+    print(f"🔀 searches sent={flight['calls']} coalesced={flight['coalesced']}")
+    if mock_requests is not None:
+        print(f"🧪 mock server handled {mock_requests} requests")
+    for error in result['errors']:
+        print(f"❌ {error}")
+
+# -----------------------------------------------------------------------------
+# Startup Benchmark
+# -----------------------------------------------------------------------------
+
+# Web app and pipeline modules (which should not pull in crewai), then crewai itself
+IMPORT_TARGETS = (
+    "spotify_smart_playlist_creator.app",
+    "spotify_smart_playlist_creator.pipeline",
+    "spotify_smart_playlist_creator.spotify_crew",
+    "crewai",
+)
+
+
+def import_seconds(module: str) -> Optional[float]:
+    """Cold import time of `module` in a fresh interpreter, or None if it cannot be imported."""
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    env = dict(os.environ, CREW_POOL_WARM="0")  # no background crew build while timing the import
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env)
+    if proc.returncode != 0:
+        return None
+    return float(proc.stdout.strip().splitlines()[-1])
+
+
+def _time_ms(fn, runs: int) -> dict:
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return {f"p{pct}_ms": round(percentile(samples, pct) * 1000, 2) for pct in (50, 95)}
+
+
+def run_startup_benchmark(args) -> dict:
+    result = {"imports_ms": {}, "setup": {}}
+    for module in IMPORT_TARGETS:
+        seconds = import_seconds(module)
+        result["imports_ms"][module] = round(seconds * 1000, 1) if seconds is not None else None
+
+    try:
+        from spotify_smart_playlist_creator.crew_pool import CrewPool
+        from spotify_smart_playlist_creator.spotify_crew import SpotifySmartPlaylistCreator, build_resources
+    except ImportError as e:
+        result["setup_error"] = f"crew setup not measured: {e}"
+        return result
+
+    # Before: every job built agents, tasks, tools and the LLM client, then the crew
+    result["setup"]["fresh"] = _time_ms(lambda: SpotifySmartPlaylistCreator(build_resources()).crew(), args.jobs)
+
+    # After: jobs check out a prebuilt crew. Its release rebuilds the agents and tasks
+    # (reset), so the pooled row includes that; the reset row shows its share
+    pool = CrewPool(max_size=1)
+    pool.warm(1)
+
+    def pooled():
+        with pool.checkout() as creator:
+            creator.crew()
+
+    result["setup"]["pooled+reset"] = _time_ms(pooled, args.jobs)
+    creator = pool.acquire()
+    result["setup"]["reset"] = _time_ms(creator.reset, args.jobs)
+    return result
+
+
+def print_startup_report(result: dict) -> None:
+    print(f"\n{'cold import':<48}{'ms':>10}")
+    for module, ms in result["imports_ms"].items():
+        print(f"{module:<48}{ms if ms is not None else 'n/a':>10}")
+    if result.get("setup_error"):
+        print(f"\n⚠️ {result['setup_error']}")
+        return
+    print(f"\n{'job setup':<14}{'p50 ms':>10}{'p95 ms':>10}")
+    for name, row in result["setup"].items():
+        print(f"{name:<14}{row['p50_ms']:>10}{row['p95_ms']:>10}")
+
+# -----------------------------------------------------------------------------
+# Entry Point
+# -----------------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the fast playlist pipeline offline.")
+    parser.add_argument("--jobs", type=int, default=50, help="Number of playlist builds")
+    parser.add_argument("--concurrency", type=int, default=8, help="Builds running at once")
+    parser.add_argument("--songs", type=int, default=20, help="Songs per playlist")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="Scripted curator delay per job")
+    parser.add_argument("--same-prompt", action="store_true", help="Reuse one prompt so searches hit the track cache")
+    parser.add_argument("--base-url", default="", help="Use an already running mock instead of starting one")
+    parser.add_argument("--app-rate", type=float, default=1000.0, help="App-wide requests/sec allowed by the client")
+    parser.add_argument("--token-rate", type=float, default=1000.0, help="Per-token requests/sec allowed by the client")
+    parser.add_argument("--json", action="store_true", help="Print the result as JSON")
+    parser.add_argument("--startup", action="store_true",
+                        help="Measure cold imports and per-job crew setup (fresh vs pooled) instead")
+    add_behavior_arguments(parser)
+    args = parser.parse_args()
+
+    if args.startup:
+        if not args.json:
+            print(f"🏁 Measuring cold imports and crew setup over {args.jobs} jobs")
+        result = run_startup_benchmark(args)
+        if args.json:
+            json.dump(result, sys.stdout, indent=2)
+            print()
+        else:
+            print_startup_report(result)
+        return
+
+    server = None
+    base_url = args.base_url
+    if not base_url:
+        server = start_mock_server(behavior=behavior_from_args(args))
+        base_url = server.base_url
+
+    # Configure the client before any of its modules are imported
+    os.environ["SPOTIFY_API_BASE_URL"] = base_url
+    os.environ.setdefault("TRACK_CACHE_PATH", "")  # keep benchmark tracks out of the real disk cache
+    os.environ.setdefault("TRACK_INDEX_PATH", "")  # and out of the local track index
+    for name, value in (("SPOTIFY_APP_RATE", args.app_rate), ("SPOTIFY_APP_BURST", args.app_rate),
+                        ("SPOTIFY_TOKEN_RATE", args.token_rate), ("SPOTIFY_TOKEN_BURST", args.token_rate)):
+        os.environ.setdefault(name, str(value))
+
+    if not args.json:
+        print(f"🏁 Running {args.jobs} jobs x {args.songs} songs, concurrency {args.concurrency}, against {base_url}")
+    result = run_benchmark(args)
+    if server is not None:
+        result["mock_requests"] = server.request_count
+        server.shutdown()
+
+    if args.json:
+        json.dump(result, sys.stdout, indent=2)
+        print()
+    else:
+        print_report(result, result.get("mock_requests"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Warm pool of prebuilt crews, so jobs reuse their tools and the shared LLM client
+"""
+
+import os
+import time
+import threading
+from contextlib import contextmanager
+from typing import Callable, List, Optional
+
+from spotify_smart_playlist_creator.jobs import JOB_WORKERS
+
+# -----------------------------------------------------------------------------
+# Configuration & Constants
+# -----------------------------------------------------------------------------
+
+CREW_POOL_SIZE = int(os.environ.get("CREW_POOL_SIZE", str(JOB_WORKERS)))  # idle crews kept for reuse
+CREW_POOL_WARM = int(os.environ.get("CREW_POOL_WARM", "1"))  # crews prebuilt in the background at startup
+
+# -----------------------------------------------------------------------------
+# Crew Pool
+# -----------------------------------------------------------------------------
+
+def _build_creator():
+    # crewai is imported on first use, so importing the web app stays fast
+    from spotify_smart_playlist_creator.spotify_crew import SpotifySmartPlaylistCreator
+    return SpotifySmartPlaylistCreator()
+
+
+class CrewPool:
+    """Hands out SpotifySmartPlaylistCreator instances, one job at a time each.
+
+    A crew's tools, agents and tasks hold the state of the kickoff running on
+    them, so a checked-out instance is never shared; when the job ends its
+    agents and tasks are rebuilt and it is put back. New instances are built when the pool is empty, and at most
+    `max_size` idle ones are kept.
+    """
+
+    def __init__(self, factory: Optional[Callable] = None, max_size: int = CREW_POOL_SIZE):
+        self.factory = factory or _build_creator
+        self.max_size = max_size
+        self._idle: List = []
+        self._lock = threading.Lock()
+        self.built = 0
+        self.reused = 0
+        self.build_seconds = 0.0
+
+    def _build(self):
+        started = time.perf_counter()
+        creator = self.factory()
+        with self._lock:
+            self.built += 1
+            self.build_seconds += time.perf_counter() - started
+        return creator
+
+    def acquire(self):
+        """Take an idle crew, or build one if none is left."""
+        with self._lock:
+            if self._idle:
+                self.reused += 1
+                return self._idle.pop()
+        return self._build()
+
+    def release(self, creator) -> None:
+        """Reset a crew after its job (see SpotifySmartPlaylistCreator.reset) and keep it if the pool has room."""
+        creator.reset()
+        with self._lock:
+            if len(self._idle) < self.max_size:
+                self._idle.append(creator)
+
+    @contextmanager
+    def checkout(self):
+        """Use a crew for the duration of the block."""
+        creator = self.acquire()
+        try:
+            yield creator
+        finally:
+            self.release(creator)
+
+    def warm(self, count: int) -> None:
+        """Build crews until `count` are idle (capped at max_size)."""
+        while True:
+            with self._lock:
+                if len(self._idle) >= min(count, self.max_size):
+                    return
+            creator = self._build()
+            with self._lock:
+                if len(self._idle) >= self.max_size:
+                    return
+                self._idle.append(creator)
+
+    def warm_in_background(self, count: int = CREW_POOL_WARM) -> Optional[threading.Thread]:
+        """Warm the pool on a daemon thread, so the first jobs skip crew construction."""
+        if count <= 0:
+            return None
+
+        def run():
+            try:
+                self.warm(count)
+                print(f"🔥 Crew pool warmed with {count} crew(s)")
+            except Exception as e:
+                print(f"⚠️ Could not warm the crew pool: {e}")
+
+        thread = threading.Thread(target=run, name="crew-pool-warm", daemon=True)
+        thread.start()
+        return thread
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "idle": len(self._idle),
+                "max_size": self.max_size,
+                "built": self.built,
+                "reused": self.reused,
+                "build_seconds": round(self.build_seconds, 3),
+            }
+
+    def metric_samples(self):
+        """Idle crews and build/reuse counts as metric families for /metrics."""
+        stats = self.stats()
+        return [
+            ("crew_pool_idle", "gauge", "Prebuilt crews waiting for a job", [({}, stats["idle"])]),
+            ("crew_pool_built_total", "counter", "Crews constructed", [({}, stats["built"])]),
+            ("crew_pool_reused_total", "counter", "Jobs that reused a prebuilt crew", [({}, stats["reused"])]),
+            ("crew_pool_build_seconds_total", "counter", "Time spent constructing crews",
+             [({}, stats["build_seconds"])]),
+        ]
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_crew_pool() -> CrewPool:
+    """Return the process-wide CrewPool."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = CrewPool()
+        return _pool
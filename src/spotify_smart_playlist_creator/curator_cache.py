@@ -0,0 +1,178 @@
+"""
+Cache of music curator results keyed by normalized prompt, with optional embedding lookup
+"""
+
+import os
+import re
+import math
+import threading
+import unicodedata
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from spotify_smart_playlist_creator.tools.track_cache import LRUCache, SQLiteCache, TrackCache
+from spotify_smart_playlist_creator.tools.track_resolver import Song
+
+# -----------------------------------------------------------------------------
+# Configuration & Constants
+# -----------------------------------------------------------------------------
+
+DEFAULT_CURATOR_CACHE_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "spotify_smart_playlist_creator", "curator.sqlite3"
+)
+CURATOR_CACHE_PATH = os.environ.get("CURATOR_CACHE_PATH", DEFAULT_CURATOR_CACHE_PATH)  # empty disables the disk tier
+CURATOR_CACHE_TTL = float(os.environ.get("CURATOR_CACHE_TTL", str(3 * 24 * 3600)))
+CURATOR_CACHE_SIZE = int(os.environ.get("CURATOR_CACHE_SIZE", "2000"))
+# Set to an embedding model name (e.g. text-embedding-3-small) to enable near-duplicate lookup
+CURATOR_EMBEDDING_MODEL = os.environ.get("CURATOR_EMBEDDING_MODEL", "")
+CURATOR_SIMILARITY_THRESHOLD = float(os.environ.get("CURATOR_SIMILARITY_THRESHOLD", "0.93"))
+
+# Words that don't change which songs the curator picks (English and Portuguese)
+FILLER_WORDS = {
+    "a", "an", "the", "of", "for", "with", "and", "to", "me", "my", "please", "some", "in",
+    "create", "make", "build", "generate", "give", "playlist", "songs", "song", "tracks", "music",
+    "crie", "cria", "faca", "faça", "uma", "um", "de", "da", "do", "dos", "das", "com", "e", "para",
+    "musicas", "músicas", "cancoes", "canções",
+}
+
+# A number followed (within a few words) by "songs", e.g. "12 acoustic and folk songs"
+SONG_COUNT_RE = re.compile(
+    r"\b(\d{1,3})\s+(?:[^\W\d]+\s+){0,4}?(?:songs?|tracks?|m[uú]sicas|can[cç][oõ]es)\b", re.IGNORECASE
+)
+DURATION_RE = re.compile(r"\b(\d{1,3})\s*(?:min(?:ute)?s?|minutos?)\b", re.IGNORECASE)
+
+# -----------------------------------------------------------------------------
+# Prompt Normalization
+# -----------------------------------------------------------------------------
+
+def requested_song_count(prompt: str) -> Optional[int]:
+    match = SONG_COUNT_RE.search(prompt or "")
+    return int(match.group(1)) if match else None
+
+
+def requested_duration_minutes(prompt: str) -> Optional[int]:
+    match = DURATION_RE.search(prompt or "")
+    return int(match.group(1)) if match else None
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Lowercase, strip accents, punctuation, filler words and the requested size.
+
+    The remaining words keep their order, so "happy not sad" and "sad not
+    happy" stay different prompts. Other numbers are kept as well, so
+    "80s rock" and "90s rock" differ too.
+    """
+    text = (prompt or "").lower()
+    for size_re in (SONG_COUNT_RE, DURATION_RE):
+        text = size_re.sub(lambda m: m.group(0)[len(m.group(1)):], text)
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    words = re.sub(r"[^\w\s]", " ", text).split()
+    return " ".join(word for word in words if word not in FILLER_WORDS)
+
+
+def prompt_key(prompt: str) -> str:
+    """Cache key: requested size plus the canonical prompt text."""
+    count = requested_song_count(prompt)
+    minutes = requested_duration_minutes(prompt)
+    size = f"n{count}" if count else f"m{minutes}" if minutes else "default"
+    return f"{size}|{normalize_prompt(prompt)}"
+
+# -----------------------------------------------------------------------------
+# Near-duplicate Vector Index
+# -----------------------------------------------------------------------------
+
+def _cosine(a: Sequence[float], b: Sequence[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class VectorIndex:
+    """Small in-process index of (cache key, embedding) for nearest-neighbour lookup."""
+
+    def __init__(self, max_size: int = CURATOR_CACHE_SIZE):
+        self.max_size = max_size
+        self._items: List[Tuple[str, List[float]]] = []
+        self._lock = threading.Lock()
+
+    def add(self, key: str, vector: List[float]) -> None:
+        with self._lock:
+            self._items = [(k, v) for k, v in self._items if k != key]
+            self._items.append((key, vector))
+            del self._items[:-self.max_size]
+
+    def nearest(self, vector: List[float], prefix: str = "") -> Tuple[Optional[str], float]:
+        """Best matching key starting with `prefix`, and its cosine similarity."""
+        best_key, best_score = None, 0.0
+        with self._lock:
+            items = list(self._items)
+        for key, candidate in items:
+            if key.startswith(prefix):
+                score = _cosine(vector, candidate)
+                if score > best_score:
+                    best_key, best_score = key, score
+        return best_key, best_score
+
+
+def litellm_embedder(model: str) -> Callable[[str], List[float]]:
+    """Embedding function backed by litellm (installed with crewai)."""
+    def embed(text: str) -> List[float]:
+        import litellm
+        return litellm.embedding(model=model, input=[text]).data[0]["embedding"]
+    return embed
+
+# -----------------------------------------------------------------------------
+# Curator Cache
+# -----------------------------------------------------------------------------
+
+class CuratorCache:
+    """Stores (playlist name, songs) per normalized prompt for CURATOR_CACHE_TTL."""
+
+    def __init__(self, store: TrackCache, embed: Optional[Callable[[str], List[float]]] = None,
+                 threshold: float = CURATOR_SIMILARITY_THRESHOLD):
+        self.store = store
+        self.embed = embed
+        self.threshold = threshold
+        self.index = VectorIndex()
+
+    def get(self, prompt: str) -> Optional[Tuple[str, List[Song]]]:
+        """Return the cached (name, songs) for this prompt or a near-identical one."""
+        key = prompt_key(prompt)
+        found, value = self.store.get(key)
+        if not found and self.embed is not None:
+            try:
+                vector = self.embed(normalize_prompt(prompt))
+            except Exception as e:
+                print(f"⚠️ Prompt embedding failed: {e}")
+                return None
+            # Only reuse lists curated for the same requested size
+            near_key, score = self.index.nearest(vector, prefix=key.split("|", 1)[0] + "|")
+            if near_key and score >= self.threshold:
+                found, value = self.store.get(near_key)
+        if not found or not value:
+            return None
+        return value["name"], [Song(title, artist) for title, artist in value["songs"]]
+
+    def put(self, prompt: str, name: str, songs: List[Song]) -> None:
+        key = prompt_key(prompt)
+        self.store.set(key, {"name": name, "songs": [list(song) for song in songs]})
+        if self.embed is not None:
+            try:
+                self.index.add(key, self.embed(normalize_prompt(prompt)))
+            except Exception as e:
+                print(f"⚠️ Prompt embedding failed: {e}")
+
+
+_cache: Optional[CuratorCache] = None
+_cache_lock = threading.Lock()
+
+def get_curator_cache() -> CuratorCache:
+    """Return the process-wide CuratorCache configured from the environment."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            disk = SQLiteCache(CURATOR_CACHE_PATH) if CURATOR_CACHE_PATH else None
+            store = TrackCache(LRUCache(CURATOR_CACHE_SIZE), disk, ttl=CURATOR_CACHE_TTL)
+            embed = litellm_embedder(CURATOR_EMBEDDING_MODEL) if CURATOR_EMBEDDING_MODEL else None
+            _cache = CuratorCache(store, embed)
+        return _cache
@@ -0,0 +1,49 @@
+"""
+Scripted stand-in for the music curator LLM, for benchmarks and offline runs
+"""
+
+import time
+import random
+import hashlib
+from typing import Optional
+
+from spotify_smart_playlist_creator.curator_cache import requested_song_count
+
+# -----------------------------------------------------------------------------
+# Configuration & Constants
+# -----------------------------------------------------------------------------
+
+DEFAULT_SONG_COUNT = 20
+
+ARTISTS = [
+    "Blink-182", "Green Day", "Sum 41", "Radiohead", "Daft Punk", "Caetano Veloso", "Gilberto Gil",
+    "Fleetwood Mac", "The Strokes", "Arctic Monkeys", "Nina Simone", "Massive Attack", "Portishead",
+    "Bon Iver", "Rosalía", "Kendrick Lamar", "Björk", "Marisa Monte", "Tame Impala", "Khruangbin",
+]
+
+# -----------------------------------------------------------------------------
+# Scripted Curator
+# -----------------------------------------------------------------------------
+
+class ScriptedCurator:
+    """Returns a canned curator answer after a fixed "thinking" delay.
+
+    Output has the same shape as the music curator task ("Playlist Name: ..."
+    followed by numbered '"Title" by Artist' lines) and is deterministic per
+    prompt, so repeated benchmark runs search the same songs.
+    """
+
+    def __init__(self, latency_ms: float = 0.0, song_count: Optional[int] = None):
+        self.latency_ms = latency_ms
+        self.song_count = song_count
+
+    def __call__(self, user_prompt: str, job=None) -> str:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        count = self.song_count or requested_song_count(user_prompt) or DEFAULT_SONG_COUNT
+        seed = int(hashlib.sha256(user_prompt.encode("utf-8")).hexdigest()[:8], 16)
+        rng = random.Random(seed)
+        lines = [f"Playlist Name: Scripted Mix {seed % 10000:04d}", ""]
+        for n in range(1, count + 1):
+            lines.append(f'{n}. "Track {seed % 997}-{n}" by {rng.choice(ARTISTS)}')
+        return "\n".join(lines)
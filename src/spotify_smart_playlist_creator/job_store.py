@@ -0,0 +1,261 @@
+"""
+Job result and log storage shared by the web workers (in-memory or Redis)
+"""
+
+import os
+import json
+import time
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, List, Optional, Tuple
+
+from spotify_smart_playlist_creator.log_channel import LogChannel
+
+# -----------------------------------------------------------------------------
+# Configuration & Constants
+# -----------------------------------------------------------------------------
+
+JOB_STORE_URL = os.environ.get("JOB_STORE_URL", "")  # e.g. redis://localhost:6379/0; empty = in-memory
+JOB_TTL = float(os.environ.get("JOB_TTL", str(24 * 3600)))
+JOB_STORE_MAX_JOBS = int(os.environ.get("JOB_STORE_MAX_JOBS", "1000"))
+JOB_MAX_LOG_ENTRIES = int(os.environ.get("JOB_MAX_LOG_ENTRIES", "500"))
+
+# -----------------------------------------------------------------------------
+# Job Store Interface
+# -----------------------------------------------------------------------------
+
+class JobStore(ABC):
+    """Where a job's result and progress log live while the browser follows it."""
+
+    @abstractmethod
+    def create(self, job_id: str) -> None:
+        """Register a new job with no result and an empty log."""
+
+    @abstractmethod
+    def exists(self, job_id: str) -> bool:
+        """Whether the job is known (and not yet evicted)."""
+
+    @abstractmethod
+    def append_log(self, job_id: str, message: str) -> dict:
+        """Append a log line and wake subscribers; returns the stored entry."""
+
+    @abstractmethod
+    def wait_for_logs(self, job_id: str, after_id: int = 0,
+                      timeout: Optional[float] = None) -> Tuple[List[dict], bool]:
+        """Block until entries newer than `after_id` exist or the job finishes.
+
+        Returns (new_entries, finished).
+        """
+
+    @abstractmethod
+    def set_result(self, job_id: str, result: Any) -> None:
+        """Store the final result and mark the job finished."""
+
+    @abstractmethod
+    def get_result(self, job_id: str) -> Tuple[bool, Any]:
+        """Return (finished, result)."""
+
+    @abstractmethod
+    def request_cancel(self, job_id: str) -> None:
+        """Ask whichever worker process runs the job to cancel it."""
+
+    @abstractmethod
+    def cancel_requested(self, job_id: str) -> bool:
+        """Whether request_cancel() was called for the job."""
+
+    @abstractmethod
+    def delete(self, job_id: str) -> None:
+        """Forget a job entirely."""
+
+# -----------------------------------------------------------------------------
+# In-memory Backend
+# -----------------------------------------------------------------------------
+
+class _MemoryJob:
+    def __init__(self, max_log_entries: int):
+        self.log = LogChannel(max_log_entries)
+        self.result = None
+        self.cancel_requested = False
+        self.updated_at = time.time()
+
+
+class MemoryJobStore(JobStore):
+    """Single-process store with TTL and size-bounded eviction."""
+
+    def __init__(self, ttl: float = JOB_TTL, max_jobs: int = JOB_STORE_MAX_JOBS,
+                 max_log_entries: int = JOB_MAX_LOG_ENTRIES):
+        self.ttl = ttl
+        self.max_jobs = max_jobs
+        self.max_log_entries = max_log_entries
+        self._jobs: "OrderedDict[str, _MemoryJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict(self, now: float) -> None:
+        for job_id, job in list(self._jobs.items()):
+            if now - job.updated_at <= self.ttl:
+                break  # jobs are kept in last-updated order
+            del self._jobs[job_id]
+        while len(self._jobs) > self.max_jobs:
+            self._jobs.popitem(last=False)
+
+    def _get(self, job_id: str, create: bool = False) -> Optional[_MemoryJob]:
+        now = time.time()
+        with self._lock:
+            self._evict(now)
+            job = self._jobs.get(job_id)
+            if job is None and create:
+                job = self._jobs[job_id] = _MemoryJob(self.max_log_entries)
+            if job is not None:
+                job.updated_at = now
+                self._jobs.move_to_end(job_id)
+            return job
+
+    def create(self, job_id: str) -> None:
+        self._get(job_id, create=True)
+
+    def exists(self, job_id: str) -> bool:
+        return self._get(job_id) is not None
+
+    def append_log(self, job_id: str, message: str) -> dict:
+        return self._get(job_id, create=True).log.publish(message)
+
+    def wait_for_logs(self, job_id, after_id=0, timeout=None):
+        job = self._get(job_id)
+        if job is None:
+            return [], True
+        return job.log.wait(after_id, timeout)
+
+    def set_result(self, job_id: str, result: Any) -> None:
+        job = self._get(job_id, create=True)
+        job.result = result
+        job.log.close()
+
+    def get_result(self, job_id: str) -> Tuple[bool, Any]:
+        job = self._get(job_id)
+        if job is None:
+            return False, None
+        return job.log.closed, job.result
+
+    def request_cancel(self, job_id: str) -> None:
+        job = self._get(job_id)
+        if job is not None:
+            job.cancel_requested = True
+
+    def cancel_requested(self, job_id: str) -> bool:
+        job = self._get(job_id)
+        return job is not None and job.cancel_requested
+
+    def delete(self, job_id: str) -> None:
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+# -----------------------------------------------------------------------------
+# Redis Backend
+# -----------------------------------------------------------------------------
+
+class RedisJobStore(JobStore):
+    """Store backed by any redis-py compatible client (redis.Redis, fakeredis.FakeRedis).
+
+    Per job: a capped list of JSON log entries, an id counter, a result key, a
+    cancel flag and a pub/sub channel used to wake subscribers in any worker
+    process.
+    All keys expire after `ttl` seconds.
+    """
+
+    def __init__(self, client, ttl: float = JOB_TTL, max_log_entries: int = JOB_MAX_LOG_ENTRIES,
+                 prefix: str = "spotify_playlist_job"):
+        self.client = client
+        self.ttl = int(ttl)
+        self.max_log_entries = max_log_entries
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RedisJobStore":
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("RedisJobStore requires the 'redis' package (pip install redis)") from e
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def _key(self, job_id: str, name: str) -> str:
+        return f"{self.prefix}:{job_id}:{name}"
+
+    def _entries(self, job_id: str, after_id: int) -> List[dict]:
+        raw = self.client.lrange(self._key(job_id, "logs"), 0, -1)
+        entries = [json.loads(item) for item in raw]
+        return [entry for entry in entries if entry['id'] > after_id]
+
+    def create(self, job_id: str) -> None:
+        pipe = self.client.pipeline()
+        pipe.set(self._key(job_id, "seq"), 0, ex=self.ttl)
+        pipe.delete(self._key(job_id, "logs"), self._key(job_id, "result"), self._key(job_id, "cancel"))
+        pipe.execute()
+
+    def exists(self, job_id: str) -> bool:
+        return bool(self.client.exists(self._key(job_id, "seq")))
+
+    def append_log(self, job_id: str, message: str) -> dict:
+        entry = {
+            'id': int(self.client.incr(self._key(job_id, "seq"))),
+            'timestamp': time.time(),
+            'message': message
+        }
+        logs_key = self._key(job_id, "logs")
+        pipe = self.client.pipeline()
+        pipe.rpush(logs_key, json.dumps(entry))
+        pipe.ltrim(logs_key, -self.max_log_entries, -1)
+        pipe.expire(logs_key, self.ttl)
+        pipe.expire(self._key(job_id, "seq"), self.ttl)
+        pipe.publish(self._key(job_id, "events"), entry['id'])
+        pipe.execute()
+        return entry
+
+    def wait_for_logs(self, job_id, after_id=0, timeout=None):
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self._key(job_id, "events"))
+        try:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while True:
+                # Check after subscribing so nothing published in between is missed
+                entries = self._entries(job_id, after_id)
+                finished = self.get_result(job_id)[0] or not self.exists(job_id)
+                if entries or finished:
+                    return entries, finished
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return [], False
+                pubsub.get_message(timeout=min(remaining, 1.0) if remaining is not None else 1.0)
+        finally:
+            pubsub.close()
+
+    def set_result(self, job_id: str, result: Any) -> None:
+        pipe = self.client.pipeline()
+        pipe.set(self._key(job_id, "result"), json.dumps({'value': result}), ex=self.ttl)
+        pipe.publish(self._key(job_id, "events"), "done")
+        pipe.execute()
+
+    def get_result(self, job_id: str) -> Tuple[bool, Any]:
+        raw = self.client.get(self._key(job_id, "result"))
+        if raw is None:
+            return False, None
+        return True, json.loads(raw)['value']
+
+    def request_cancel(self, job_id: str) -> None:
+        self.client.set(self._key(job_id, "cancel"), 1, ex=self.ttl)
+
+    def cancel_requested(self, job_id: str) -> bool:
+        return bool(self.client.exists(self._key(job_id, "cancel")))
+
+    def delete(self, job_id: str) -> None:
+        self.client.delete(*(self._key(job_id, name) for name in ("seq", "logs", "result", "cancel")))
+
+# -----------------------------------------------------------------------------
+# Factory
+# -----------------------------------------------------------------------------
+
+def create_job_store(url: str = JOB_STORE_URL) -> JobStore:
+    """Build the store configured by JOB_STORE_URL (in-memory when empty)."""
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisJobStore.from_url(url)
+    return MemoryJobStore()
@@ -0,0 +1,203 @@
+"""
+Bounded worker pool for playlist jobs with admission control, cancellation and deadlines
+"""
+
+import os
+import time
+import threading
+from collections import deque
+from typing import Callable, Dict, Optional
+
+from spotify_smart_playlist_creator import metrics
+
+# -----------------------------------------------------------------------------
+# Configuration & Constants
+# -----------------------------------------------------------------------------
+
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "4"))
+JOB_QUEUE_SIZE = int(os.environ.get("JOB_QUEUE_SIZE", "32"))
+JOB_TIMEOUT = float(os.environ.get("JOB_TIMEOUT", "300"))  # 5 minutes of running, not counting queue wait
+FINISHED_JOB_RETENTION = 600.0  # seconds a finished job stays queryable
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED, TIMEOUT = (
+    "queued", "running", "done", "failed", "cancelled", "timeout"
+)
+
+# -----------------------------------------------------------------------------
+# Errors
+# -----------------------------------------------------------------------------
+
+class JobRejected(Exception):
+    """Raised by JobScheduler.submit when the queue is full."""
+
+
+class JobCancelled(Exception):
+    """Raised inside a job once it has been cancelled or has passed its deadline."""
+
+# -----------------------------------------------------------------------------
+# Job
+# -----------------------------------------------------------------------------
+
+class Job:
+    """A unit of work plus the state the scheduler tracks for it."""
+
+    def __init__(self, job_id: str, fn: Callable, args: tuple, timeout: float,
+                 on_timeout: Optional[Callable[["Job"], None]] = None):
+        self.id = job_id
+        self.fn = fn
+        self.args = args
+        self.status = QUEUED
+        self.cancel_event = threading.Event()
+        self.submitted_at = time.time()
+        self.timeout = timeout
+        self.deadline = None  # set when a worker starts the job, so queue wait is not counted
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self.on_timeout = on_timeout
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def check_cancelled(self) -> None:
+        """Raise JobCancelled if the job should stop; call this between steps."""
+        if self.cancel_event.is_set():
+            raise JobCancelled(f"Job {self.id} was {self.status}")
+
+# -----------------------------------------------------------------------------
+# Job Scheduler
+# -----------------------------------------------------------------------------
+
+class JobScheduler:
+    """Runs jobs on a fixed number of worker threads fed by a bounded FIFO queue.
+
+    Jobs are started as `fn(job, *args)`. Cancellation is cooperative: the
+    scheduler sets `job.cancel_event` and the job stops at its next
+    `job.check_cancelled()`. A job's timeout runs from the moment a worker
+    starts it; time spent queued does not count.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, max_queue: int = JOB_QUEUE_SIZE,
+                 default_timeout: float = JOB_TIMEOUT):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.default_timeout = default_timeout
+        self._queue = deque()
+        self._jobs: Dict[str, Job] = {}
+        self._running = 0
+        self._cond = threading.Condition()
+        self._threads = []
+        for i in range(workers):
+            thread = threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        threading.Thread(target=self._watchdog, name="job-watchdog", daemon=True).start()
+
+    def submit(self, job_id: str, fn: Callable, *args, timeout: Optional[float] = None,
+               on_timeout: Optional[Callable[[Job], None]] = None) -> Job:
+        """Queue a job, or raise JobRejected if the queue is full."""
+        job = Job(job_id, fn, args, timeout or self.default_timeout, on_timeout)
+        with self._cond:
+            if len(self._queue) >= self.max_queue:
+                raise JobRejected(f"Job queue is full ({self.max_queue} waiting)")
+            self._queue.append(job)
+            self._jobs[job_id] = job
+            self._cond.notify()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._cond:
+            return self._jobs.get(job_id)
+
+    def position(self, job_id: str) -> Optional[int]:
+        """1-based position in the queue, 0 if running, None if unknown or finished."""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job.status not in (QUEUED, RUNNING):
+                return None
+            if job.status == RUNNING:
+                return 0
+            return self._queue.index(job) + 1
+
+    def estimated_wait(self, job_id: str, average_job_seconds: float = 60.0) -> Optional[float]:
+        """Rough seconds until a queued job starts, assuming jobs take `average_job_seconds`."""
+        position = self.position(job_id)
+        if position is None:
+            return None
+        return (position // max(self.workers, 1)) * average_job_seconds if position else 0.0
+
+    def cancel(self, job_id: str, status: str = CANCELLED) -> bool:
+        """Cancel a queued or running job. Returns False if it already finished."""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job.status not in (QUEUED, RUNNING):
+                return False
+            if job.status == QUEUED:
+                self._queue.remove(job)
+                job.finished_at = time.time()
+            job.status = status
+            job.cancel_event.set()
+            return True
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "workers": self.workers,
+                "running": self._running,
+                "queued": len(self._queue),
+                "max_queue": self.max_queue,
+            }
+
+    def metric_samples(self):
+        """Queue depth and active jobs as metric families for /metrics."""
+        stats = self.stats()
+        return [
+            ("playlist_jobs_queued", "gauge", "Jobs waiting for a worker", [({}, stats["queued"])]),
+            ("playlist_jobs_active", "gauge", "Jobs running on a worker", [({}, stats["running"])]),
+            ("playlist_job_workers", "gauge", "Worker threads", [({}, stats["workers"])]),
+            ("playlist_job_queue_capacity", "gauge", "Maximum queued jobs", [({}, stats["max_queue"])]),
+        ]
+
+    def _worker(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._queue)
+                job = self._queue.popleft()
+                job.status = RUNNING
+                job.started_at = time.time()
+                job.deadline = job.started_at + job.timeout
+                self._running += 1
+            metrics.JOB_QUEUE_WAIT_SECONDS.observe(job.started_at - job.submitted_at)
+            try:
+                with metrics.span("job", job_id=job.id):
+                    job.result = job.fn(job, *job.args)
+                status = DONE
+            except JobCancelled:
+                status = job.status
+            except Exception as e:
+                job.error = e
+                status = FAILED
+            with self._cond:
+                self._running -= 1
+                if job.status == RUNNING:
+                    job.status = status
+                job.finished_at = time.time()
+            metrics.JOB_SECONDS.observe(job.finished_at - job.started_at, status=job.status)
+
+    def _watchdog(self) -> None:
+        """Expire running jobs past their deadline and forget long-finished ones."""
+        while True:
+            time.sleep(1.0)
+            now = time.time()
+            expired = []
+            with self._cond:
+                for job_id, job in list(self._jobs.items()):
+                    if job.status == RUNNING and now > job.deadline:
+                        expired.append(job)
+                    elif job.finished_at and now - job.finished_at > FINISHED_JOB_RETENTION:
+                        del self._jobs[job_id]
+            for job in expired:
+                if self.cancel(job.id, status=TIMEOUT) and job.on_timeout:
+                    job.on_timeout(job)
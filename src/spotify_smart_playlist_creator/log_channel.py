@@ -0,0 +1,58 @@
+"""
+Per-job log channels that wake Server-Sent Events subscribers as soon as a line is published
+"""
+
+import time
+import threading
+from collections import deque
+from typing import List, Optional, Tuple
+
+# -----------------------------------------------------------------------------
+# Log Channel
+# -----------------------------------------------------------------------------
+
+class LogChannel:
+    """Append-only, optionally capped log for one job, with blocking reads.
+
+    Entry ids keep increasing when old entries are dropped by the cap, so a
+    subscriber resuming from an evicted id simply continues from the oldest
+    entry still kept.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.entries = deque(maxlen=max_entries)
+        self.last_id = 0
+        self.closed = False
+        self._cond = threading.Condition()
+
+    def publish(self, message: str) -> dict:
+        """Append a message and wake every waiting subscriber."""
+        with self._cond:
+            self.last_id += 1
+            entry = {
+                'id': self.last_id,
+                'timestamp': time.time(),
+                'message': message
+            }
+            self.entries.append(entry)
+            self._cond.notify_all()
+            return entry
+
+    def close(self) -> None:
+        """Mark the job as finished; subscribers drain remaining entries and stop."""
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def since(self, after_id: int = 0) -> List[dict]:
+        with self._cond:
+            return [entry for entry in self.entries if entry['id'] > after_id]
+
+    def wait(self, after_id: int = 0, timeout: Optional[float] = None) -> Tuple[List[dict], bool]:
+        """Block until there are entries newer than `after_id` or the channel closes.
+
+        Returns (new_entries, closed); new_entries is empty if `timeout` elapsed.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self.last_id > after_id or self.closed, timeout=timeout)
+            return [entry for entry in self.entries if entry['id'] > after_id], self.closed
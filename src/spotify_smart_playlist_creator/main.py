@@ -1,11 +1,8 @@
 #!/usr/bin/env python
+import os
 import sys
 import warnings
 
-from datetime import datetime
-
-from spotify_smart_playlist_creator.spotify_crew import SpotifySmartPlaylistCreator
-
 warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
 
 # This main file is intended to be a way for you to run your
@@ -13,16 +10,47 @@ warnings.filterwarnings("ignore", category=SyntaxWarning, module="pysbd")
 # Replace with inputs you want to test with, it will automatically
 # interpolate any tasks and agents information
 
+def build_crew():
+    """
+    Build the full crew; crewai is only imported here, so commands start fast.
+    """
+    from spotify_smart_playlist_creator.spotify_crew import SpotifySmartPlaylistCreator
+    return SpotifySmartPlaylistCreator().crew()
+
+def sample_inputs():
+    """
+    Inputs matching the tasks' placeholders. Set SPOTIFY_ACCESS_TOKEN to a real
+    token, or point SPOTIFY_API_BASE_URL at the mock server (mock_spotify.py).
+    The user ID is added by with_user_id() right before the crew runs.
+    """
+    return {
+        'user_prompt': 'Create a playlist of 10 pop punk songs from the 90s and 2000s, with bands like Blink-182, Green Day and Sum 41.',
+        'token': os.environ.get('SPOTIFY_ACCESS_TOKEN', 'mock-token'),
+    }
+
+def with_user_id(inputs):
+    """
+    Add the token owner's user ID: SPOTIFY_USER_ID if set, otherwise the
+    (cached) /v1/me profile, fetched only once the crew is about to run.
+    """
+    user_id = os.environ.get('SPOTIFY_USER_ID')
+    if not user_id:
+        from spotify_smart_playlist_creator.tools.profile_cache import get_profile
+        user_id = get_profile(inputs['token'])['id']
+    return {**inputs, 'user_id': user_id}
+
 def run():
     """
     Run the crew.
     """
     inputs = {
+        **sample_inputs(),
         'user_prompt': 'Crie uma playlist de 20 músicas de punk pop dos anos 90 e 2000, com bandas como Blink-182, Green Day, Sum 41 e outras similares.',
     }
     
     try:
-        SpotifySmartPlaylistCreator().crew().kickoff(inputs=inputs)
+        crew = build_crew()
+        crew.kickoff(inputs=with_user_id(inputs))
     except Exception as e:
         raise Exception(f"An error occurred while running the crew: {e}")
 
@@ -31,12 +59,10 @@ def train():
     """
     Train the crew for a given number of iterations.
     """
-    inputs = {
-        "topic": "AI LLMs",
-        'current_year': str(datetime.now().year)
-    }
+    inputs = sample_inputs()
     try:
-        SpotifySmartPlaylistCreator().crew().train(n_iterations=int(sys.argv[1]), filename=sys.argv[2], inputs=inputs)
+        crew = build_crew()
+        crew.train(n_iterations=int(sys.argv[1]), filename=sys.argv[2], inputs=with_user_id(inputs))
 
     except Exception as e:
         raise Exception(f"An error occurred while training the crew: {e}")
@@ -46,7 +72,7 @@ def replay():
     Replay the crew execution from a specific task.
     """
     try:
-        SpotifySmartPlaylistCreator().crew().replay(task_id=sys.argv[1])
+        build_crew().replay(task_id=sys.argv[1])
 
     except Exception as e:
         raise Exception(f"An error occurred while replaying the crew: {e}")
@@ -55,13 +81,11 @@ def test():
     """
     Test the crew execution and returns the results.
     """
-    inputs = {
-        "topic": "AI LLMs",
-        "current_year": str(datetime.now().year)
-    }
-    
+    inputs = sample_inputs()
+
     try:
-        SpotifySmartPlaylistCreator().crew().test(n_iterations=int(sys.argv[1]), eval_llm=sys.argv[2], inputs=inputs)
+        crew = build_crew()
+        crew.test(n_iterations=int(sys.argv[1]), eval_llm=sys.argv[2], inputs=with_user_id(inputs))
 
     except Exception as e:
         raise Exception(f"An error occurred while testing the crew: {e}")
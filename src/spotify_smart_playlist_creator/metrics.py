@@ -0,0 +1,403 @@
+"""
+Prometheus-style metrics and per-job trace spans for the playlist pipeline
+
+Metrics are rendered in the Prometheus text format by `render()` (served on
+/metrics). Spans follow the OpenTelemetry data model (trace/span ids, parent,
+start/end in unix nanoseconds, attributes, status); each job is one trace,
+kept in memory for /traces/<job_id> and optionally appended to a JSONL file.
+"""
+
+import os
+import json
+import time
+import uuid
+import hashlib
+import threading
+import contextvars
+from bisect import bisect_left
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# -----------------------------------------------------------------------------
+# Configuration & Constants
+# -----------------------------------------------------------------------------
+
+TRACE_EXPORT_PATH = os.environ.get("TRACE_EXPORT_PATH", "")  # JSONL file of finished spans; empty disables
+TRACE_MAX_JOBS = int(os.environ.get("TRACE_MAX_JOBS", "200"))
+TRACE_MAX_SPANS_PER_JOB = int(os.environ.get("TRACE_MAX_SPANS_PER_JOB", "2000"))
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+# (labels, value) pairs of one metric family
+Samples = Iterable[Tuple[Dict[str, str], float]]
+# A collector returns (name, type, help, samples) families computed at scrape time
+Collector = Callable[[], Iterable[Tuple[str, str, str, Samples]]]
+
+# -----------------------------------------------------------------------------
+# Metric Types
+# -----------------------------------------------------------------------------
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        (registry or REGISTRY).register(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _labels(self, key: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        with self._lock:
+            return [(self.name, self._labels(key), value) for key, value in self._values.items()]
+
+
+class Counter(_Metric):
+    """Monotonically increasing value per label set."""
+
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """Value that can go up and down per label set."""
+
+    type = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram with _sum and _count, per label set."""
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS, registry=None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        with self._lock:
+            values = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+        result = []
+        for key, counts, total in values:
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                result.append((f"{self.name}_bucket", {**labels, "le": _format_value(float(bound))}, cumulative))
+            result.append((f"{self.name}_sum", labels, total))
+            result.append((f"{self.name}_count", labels, cumulative))
+        return result
+
+# -----------------------------------------------------------------------------
+# Registry & Exposition
+# -----------------------------------------------------------------------------
+
+class Registry:
+    """Metrics and scrape-time collectors rendered together by `render()`."""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Collector] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> None:
+        with self._lock:
+            self._metrics.append(metric)
+
+    def register_collector(self, collector: Collector) -> None:
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics, collectors = list(self._metrics), list(self._collectors)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        for collector in collectors:
+            try:
+                families = list(collector())
+            except Exception as e:
+                print(f"⚠️ Metrics collector failed: {e}")
+                continue
+            for name, metric_type, documentation, samples in families:
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def register_collector(collector: Collector) -> None:
+    """Add a function whose metric families are computed on every scrape."""
+    REGISTRY.register_collector(collector)
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    return REGISTRY.render()
+
+# -----------------------------------------------------------------------------
+# Pipeline Metrics
+# -----------------------------------------------------------------------------
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "spotify_http_request_seconds", "Spotify API calls, including scheduler waits and retries",
+    ["method", "endpoint", "status"],
+)
+HTTP_RETRIES = Counter("spotify_http_retries_total", "Extra attempts made for Spotify API calls",
+                       ["method", "endpoint"])
+HTTP_BYTES = Histogram("spotify_http_bytes", "Request and response body sizes of Spotify API calls",
+                       ["method", "endpoint", "direction"], buckets=BYTES_BUCKETS)
+TOOL_SECONDS = Histogram("playlist_tool_seconds", "Agent tool calls", ["tool", "outcome"])
+TASK_SECONDS = Histogram("playlist_task_seconds", "Crew tasks, from start to output", ["task", "agent"])
+STAGE_SECONDS = Histogram("playlist_stage_seconds", "Pipeline stages (curate, search, create, ...)", ["stage"])
+JOB_SECONDS = Histogram("playlist_job_seconds", "Playlist jobs, from start to finish", ["status"])
+JOB_QUEUE_WAIT_SECONDS = Histogram("playlist_job_queue_wait_seconds", "Time jobs spent waiting for a worker")
+
+# -----------------------------------------------------------------------------
+# Spans
+# -----------------------------------------------------------------------------
+
+class Span:
+    """One timed operation inside a job's trace."""
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: dict):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes = dict(attributes)
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.status = {"code": "OK"}
+
+    def set_attribute(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def to_dict(self) -> dict:
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id,
+            "name": self.name,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "durationMs": round((self.end_ns - self.start_ns) / 1e6, 3) if self.end_ns else None,
+            "attributes": self.attributes,
+            "status": self.status,
+        }
+
+
+class TraceBuffer:
+    """Finished spans of the most recent TRACE_MAX_JOBS traces, optionally mirrored to a JSONL file."""
+
+    def __init__(self, max_traces: int = TRACE_MAX_JOBS, max_spans: int = TRACE_MAX_SPANS_PER_JOB,
+                 export_path: str = TRACE_EXPORT_PATH):
+        self.max_traces = max_traces
+        self.max_spans = max_spans
+        self.export_path = export_path
+        self._traces: "OrderedDict[str, List[dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, span: Span) -> None:
+        record = span.to_dict()
+        with self._lock:
+            spans = self._traces.setdefault(span.trace_id, [])
+            self._traces.move_to_end(span.trace_id)
+            if len(spans) < self.max_spans:
+                spans.append(record)
+            while len(self._traces) > self.max_traces:
+                self._traces.popitem(last=False)
+            if self.export_path:
+                with open(self.export_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record) + "\n")
+
+    def get(self, trace_id: str) -> List[dict]:
+        with self._lock:
+            return sorted(self._traces.get(trace_id, []), key=lambda record: record["startTimeUnixNano"])
+
+
+TRACES = TraceBuffer()
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+
+
+def trace_id_for(job_id: str) -> str:
+    """32-hex trace id for a job (the job's UUID itself when it is one)."""
+    try:
+        return uuid.UUID(job_id).hex
+    except (ValueError, AttributeError, TypeError):
+        return hashlib.sha256(str(job_id).encode("utf-8")).hexdigest()[:32]
+
+
+@contextmanager
+def span(name: str, job_id: Optional[str] = None, **attributes):
+    """Time the block as a child of the current span, or as the root span of `job_id`'s trace.
+
+    Outside any job the span is still yielded (so callers can set attributes)
+    but it is not recorded.
+    """
+    parent = _current_span.get()
+    if job_id is not None:
+        current = Span(name, trace_id_for(job_id), None, {"job.id": job_id, **attributes})
+    elif parent is not None:
+        current = Span(name, parent.trace_id, parent.span_id, attributes)
+    else:
+        current = Span(name, "", None, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.status = {"code": "ERROR", "message": f"{type(e).__name__}: {e}"}
+        raise
+    finally:
+        _current_span.reset(token)
+        current.end_ns = time.time_ns()
+        if current.trace_id:
+            TRACES.add(current)
+
+
+def record_span(name: str, start: float, end: float, **attributes) -> None:
+    """Record an already finished operation (unix timestamps) under the current span."""
+    parent = _current_span.get()
+    if parent is None:
+        return
+    finished = Span(name, parent.trace_id, parent.span_id, attributes)
+    finished.start_ns, finished.end_ns = int(start * 1e9), int(end * 1e9)
+    TRACES.add(finished)
+
+
+def get_trace(job_id: str) -> List[dict]:
+    """Finished spans of a job's trace, oldest first."""
+    return TRACES.get(trace_id_for(job_id))
+
+# -----------------------------------------------------------------------------
+# Instrumentation Helpers
+# -----------------------------------------------------------------------------
+
+class HttpCall:
+    """Outcome of one logical Spotify API call, filled in by its attempts."""
+
+    def __init__(self):
+        self.attempts = 0
+        self.status = "error"
+        self.response_bytes = 0
+
+    def record(self, response):
+        """Note one attempt's response and return it unchanged."""
+        self.attempts += 1
+        self.status = str(response.status)
+        self.response_bytes = len(response.body or b"")
+        return response
+
+
+@contextmanager
+def http_call(method: str, endpoint: str, request_bytes: int = 0):
+    """Time a Spotify API call (all its attempts) and record status, retries and sizes."""
+    call = HttpCall()
+    started = time.perf_counter()
+    with span(f"HTTP {method} {endpoint}", **{"http.method": method, "http.route": endpoint}) as current:
+        try:
+            yield call
+        finally:
+            retries = max(call.attempts - 1, 0)
+            current.set_attribute("http.status_code", call.status)
+            current.set_attribute("http.retries", retries)
+            current.set_attribute("http.response_bytes", call.response_bytes)
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, method=method, endpoint=endpoint,
+                                         status=call.status)
+            if retries:
+                HTTP_RETRIES.inc(retries, method=method, endpoint=endpoint)
+            if request_bytes:
+                HTTP_BYTES.observe(request_bytes, method=method, endpoint=endpoint, direction="sent")
+            HTTP_BYTES.observe(call.response_bytes, method=method, endpoint=endpoint, direction="received")
+
+
+class ToolCall:
+    """Outcome of one agent tool call; tools signal failures by returning an {"error": ...} object."""
+
+    def __init__(self):
+        self.outcome = "exception"
+
+    def record(self, result):
+        self.outcome = "error" if isinstance(result, str) and result.startswith('{"error"') else "ok"
+        return result
+
+
+@contextmanager
+def tool_call(tool: str):
+    """Time an agent tool call and record whether it succeeded."""
+    call = ToolCall()
+    started = time.perf_counter()
+    with span(f"tool {tool}", **{"tool.name": tool}) as current:
+        try:
+            yield call
+        finally:
+            current.set_attribute("tool.outcome", call.outcome)
+            TOOL_SECONDS.observe(time.perf_counter() - started, tool=tool, outcome=call.outcome)
@@ -0,0 +1,425 @@
+"""
+Local stand-in for the Spotify Web API, for load tests and offline development
+
+Serves the endpoints the app uses (search, /me, create playlist, read, add,
+remove, reorder and replace playlist items, and the accounts service's
+/api/token) with configurable latency, 429 throttling and 5xx error
+injection. Point the app at it with
+SPOTIFY_API_BASE_URL=http://127.0.0.1:8899 (and SPOTIFY_ACCOUNTS_BASE_URL).
+"""
+
+import re
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+# -----------------------------------------------------------------------------
+# Configuration & Constants
+# -----------------------------------------------------------------------------
+
+DEFAULT_PORT = 8899
+MOCK_USER_ID = "mock_user"
+MAX_TRACKS_PER_REQUEST = 100
+
+PLAYLISTS_RE = re.compile(r"^/v1/users/(?P<user_id>[^/]+)/playlists$")
+PLAYLIST_RE = re.compile(r"^/v1/playlists/(?P<playlist_id>[^/]+)$")
+PLAYLIST_TRACKS_RE = re.compile(r"^/v1/playlists/(?P<playlist_id>[^/]+)/tracks$")
+FIELD_RE = re.compile(r"(\w+):(.+?)(?=\s+\w+:|$)")
+
+# -----------------------------------------------------------------------------
+# Fault Injection
+# -----------------------------------------------------------------------------
+
+class MockBehavior:
+    """How the mock misbehaves; every rate is a probability per request."""
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, throttle_rate: float = 0.0,
+                 retry_after: int = 1, error_rate: float = 0.0, not_found_rate: float = 0.0,
+                 token_ttl: float = 3600.0, country: str = "US", unplayable_rate: float = 0.0,
+                 seed: Optional[int] = None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.error_rate = error_rate
+        self.not_found_rate = not_found_rate
+        self.token_ttl = token_ttl  # lifetime of access tokens issued by /api/token
+        self.country = country  # the /v1/me user's market
+        self.unplayable_rate = unplayable_rate  # fraction of (track, market) pairs that need relinking
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def roll(self) -> float:
+        with self._lock:
+            return self._random.random()
+
+    def delay(self) -> None:
+        with self._lock:
+            jitter = self._random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        seconds = max(0.0, self.latency_ms + jitter) / 1000
+        if seconds:
+            time.sleep(seconds)
+
+# -----------------------------------------------------------------------------
+# Fake Catalog
+# -----------------------------------------------------------------------------
+
+def _stable_hash(text: str) -> int:
+    return int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:12], 16)
+
+
+def fake_track(title: str, artist: str) -> dict:
+    """Deterministic track for a (title, artist) pair, shaped like a Spotify search item."""
+    digest = _stable_hash(f"{title.lower()}|{artist.lower()}")
+    track_id = f"{digest:022x}"[-22:]
+    return {
+        "id": track_id,
+        "uri": f"spotify:track:{track_id}",
+        "name": title,
+        "artists": [{"name": artist or "Unknown Artist"}],
+        "duration_ms": 150_000 + digest % 150_000,
+        "popularity": digest % 100,
+        "is_playable": True,
+        "external_urls": {"spotify": f"https://open.spotify.com/track/{track_id}"},
+    }
+
+
+def search_candidates(title: str, artist: str, market: Optional[str] = None,
+                      unplayable_rate: float = 0.0) -> list:
+    """The requested track plus a live version and a cover, in a query-dependent order.
+
+    With a market, a deterministic share of tracks is unavailable there: like
+    Spotify, that version comes back with is_playable false, and a relinked
+    playable copy (with `linked_from`) is listed after it.
+    """
+    candidates = [
+        fake_track(title, artist),
+        fake_track(f"{title} - Live", artist),
+        fake_track(title, "The Cover Band"),
+    ]
+    shift = _stable_hash(f"{title}|{artist}") % len(candidates)
+    candidates = candidates[shift:] + candidates[:shift]
+    if not market or not unplayable_rate:
+        return candidates
+    results = []
+    for track in candidates:
+        if _stable_hash(f"{track['id']}|{market}") % 1000 >= unplayable_rate * 1000:
+            results.append(track)
+            continue
+        relinked_id = f"{_stable_hash(track['id'] + market):022x}"[-22:]
+        results.append(dict(track, is_playable=False))
+        results.append(dict(track, id=relinked_id, uri=f"spotify:track:{relinked_id}",
+                            linked_from={"id": track["id"], "uri": track["uri"]},
+                            external_urls={"spotify": f"https://open.spotify.com/track/{relinked_id}"}))
+    return results
+
+
+def _parse_query(query: str):
+    fields = dict((key.lower(), value.strip()) for key, value in FIELD_RE.findall(query))
+    return fields.get("track", query), fields.get("artist", "")
+
+# -----------------------------------------------------------------------------
+# Mock Server
+# -----------------------------------------------------------------------------
+
+class MockSpotifyServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer holding the injected behavior and created playlists."""
+
+    daemon_threads = True
+
+    def __init__(self, address, behavior: Optional[MockBehavior] = None):
+        super().__init__(address, MockSpotifyHandler)
+        self.behavior = behavior or MockBehavior()
+        self.playlists = {}
+        self.lock = threading.Lock()
+        self.request_count = 0
+        self.tokens = {}  # access token issued by /api/token -> expiry time
+        self.refresh_tokens = set()
+        self.token_count = 0
+
+    def issue_token(self, refresh_token: Optional[str] = None) -> dict:
+        """Issue an access token (and a refresh token unless one is being reused)."""
+        with self.lock:
+            self.token_count += 1
+            access_token = f"mock-access-{self.token_count}"
+            self.tokens[access_token] = time.time() + self.behavior.token_ttl
+            if refresh_token is None:
+                refresh_token = f"mock-refresh-{self.token_count}"
+                self.refresh_tokens.add(refresh_token)
+        return {"access_token": access_token, "token_type": "Bearer", "expires_in": self.behavior.token_ttl,
+                "refresh_token": refresh_token, "scope": "playlist-modify-private playlist-modify-public"}
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class MockSpotifyHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so the client's connection pool is exercised
+    disable_nagle_algorithm = True  # headers and body are separate writes; don't stall on delayed ACKs
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: dict, headers: Optional[dict] = None) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status: int, message: str, headers: Optional[dict] = None) -> None:
+        self._send_json(status, {"error": {"status": status, "message": message}}, headers)
+
+    def _read_body(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        if not raw:
+            return {}
+        if self.headers.get("Content-Type", "").startswith("application/x-www-form-urlencoded"):
+            return dict(urllib.parse.parse_qsl(raw.decode()))
+        return json.loads(raw)
+
+    def _dispatch(self, method: str) -> None:
+        server: MockSpotifyServer = self.server
+        with server.lock:
+            server.request_count += 1
+        behavior = server.behavior
+        body = self._read_body() if method in ("POST", "PUT", "DELETE") else {}
+        behavior.delay()
+
+        url = urllib.parse.urlsplit(self.path)
+        if method == "POST" and url.path == "/api/token":
+            return self._token(body)
+        authorization = self.headers.get("Authorization", "")
+        if not authorization.startswith("Bearer "):
+            return self._error(401, "No token provided")
+        expires_at = server.tokens.get(authorization[len("Bearer "):])
+        if expires_at is not None and expires_at < time.time():
+            return self._error(401, "The access token expired")
+        if behavior.throttle_rate and behavior.roll() < behavior.throttle_rate:
+            return self._error(429, "API rate limit exceeded", {"Retry-After": str(behavior.retry_after)})
+        if behavior.error_rate and behavior.roll() < behavior.error_rate:
+            return self._error(503, "Service unavailable")
+
+        params = dict(urllib.parse.parse_qsl(url.query))
+        if method == "GET" and url.path == "/v1/search":
+            return self._search(params)
+        if method == "GET" and url.path == "/v1/me":
+            return self._send_json(200, {
+                "id": MOCK_USER_ID,
+                "display_name": "Mock User",
+                "country": behavior.country,
+                "external_urls": {"spotify": f"https://open.spotify.com/user/{MOCK_USER_ID}"},
+            })
+        match = PLAYLISTS_RE.match(url.path)
+        if method == "POST" and match:
+            return self._create_playlist(match.group("user_id"), body)
+        match = PLAYLIST_RE.match(url.path)
+        if method == "GET" and match:
+            return self._get_playlist(match.group("playlist_id"))
+        match = PLAYLIST_TRACKS_RE.match(url.path)
+        if method == "GET" and match:
+            return self._get_items(match.group("playlist_id"), params)
+        if method == "POST" and match:
+            return self._add_tracks(match.group("playlist_id"), body)
+        if method == "DELETE" and match:
+            return self._remove_tracks(match.group("playlist_id"), body)
+        if method == "PUT" and match:
+            return self._update_tracks(match.group("playlist_id"), body)
+        return self._error(404, "Service not found")
+
+    def _token(self, form: dict) -> None:
+        """Accounts service: authorization_code and refresh_token grants (any client credentials)."""
+        if not self.headers.get("Authorization", "").startswith("Basic "):
+            return self._send_json(400, {"error": "invalid_client"})
+        grant = form.get("grant_type")
+        if grant == "authorization_code" and form.get("code"):
+            return self._send_json(200, self.server.issue_token())
+        if grant == "refresh_token" and form.get("refresh_token") in self.server.refresh_tokens:
+            token = self.server.issue_token(form["refresh_token"])
+            del token["refresh_token"]  # like Spotify, usually no new refresh token on refresh
+            return self._send_json(200, token)
+        return self._send_json(400, {"error": "invalid_grant"})
+
+    def _search(self, params: dict) -> None:
+        if "q" not in params:
+            return self._error(400, "No search query")
+        title, artist = _parse_query(params["q"])
+        behavior = self.server.behavior
+        missing = behavior.not_found_rate and _stable_hash(params["q"]) % 1000 < behavior.not_found_rate * 1000
+        items = [] if missing else search_candidates(title, artist, params.get("market"), behavior.unplayable_rate)
+        limit = int(params.get("limit", 20))
+        self._send_json(200, {"tracks": {"items": items[:limit], "limit": limit, "offset": 0, "total": len(items)}})
+
+    def _create_playlist(self, user_id: str, body: dict) -> None:
+        if not body.get("name"):
+            return self._error(400, "Missing playlist name")
+        playlist_id = f"{_stable_hash(f'{user_id}|{time.time_ns()}|{threading.get_ident()}'):022x}"[-22:]
+        playlist = {
+            "id": playlist_id,
+            "name": body["name"],
+            "description": body.get("description", ""),
+            "public": body.get("public", False),
+            "owner": {"id": user_id},
+            "external_urls": {"spotify": f"https://open.spotify.com/playlist/{playlist_id}"},
+        }
+        with self.server.lock:
+            self.server.playlists[playlist_id] = {"playlist": playlist, "uris": []}
+        self._send_json(201, playlist)
+
+    def _add_tracks(self, playlist_id: str, body: dict) -> None:
+        uris = body.get("uris") or []
+        if len(uris) > MAX_TRACKS_PER_REQUEST:
+            return self._error(400, f"Too many ids requested (max {MAX_TRACKS_PER_REQUEST})")
+        with self.server.lock:
+            entry = self.server.playlists.get(playlist_id)
+            if entry is None:
+                return self._error(404, "Invalid playlist Id")
+            position = body.get("position", len(entry["uris"]))
+            entry["uris"][position:position] = uris
+            snapshot = self._snapshot(playlist_id, entry)
+        self._send_json(201, {"snapshot_id": snapshot})
+
+    @staticmethod
+    def _snapshot(playlist_id: str, entry: dict) -> str:
+        entry["version"] = entry.get("version", 0) + 1
+        return f"snapshot-{playlist_id}-{entry['version']}"
+
+    def _items_page(self, entry: dict, offset: int, limit: int) -> dict:
+        uris = entry["uris"]
+        return {"items": [{"track": {"uri": uri}} for uri in uris[offset:offset + limit]],
+                "offset": offset, "limit": limit, "total": len(uris)}
+
+    def _get_playlist(self, playlist_id: str) -> None:
+        with self.server.lock:
+            entry = self.server.playlists.get(playlist_id)
+            if entry is None:
+                return self._error(404, "Invalid playlist Id")
+            payload = dict(entry["playlist"], snapshot_id=f"snapshot-{playlist_id}-{entry.get('version', 0)}",
+                           tracks=self._items_page(entry, 0, MAX_TRACKS_PER_REQUEST))
+        self._send_json(200, payload)
+
+    def _get_items(self, playlist_id: str, params: dict) -> None:
+        limit = int(params.get("limit", 100))
+        if limit > MAX_TRACKS_PER_REQUEST:
+            return self._error(400, f"Invalid limit (max {MAX_TRACKS_PER_REQUEST})")
+        with self.server.lock:
+            entry = self.server.playlists.get(playlist_id)
+            if entry is None:
+                return self._error(404, "Invalid playlist Id")
+            page = self._items_page(entry, int(params.get("offset", 0)), limit)
+        self._send_json(200, page)
+
+    def _remove_tracks(self, playlist_id: str, body: dict) -> None:
+        removed = {track.get("uri") for track in body.get("tracks") or []}
+        if len(removed) > MAX_TRACKS_PER_REQUEST:
+            return self._error(400, f"Too many tracks requested (max {MAX_TRACKS_PER_REQUEST})")
+        with self.server.lock:
+            entry = self.server.playlists.get(playlist_id)
+            if entry is None:
+                return self._error(404, "Invalid playlist Id")
+            entry["uris"] = [uri for uri in entry["uris"] if uri not in removed]
+            snapshot = self._snapshot(playlist_id, entry)
+        self._send_json(200, {"snapshot_id": snapshot})
+
+    def _update_tracks(self, playlist_id: str, body: dict) -> None:
+        """Replace all items (`uris`) or move `range_length` items to before `insert_before`."""
+        with self.server.lock:
+            entry = self.server.playlists.get(playlist_id)
+            if entry is None:
+                return self._error(404, "Invalid playlist Id")
+            uris = entry["uris"]
+            if "uris" in body:
+                if len(body["uris"]) > MAX_TRACKS_PER_REQUEST:
+                    return self._error(400, f"Too many ids requested (max {MAX_TRACKS_PER_REQUEST})")
+                entry["uris"] = list(body["uris"])
+            else:
+                start, before = body.get("range_start", 0), body.get("insert_before", 0)
+                length = body.get("range_length", 1)
+                if not 0 <= start < len(uris) or not 0 <= before <= len(uris):
+                    return self._error(400, "Index out of bounds")
+                moved = uris[start:start + length]
+                rest = uris[:start] + uris[start + length:]
+                at = before - len(moved) if before > start else before
+                entry["uris"] = rest[:at] + moved + rest[at:]
+            snapshot = self._snapshot(playlist_id, entry)
+        self._send_json(200, {"snapshot_id": snapshot})
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+
+def start_mock_server(host: str = "127.0.0.1", port: int = 0,
+                      behavior: Optional[MockBehavior] = None) -> MockSpotifyServer:
+    """Start the mock in a daemon thread (port 0 picks a free port) and return it."""
+    server = MockSpotifyServer((host, port), behavior)
+    threading.Thread(target=server.serve_forever, name="mock-spotify", daemon=True).start()
+    return server
+
+# -----------------------------------------------------------------------------
+# Entry Point
+# -----------------------------------------------------------------------------
+
+def add_behavior_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Added latency per request")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Random +/- jitter on the latency")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--not-found-rate", type=float, default=0.0, help="Fraction of searches with no results")
+    parser.add_argument("--token-ttl", type=float, default=3600.0, help="Lifetime of issued access tokens (s)")
+    parser.add_argument("--country", default="US", help="Country (market) of the mock user")
+    parser.add_argument("--unplayable-rate", type=float, default=0.0,
+                        help="Fraction of tracks unavailable in the searched market (returned relinked)")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for reproducible fault injection")
+
+
+def behavior_from_args(args) -> MockBehavior:
+    return MockBehavior(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, throttle_rate=args.throttle_rate,
+        retry_after=args.retry_after, error_rate=args.error_rate, not_found_rate=args.not_found_rate,
+        token_ttl=args.token_ttl, country=args.country, unplayable_rate=args.unplayable_rate, seed=args.seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local mock of the Spotify Web API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    add_behavior_arguments(parser)
+    args = parser.parse_args()
+
+    server = MockSpotifyServer((args.host, args.port), behavior_from_args(args))
+    print(f"🧪 Mock Spotify API listening on {server.base_url}")
+    print(f"   export SPOTIFY_API_BASE_URL={server.base_url}")
+    print(f"   export SPOTIFY_ACCOUNTS_BASE_URL={server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""
+Fast playlist pipeline: one LLM step for curation, plain Python for everything else
+"""
+
+import os
+import re
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+from spotify_smart_playlist_creator import metrics, progress
+from spotify_smart_playlist_creator.crew_pool import get_crew_pool
+from spotify_smart_playlist_creator.curator_cache import get_curator_cache
+from spotify_smart_playlist_creator.planner import (
+    format_duration,
+    overgenerate_prompt,
+    parse_target_minutes,
+    plan_to_duration,
+    total_duration_ms,
+)
+from spotify_smart_playlist_creator.tools.playlist_sync import sync_playlist
+from spotify_smart_playlist_creator.tools.profile_cache import get_profile, user_market
+from spotify_smart_playlist_creator.tools.results import PlaylistResult, SearchResults
+from spotify_smart_playlist_creator.tools.spotify_api import add_tracks_chunked, create_playlist
+from spotify_smart_playlist_creator.tools.track_resolver import dedupe_matches, parse_song_list, resolve_songs
+
+# -----------------------------------------------------------------------------
+# Configuration & Constants
+# -----------------------------------------------------------------------------
+
+# "crew" runs all three agents; "fast" only uses the LLM for the music curator
+PIPELINE_MODE = os.environ.get("PIPELINE_MODE", "crew")
+USE_CURATOR_CACHE = os.environ.get("CURATOR_CACHE", "1") != "0"
+
+PLAYLIST_NAME_RE = re.compile(r"^\s*\**\s*playlist name\s*\**\s*:\s*\**\s*(?P<name>.+?)\s*\**\s*$", re.IGNORECASE | re.MULTILINE)
+
+# -----------------------------------------------------------------------------
+# Crew Instrumentation
+# -----------------------------------------------------------------------------
+
+def _check_cancelled(job) -> None:
+    if job is not None:
+        job.check_cancelled()
+
+
+def _record_task(crew, task_output) -> None:
+    """Record a finished crew task's duration as a metric and a span."""
+    task = next((task for task in crew.tasks if task.output is task_output), None)
+    if task is None or not task.start_time or not task.end_time:
+        return
+    name = getattr(task_output, 'name', None) or getattr(task, 'name', None) or 'task'
+    agent = getattr(task_output, 'agent', '') or 'agent'
+    metrics.TASK_SECONDS.observe(task.execution_duration, task=name, agent=agent)
+    metrics.record_span(f"task {name}", task.start_time.timestamp(), task.end_time.timestamp(),
+                        **{"task.name": name, "task.agent": agent})
+
+
+def instrument(crew, job=None):
+    """Report each agent step and task as progress, and stop at the next step once `job` is cancelled.
+
+    Finished tasks are also timed for /metrics and the job's trace.
+    """
+    def step_callback(step):
+        _check_cancelled(job)
+        progress.step_callback(step)
+
+    def task_callback(task_output):
+        _record_task(crew, task_output)
+        progress.task_callback(task_output)
+
+    crew.step_callback = step_callback
+    crew.task_callback = task_callback
+    return crew
+
+@contextmanager
+def _stage(timings: Optional[dict], name: str):
+    """Time a pipeline stage as a span and metric, and in `timings` (seconds) if given."""
+    started = time.perf_counter()
+    try:
+        with metrics.span(f"stage {name}", **{"stage.name": name}):
+            yield
+    finally:
+        elapsed = time.perf_counter() - started
+        metrics.STAGE_SECONDS.observe(elapsed, stage=name)
+        if timings is not None:
+            timings[name] = elapsed
+
+# -----------------------------------------------------------------------------
+# Fast Pipeline
+# -----------------------------------------------------------------------------
+
+class FastPlaylistPipeline:
+    """Runs the music curator crew, then searches and builds the playlist without agents.
+
+    `curator(user_prompt, job)` returns the curator's raw answer; it defaults to
+    the music curator crew of a pooled crew and can be swapped for a
+    ScriptedCurator in benchmarks.
+    """
+
+    def __init__(self, crew_pool=None, curator_cache=None, use_curator_cache: bool = USE_CURATOR_CACHE,
+                 curator: Optional[Callable[..., str]] = None):
+        self.crew_pool = crew_pool or get_crew_pool()
+        self.curator = curator or self._crew_curator
+        self.curator_cache = curator_cache or (get_curator_cache() if use_curator_cache else None)
+
+    def _crew_curator(self, user_prompt: str, job=None) -> str:
+        with self.crew_pool.checkout() as creator:
+            result = instrument(creator.curator_crew(), job).kickoff(inputs={'user_prompt': user_prompt})
+        return getattr(result, 'raw', str(result))
+
+    def curate(self, user_prompt: str, job=None, target_minutes: Optional[float] = None):
+        """Return (playlist name, songs) from the curator cache or the music curator crew.
+
+        With `target_minutes` the curator is asked for extra songs, which the
+        planner trims once their durations are known.
+        """
+        cached = self.curator_cache.get(user_prompt) if self.curator_cache else None
+        if cached:
+            progress.report("⚡ Reusing a cached song list for this prompt")
+            return cached
+
+        progress.report("🤖 Music curator is choosing songs...")
+        curator_prompt = overgenerate_prompt(user_prompt, target_minutes) if target_minutes else user_prompt
+        curated = self.curator(curator_prompt, job)
+        songs = parse_song_list(curated)
+        if not songs:
+            raise ValueError(f"Music curator returned no parseable songs: {curated[:200]}")
+        match = PLAYLIST_NAME_RE.search(curated)
+        name = match.group('name').strip('"') if match else user_prompt[:100]
+        if self.curator_cache:
+            self.curator_cache.put(user_prompt, name, songs)
+        return name, songs
+
+    def kickoff(self, inputs: dict, job=None, timings: Optional[dict] = None) -> PlaylistResult:
+        """Build the playlist and return it as a PlaylistResult, like the full crew.
+
+        Pass a dict as `timings` to get the seconds spent in each stage
+        (curate, profile, search, plan, create, add). `plan` only runs when the
+        prompt (or `inputs['target_minutes']`) asks for a total duration.
+        With `inputs['playlist_id']` that playlist is updated in place (one
+        `update` stage) instead of a new one being created.
+        """
+        token = inputs['token']
+        user_prompt = inputs['user_prompt']
+        target_minutes = inputs.get('target_minutes') or parse_target_minutes(user_prompt)
+
+        with _stage(timings, 'curate'):
+            name, songs = self.curate(user_prompt, job, target_minutes)
+        _check_cancelled(job)
+
+        # The profile gives both the playlist owner and the market to search in
+        with _stage(timings, 'profile'):
+            user = get_profile(token)
+        market = inputs.get('market') or user_market(user)
+
+        progress.report(f"🔎 Searching Spotify for {len(songs)} songs (market {market})...")
+        with _stage(timings, 'search'):
+            matches = resolve_songs(token, songs, market)
+        results = SearchResults(matches=dedupe_matches(matches))
+        uris = results.uris
+        progress.report(f"🎧 Found {len(uris)}/{len(songs)} songs on Spotify")
+        if len(results.matches) < len(matches):
+            progress.report(f"🧹 Skipped {len(matches) - len(results.matches)} duplicate versions")
+        if not uris:
+            raise ValueError("None of the curated songs were found on Spotify")
+        _check_cancelled(job)
+
+        planned = [match for match in results.matches if match.found]
+        if target_minutes:
+            # Trim the over-generated list to the requested length using the real durations
+            with _stage(timings, 'plan'):
+                planned = plan_to_duration(results.matches, target_minutes)
+            uris = [match.uri for match in planned]
+            progress.report(f"⏱️ Picked {len(planned)}/{len(results.uris)} songs lasting "
+                            f"{format_duration(total_duration_ms(planned))} for a {target_minutes:g}-minute target")
+
+        if inputs.get('playlist_id'):
+            return self._update(token, inputs['playlist_id'], uris, len(songs), planned, timings)
+
+        with _stage(timings, 'create'):
+            playlist = create_playlist(token, user['id'], name, user_prompt[:300])
+        progress.report(f"🎵 Playlist \"{name}\" created")
+        with _stage(timings, 'add'):
+            report = add_tracks_chunked(token, playlist['id'], uris)
+        progress.report(f"🎵 Added {report['added']}/{len(uris)} tracks to the playlist")
+        return PlaylistResult(
+            playlist_url=playlist.get('external_urls', {}).get('spotify'),
+            name=playlist.get('name', name),
+            playlist_id=playlist['id'],
+            added=report['added'],
+            requested=len(songs),
+            duration_ms=total_duration_ms(planned),
+        )
+
+    def _update(self, token: str, playlist_id: str, uris, requested: int, planned,
+                timings: Optional[dict]) -> PlaylistResult:
+        """Bring an existing playlist to `uris` with a minimal diff instead of creating a new one."""
+        progress.report("🔁 Updating the existing playlist...")
+        with _stage(timings, 'update'):
+            report = sync_playlist(token, playlist_id, uris)
+        progress.report(f"🎵 Playlist \"{report['name']}\" updated: +{report['added']} -{report['removed']} "
+                        f"~{report['moved']} in {report['requests']} requests")
+        return PlaylistResult(
+            playlist_url=report['url'],
+            name=report['name'],
+            playlist_id=playlist_id,
+            added=report['added'],
+            removed=report['removed'],
+            moved=report['moved'],
+            requested=requested,
+            duration_ms=total_duration_ms(planned),
+        )
+
+# -----------------------------------------------------------------------------
+# Entry Point
+# -----------------------------------------------------------------------------
+
+def kickoff(inputs: dict, mode: str = PIPELINE_MODE, job=None) -> PlaylistResult:
+    """Run the playlist build in the configured mode and return the playlist it made.
+
+    `job` is the scheduler Job running this build, if any; it is checked
+    between stages and agent steps so cancellation and deadlines take effect.
+    Updating an existing playlist (`inputs['playlist_id']`) always runs the
+    fast pipeline.
+    """
+    if mode == "fast" or inputs.get('playlist_id'):
+        # Updates are a diff computed in Python; the playlist agent has no part in them
+        return FastPlaylistPipeline().kickoff(inputs, job)
+    # The playlist agent gets the user ID as an input instead of spending a tool call and a turn on /me
+    with _stage(None, 'profile'):
+        inputs = dict(inputs, user_id=get_profile(inputs['token'])['id'])
+    with _stage(None, 'crew'), get_crew_pool().checkout() as creator:
+        output = instrument(creator.crew(), job).kickoff(inputs=inputs)
+    return PlaylistResult.from_crew_output(output)
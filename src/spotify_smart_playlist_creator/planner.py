@@ -0,0 +1,127 @@
+"""
+Duration-targeted playlist planning over resolved tracks (no extra LLM calls)
+
+The curator over-generates when the prompt asks for a total length; once the
+songs are resolved, their real `duration_ms` is known and this module picks
+the subset whose total lands closest to the target.
+"""
+
+import os
+import re
+from typing import List, Optional, Sequence
+
+from spotify_smart_playlist_creator.tools.results import TrackMatch
+
+# -----------------------------------------------------------------------------
+# Configuration & Constants
+# -----------------------------------------------------------------------------
+
+PLAN_TOLERANCE_SECONDS = int(os.environ.get("PLAN_TOLERANCE_SECONDS", "90"))  # allowed overshoot
+# Extra songs the curator is asked for when a duration is requested (trimmed by the planner)
+PLAN_OVERGENERATE = float(os.environ.get("PLAN_OVERGENERATE", "0.3"))
+
+# "45 minutes", "1 hour", "2 hrs", "90 min", "1,5 horas", "30 minutos"
+DURATION_RE = re.compile(
+    r"(?P<value>\d+(?:[.,]\d+)?)\s*(?P<unit>hours?|hrs?|horas?|h|minutes?|minutos?|mins?)\b",
+    re.IGNORECASE,
+)
+# "1h30", "2h15m"
+HOURS_MINUTES_RE = re.compile(r"\b(?P<hours>\d+)\s*h\s*(?P<minutes>\d{1,2})\s*(?:m|min)?\b", re.IGNORECASE)
+# A length that applies to every song, not the playlist: "under 4 minutes each", "3 min per song", "4 minutos cada"
+PER_SONG_AFTER_RE = re.compile(
+    r"\s*(?:long\s+)?(?:each|apiece|per\s+(?:song|track)|a\s+(?:song|track)|cada|por\s+m[uú]sica)\b",
+    re.IGNORECASE,
+)
+# ... or before it: "each song under 5 minutes", "each under 4 min"
+PER_SONG_BEFORE_RE = re.compile(
+    r"\b(?:(?:each|every)\s+(?:song|track)\s+(?:\w+\s+){0,2}|each\s+(?:\w+\s+)?)$", re.IGNORECASE
+)
+
+# -----------------------------------------------------------------------------
+# Target Parsing
+# -----------------------------------------------------------------------------
+
+def parse_target_minutes(prompt: str) -> Optional[float]:
+    """Total playlist length asked for in the prompt, in minutes (None if it asks for none).
+
+    Lengths qualified as per song ("20 songs under 4 minutes each") are ignored.
+    """
+    for match in HOURS_MINUTES_RE.finditer(prompt):
+        if not _per_song(prompt, match):
+            return int(match.group("hours")) * 60 + int(match.group("minutes"))
+    minutes = 0.0
+    for match in DURATION_RE.finditer(prompt):
+        if _per_song(prompt, match):
+            continue
+        value = float(match.group("value").replace(",", "."))
+        minutes += value * 60 if match.group("unit").lower().startswith("h") else value
+    return minutes or None
+
+
+def _per_song(prompt: str, match: re.Match) -> bool:
+    return bool(PER_SONG_AFTER_RE.match(prompt, match.end())
+                or PER_SONG_BEFORE_RE.search(prompt[:match.start()]))
+
+
+def overgenerate_prompt(user_prompt: str, target_minutes: float) -> str:
+    """The prompt sent to the curator: asks for extra songs so the planner has room to trim."""
+    extra = round(PLAN_OVERGENERATE * 100)
+    if extra <= 0:
+        return user_prompt
+    return (f"{user_prompt}\n(Suggest about {extra}% more songs than {target_minutes:g} minutes would need; "
+            f"the list is trimmed to the exact length afterwards.)")
+
+# -----------------------------------------------------------------------------
+# Planner
+# -----------------------------------------------------------------------------
+
+def _seconds(match: TrackMatch) -> int:
+    return max(1, round(match.duration_ms / 1000))
+
+
+def plan_to_duration(matches: Sequence[TrackMatch], target_minutes: float,
+                     tolerance_seconds: int = PLAN_TOLERANCE_SECONDS) -> List[TrackMatch]:
+    """Pick the found tracks whose total duration is closest to `target_minutes`.
+
+    Exact subset-sum over whole seconds: a bitset of reachable totals is kept
+    per prefix of the list, so the choice is optimal and costs
+    O(tracks x target) bit operations. Totals may overshoot by at most
+    `tolerance_seconds`. Among equally good totals, songs later in the
+    curator's list are dropped first. The curator's order is preserved, and
+    tracks with an unknown duration are left out.
+    """
+    candidates = [match for match in matches if match.found and match.duration_ms]
+    target = round(target_minutes * 60)
+    if sum(_seconds(match) for match in candidates) <= target + tolerance_seconds:
+        return candidates  # everything fits; nothing to trim
+
+    limit = target + tolerance_seconds
+    mask = (1 << (limit + 1)) - 1
+    prefixes = [1]  # prefixes[i]: bit s set if some subset of candidates[:i] lasts s seconds
+    for match in candidates:
+        reachable = prefixes[-1]
+        prefixes.append((reachable | (reachable << _seconds(match))) & mask)
+
+    reachable = prefixes[-1]
+    best = min((total for total in range(limit + 1) if reachable >> total & 1),
+               key=lambda total: (abs(total - target), -total))
+
+    chosen, remaining = [], best
+    for index in range(len(candidates) - 1, -1, -1):
+        if prefixes[index] >> remaining & 1:
+            continue  # reachable without this (later) song: drop it
+        chosen.append(candidates[index])
+        remaining -= _seconds(candidates[index])
+    return chosen[::-1]
+
+
+def total_duration_ms(matches: Sequence[TrackMatch]) -> int:
+    return sum(match.duration_ms or 0 for match in matches)
+
+
+def format_duration(duration_ms: int) -> str:
+    """m:ss, or h:mm:ss for an hour or more."""
+    seconds = round(duration_ms / 1000)
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
@@ -0,0 +1,58 @@
+"""
+Live progress reporting from crew callbacks and tools to the current job's log
+"""
+
+import contextvars
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+# -----------------------------------------------------------------------------
+# Reporter Context
+# -----------------------------------------------------------------------------
+
+# Set per job by the code that runs it; tools and callbacks report to it
+_reporter: contextvars.ContextVar[Optional[Callable[[str], None]]] = contextvars.ContextVar(
+    "progress_reporter", default=None
+)
+
+
+@contextmanager
+def reporting_to(reporter: Callable[[str], None]):
+    """Send every progress message produced inside the block to `reporter`."""
+    token = _reporter.set(reporter)
+    try:
+        yield
+    finally:
+        _reporter.reset(token)
+
+
+def report(message: str) -> None:
+    """Publish a progress message for the current job (no-op outside a job)."""
+    reporter = _reporter.get()
+    if reporter is not None:
+        reporter(message)
+
+# -----------------------------------------------------------------------------
+# Crew Callbacks
+# -----------------------------------------------------------------------------
+
+def step_callback(step) -> None:
+    """Report an agent step (AgentAction or AgentFinish) as it happens."""
+    tool = getattr(step, 'tool', None)
+    if tool:
+        report(f"🔧 Using {tool}")
+    elif hasattr(step, 'output'):
+        report("🎯 Agent reached a final answer")
+
+
+def task_callback(task_output) -> None:
+    """Report a finished task, listing the songs when it is the curator's list."""
+    from spotify_smart_playlist_creator.tools.track_resolver import parse_song_list  # avoids an import cycle
+
+    agent = getattr(task_output, 'agent', '') or 'Agent'
+    report(f"✅ Task completed by {agent}")
+    songs = parse_song_list(getattr(task_output, 'raw', '') or '')
+    if songs:
+        report(f"🎶 Selected {len(songs)} songs:")
+        for song in songs:
+            report(f"   • {song}")
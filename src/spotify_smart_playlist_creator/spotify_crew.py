@@ -2,20 +2,74 @@
 Spotify Smart Playlist Creator Crew
 """
 
+import threading
+
 from crewai import Crew, Agent, Task
+from crewai.utilities.llm_utils import create_llm
 from spotify_smart_playlist_creator.tools.custom_tool import (
     SpotifyCreatePlaylistTool,
     SpotifySearchTool,
-    SpotifyAddTracksToPlaylistTool,
-    SpotifyGetCurrentUserTool
+    SpotifyBatchSearchTool,
+    SpotifyAddTracksToPlaylistTool
 )
+from spotify_smart_playlist_creator.tools.results import PlaylistResult
+
+# -----------------------------------------------------------------------------
+# Shared LLM & Per-Crew Tools
+# -----------------------------------------------------------------------------
+
+_shared_resources = None
+_shared_resources_lock = threading.Lock()
+
+
+def build_resources() -> dict:
+    """Build the LLM client the agents use."""
+    return {
+        'llm': create_llm(None),  # model from MODEL / OPENAI_MODEL_NAME
+    }
+
+
+def get_shared_resources() -> dict:
+    """LLM client built once and shared by every crew in the process.
+
+    The LLM only holds the model configuration, so concurrent crews can share
+    it. Tools count their uses, so each crew gets its own (see build_tools()).
+    """
+    global _shared_resources
+    with _shared_resources_lock:
+        if _shared_resources is None:
+            _shared_resources = build_resources()
+        return _shared_resources
+
+
+def build_tools() -> dict:
+    """Build the tool instances of one crew (the HTTP client and caches behind them are process-wide)."""
+    return {
+        'search_tools': [SpotifyBatchSearchTool(), SpotifySearchTool()],
+        # No /me tool: the user ID comes in as the `user_id` task input
+        'playlist_tools': [SpotifyCreatePlaylistTool(), SpotifyAddTracksToPlaylistTool()],
+    }
+
+# -----------------------------------------------------------------------------
+# Crew
+# -----------------------------------------------------------------------------
 
 class SpotifySmartPlaylistCreator:
-    """Crew for creating Spotify playlists based on user prompts."""
-    
-    def __init__(self):
+    """Crew for creating Spotify playlists based on user prompts.
+
+    Each instance has its own tools, agents and tasks and runs one job at a
+    time; call reset() before reusing it for another job (CrewPool does this).
+    """
+
+    def __init__(self, resources=None):
+        self.resources = resources or get_shared_resources()
+        self.tools = build_tools()
+        self._build()
+
+    def _build(self):
         self.agents = self._create_agents()
         self.tasks = self._create_tasks()
+        self.curator_task = self._create_curator_task()
     
     def _create_agents(self):
         """Create the agents for the crew."""
@@ -28,6 +82,7 @@ class SpotifySmartPlaylistCreator:
             You understand natural language prompts and can translate them into well-balanced playlists that capture the user's intent,
             whether they ask for a specific vibe, decade, theme, or playlist duration.
             Your suggestions are precise, era-appropriate, and creatively curated to fit the desired context.""",
+            llm=self.resources['llm'],
             verbose=True,
             allow_delegation=False,
             human_input=False
@@ -40,7 +95,8 @@ class SpotifySmartPlaylistCreator:
             backstory="""You are an expert in music metadata lookup and Spotify API integration.
             Your job is to take structured song information—typically a title and artist name—and search Spotify's catalog to retrieve accurate track URIs.
             You are precise, efficient, and reliable, and you handle missing or ambiguous matches gracefully.""",
-            tools=[SpotifySearchTool()],
+            tools=self.tools['search_tools'],
+            llm=self.resources['llm'],
             verbose=True,
             allow_delegation=False,
             human_input=False
@@ -53,7 +109,8 @@ class SpotifySmartPlaylistCreator:
             backstory="""You are an expert in automating playlist creation on Spotify using their public API.
             You understand how to create playlists with user-defined names and descriptions, and how to add specific tracks to them based on their URIs.
             You ensure the playlist is successfully created and populated with the requested songs, and return a sharable playlist link.""",
-            tools=[SpotifyGetCurrentUserTool(), SpotifyCreatePlaylistTool(), SpotifyAddTracksToPlaylistTool()],
+            tools=self.tools['playlist_tools'],
+            llm=self.resources['llm'],
             verbose=True,
             allow_delegation=False,
             human_input=False
@@ -87,6 +144,7 @@ class SpotifySmartPlaylistCreator:
             description="""Receive a list of songs with their respective artist names and use the Spotify Web API to search for each one.
             Retrieve the Spotify URL for each track, ensuring the match is as accurate as possible based on title and artist.
             This task relies on an external Tool that queries the Spotify API directly.
+            Call the Spotify Batch Search Tool once with the complete song list; only fall back to the single Spotify Search Tool for songs it could not find.
             Handle edge cases where a song may not be found by skipping or logging it for review.
             Use the Spotify Web API to search for tracks. The token is already available as the `token` input. Do not generate or hardcode it.""",
             expected_output="""Use the Spotify Web API to search for tracks. The token is already available as the `token` input {token}. Do not generate or hardcode it.
@@ -99,6 +157,7 @@ class SpotifySmartPlaylistCreator:
         create_playlist = Task(
             description="""Using the provided Spotify access token, user ID, list of track URIs, playlist name and description,
             create a new playlist in the user's Spotify account and add the songs to it.
+            The user's Spotify ID is {user_id}; pass it as `user_id` to the Spotify Create Playlist Tool, there is no need to look it up.
             This task uses the Spotify Web API and assumes valid authentication via OAuth.
             Do not attempt to generate or refresh the token manually.
             Use the Spotify Web API to search for tracks. The token is already available as the `token` input {token}. Do not generate or hardcode it.""",
@@ -107,7 +166,8 @@ class SpotifySmartPlaylistCreator:
               "playlist_url": "https://open.spotify.com/playlist/7wDH1tHMWUcdq5yMb5vVeK",
               "name": "My Playlist from Crew"
             }""",
-            agent=self.agents['playlist_creator']
+            agent=self.agents['playlist_creator'],
+            output_pydantic=PlaylistResult
         )
         
         return {
@@ -116,6 +176,41 @@ class SpotifySmartPlaylistCreator:
             'create_playlist': create_playlist
         }
     
+    def _create_curator_task(self):
+        """Create the curator-only task the fast pipeline runs (it also names the playlist)."""
+        return Task(
+            description=self.tasks['generate_music_list'].description,
+            expected_output="""The first line must be a short, catchy playlist name formatted as:
+            Playlist Name: <name>
+
+            Followed by a list of songs formatted as:
+            - "Song Title" by Artist Name
+
+            The list should include approximately the number of songs or total duration specified by the user.
+            If the user does not specify either, generate a default playlist of 10 songs.""",
+            agent=self.agents['music_curator']
+        )
+
+    def reset(self):
+        """Get ready for another job: fresh agents and tasks, tool usage counts back to zero.
+
+        A kickoff leaves callbacks, executors, retry counts and outputs on the
+        agents and tasks, so they are rebuilt rather than cleared field by field.
+        The tools and the LLM client are kept.
+        """
+        for tool in [*self.tools['search_tools'], *self.tools['playlist_tools']]:
+            if hasattr(tool, 'reset_usage_count'):  # crewai releases before usage limits have no counter
+                tool.reset_usage_count()
+        self._build()
+
+    def curator_crew(self):
+        """Create a crew that only runs the music curator (used by the fast pipeline)."""
+        return Crew(
+            agents=[self.agents['music_curator']],
+            tasks=[self.curator_task],
+            verbose=True
+        )
+
     def crew(self):
         """Create and return the crew."""
         return Crew(
@@ -0,0 +1,308 @@
+"""
+Encrypted Spotify OAuth token store with proactive refresh, keyed by Spotify user ID
+"""
+
+import os
+import time
+import base64
+import hashlib
+import threading
+import urllib.parse
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from cryptography.fernet import Fernet, InvalidToken
+from pydantic import BaseModel
+
+from spotify_smart_playlist_creator.tools.profile_cache import get_profile
+from spotify_smart_playlist_creator.tools.spotify_api import SpotifyAPIError
+from spotify_smart_playlist_creator.tools.spotify_client import get_client
+
+# -----------------------------------------------------------------------------
+# Configuration & Constants
+# -----------------------------------------------------------------------------
+
+CLIENT_ID = os.environ.get("CLIENT_ID")
+CLIENT_SECRET = os.environ.get("CLIENT_SECRET")
+SPOTIFY_ACCOUNTS_BASE_URL = os.environ.get("SPOTIFY_ACCOUNTS_BASE_URL", "https://accounts.spotify.com").rstrip("/")
+
+# Fernet key (Fernet.generate_key()); without one, a per-process key is used and tokens die with the process
+TOKEN_STORE_KEY = os.environ.get("TOKEN_STORE_KEY", "")
+# e.g. redis://localhost:6379/1 so every web worker sees the same tokens; empty = in-memory
+TOKEN_STORE_URL = os.environ.get("TOKEN_STORE_URL", os.environ.get("JOB_STORE_URL", ""))
+TOKEN_STORE_TTL = float(os.environ.get("TOKEN_STORE_TTL", str(30 * 24 * 3600)))  # forget users idle this long
+TOKEN_REFRESH_MARGIN = float(os.environ.get("TOKEN_REFRESH_MARGIN", "120"))  # refresh this long before expiry
+
+# -----------------------------------------------------------------------------
+# Tokens & OAuth
+# -----------------------------------------------------------------------------
+
+class TokenSet(BaseModel):
+    """One user's Spotify access and refresh tokens."""
+    access_token: str
+    refresh_token: Optional[str] = None
+    expires_at: float = 0.0
+    scope: str = ""
+    user_id: Optional[str] = None
+
+    @classmethod
+    def from_response(cls, data: dict, previous: Optional["TokenSet"] = None) -> "TokenSet":
+        """Build from a /api/token answer; refreshes may omit the refresh token and scope."""
+        return cls(
+            access_token=data["access_token"],
+            refresh_token=data.get("refresh_token") or (previous.refresh_token if previous else None),
+            expires_at=time.time() + float(data.get("expires_in", 3600)),
+            scope=data.get("scope") or (previous.scope if previous else ""),
+            user_id=previous.user_id if previous else None,
+        )
+
+    def expires_within(self, seconds: float) -> bool:
+        return self.expires_at - time.time() < seconds
+
+
+def request_token(form: Dict[str, str], client_id: Optional[str] = None,
+                  client_secret: Optional[str] = None) -> dict:
+    """POST /api/token on the accounts service with the app's client credentials."""
+    credentials = f"{client_id or CLIENT_ID}:{client_secret or CLIENT_SECRET}".encode()
+    headers = {
+        "Authorization": f"Basic {base64.b64encode(credentials).decode()}",
+        "Content-Type": "application/x-www-form-urlencoded",
+    }
+    res = get_client().request("POST", "/api/token", body=urllib.parse.urlencode(form), headers=headers,
+                               base_url=SPOTIFY_ACCOUNTS_BASE_URL)
+    if res.status != 200:
+        raise SpotifyAPIError(res.status, res.text)
+    return res.json()
+
+
+def exchange_code(code: str, redirect_uri: str) -> TokenSet:
+    """Trade an authorization code for tokens and tag them with the user's Spotify ID.
+
+    The profile fetched for that is cached, so the user's first job does not fetch it again.
+    """
+    tokens = TokenSet.from_response(request_token({
+        "grant_type": "authorization_code",
+        "code": code,
+        "redirect_uri": redirect_uri,
+    }))
+    tokens.user_id = get_profile(tokens.access_token)["id"]
+    return tokens
+
+
+def refresh_tokens(tokens: TokenSet) -> TokenSet:
+    """Get a new access token with the refresh token."""
+    if not tokens.refresh_token:
+        raise SpotifyAPIError(400, "no refresh token stored")
+    return TokenSet.from_response(request_token({
+        "grant_type": "refresh_token",
+        "refresh_token": tokens.refresh_token,
+    }), previous=tokens)
+
+# -----------------------------------------------------------------------------
+# Storage Backends
+# -----------------------------------------------------------------------------
+
+class MemoryBackend:
+    """Process-local key/value store with per-key expiry."""
+
+    def __init__(self):
+        self._data: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry[1] < time.time():
+                del self._data[key]
+                return None
+            return entry[0]
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        with self._lock:
+            self._data[key] = (value, time.time() + ttl)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class RedisBackend:
+    """Redis key/value store, so tokens survive restarts and are shared by all workers."""
+
+    prefix = "spotify:tokens:"
+
+    def __init__(self, client):
+        self.client = client
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisBackend":
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("RedisBackend requires the 'redis' package (pip install redis)") from e
+        return cls(redis.Redis.from_url(url))
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        self.client.set(self.prefix + key, value, ex=max(1, int(ttl)))
+
+    def delete(self, key: str) -> None:
+        self.client.delete(self.prefix + key)
+
+# -----------------------------------------------------------------------------
+# Token Store
+# -----------------------------------------------------------------------------
+
+class TokenStore:
+    """Keeps every user's tokens encrypted at rest and hands out valid access tokens.
+
+    Records are keyed by Spotify user ID. Each access token issued for a user
+    also gets an alias entry pointing back to the user, so a job that started
+    with an older token is transparently switched to the current one. This
+    makes the store usable as the Spotify clients' token provider (see
+    spotify_client.set_token_provider).
+    """
+
+    def __init__(self, backend=None, key: str = TOKEN_STORE_KEY, ttl: float = TOKEN_STORE_TTL,
+                 refresh_margin: float = TOKEN_REFRESH_MARGIN):
+        self.backend = backend or MemoryBackend()
+        if not key:
+            print("⚠️ TOKEN_STORE_KEY is not set; stored tokens will not survive a restart")
+            key = Fernet.generate_key()
+        self._fernet = Fernet(key)
+        self.ttl = ttl
+        self.refresh_margin = refresh_margin
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self._locks: Dict[str, List] = {}  # user ID -> [lock, threads holding or waiting for it]
+        self._locks_lock = threading.Lock()
+
+    # -- records ---------------------------------------------------------------
+
+    @staticmethod
+    def _alias_key(access_token: str) -> str:
+        return "alias:" + hashlib.sha256(access_token.encode()).hexdigest()
+
+    def _read(self, key: str) -> Optional[str]:
+        blob = self.backend.get(key)
+        if blob is None:
+            return None
+        try:
+            return self._fernet.decrypt(blob).decode()
+        except InvalidToken:
+            return None  # written with another key
+
+    def _write(self, key: str, value: str) -> None:
+        self.backend.set(key, self._fernet.encrypt(value.encode()), self.ttl)
+
+    @contextmanager
+    def _user_lock(self, user_id: str):
+        """Hold the user's refresh lock; it is dropped once no thread holds or waits for it."""
+        with self._locks_lock:
+            entry = self._locks.setdefault(user_id, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._locks_lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._locks[user_id]
+
+    def save(self, tokens: TokenSet) -> None:
+        """Store a user's tokens (tokens.user_id is required)."""
+        if not tokens.user_id:
+            raise ValueError("TokenSet.user_id is required to store tokens")
+        self._write("user:" + tokens.user_id, tokens.model_dump_json())
+        self._write(self._alias_key(tokens.access_token), tokens.user_id)
+
+    def get(self, user_id: str) -> Optional[TokenSet]:
+        data = self._read("user:" + user_id)
+        return TokenSet.model_validate_json(data) if data else None
+
+    def delete(self, user_id: str) -> None:
+        tokens = self.get(user_id)
+        if tokens:
+            self.backend.delete(self._alias_key(tokens.access_token))
+        self.backend.delete("user:" + user_id)
+
+    def user_for(self, access_token: str) -> Optional[str]:
+        """Spotify user ID an access token (current or superseded) was issued to."""
+        return self._read(self._alias_key(access_token))
+
+    # -- refresh ---------------------------------------------------------------
+
+    def _refresh(self, tokens: TokenSet) -> Optional[TokenSet]:
+        try:
+            fresh = refresh_tokens(tokens)
+        except (SpotifyAPIError, OSError, ValueError) as e:
+            self.refresh_failures += 1
+            print(f"⚠️ Token refresh failed for {tokens.user_id}: {e}")
+            if isinstance(e, SpotifyAPIError) and e.status in (400, 401):
+                self.delete(tokens.user_id)  # refresh token revoked: the user has to log in again
+            return None
+        self.refreshes += 1
+        self.save(fresh)
+        return fresh
+
+    def valid_tokens(self, user_id: str) -> Optional[TokenSet]:
+        """The user's tokens, refreshed first if they expire within the refresh margin."""
+        tokens = self.get(user_id)
+        if tokens is None or not tokens.expires_within(self.refresh_margin):
+            return tokens
+        with self._user_lock(user_id):
+            tokens = self.get(user_id)  # another thread may have refreshed meanwhile
+            if tokens is None or not tokens.expires_within(self.refresh_margin):
+                return tokens
+            return self._refresh(tokens)
+
+    # -- token provider ----------------------------------------------------------
+
+    def current(self, access_token: str) -> str:
+        """The freshest access token for whoever `access_token` belongs to (unknown tokens pass through)."""
+        user_id = self.user_for(access_token)
+        if user_id is None:
+            return access_token
+        tokens = self.valid_tokens(user_id)
+        return tokens.access_token if tokens else access_token
+
+    def refresh(self, access_token: str) -> Optional[str]:
+        """Called after Spotify rejected `access_token` with a 401; returns a replacement or None."""
+        user_id = self.user_for(access_token)
+        if user_id is None:
+            return None
+        with self._user_lock(user_id):
+            tokens = self.get(user_id)
+            if tokens is None:
+                return None
+            if tokens.access_token != access_token and not tokens.expires_within(self.refresh_margin):
+                return tokens.access_token  # already replaced by a concurrent refresh
+            fresh = self._refresh(tokens)
+        return fresh.access_token if fresh else None
+
+    def metric_samples(self):
+        """Refresh counters as metric families for /metrics."""
+        return [
+            ("spotify_token_refreshes_total", "counter", "Access tokens refreshed", [({}, self.refreshes)]),
+            ("spotify_token_refresh_failures_total", "counter", "Failed token refreshes",
+             [({}, self.refresh_failures)]),
+        ]
+
+
+_store: Optional[TokenStore] = None
+_store_lock = threading.Lock()
+
+def get_token_store() -> TokenStore:
+    """Return the process-wide TokenStore configured from the environment."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            backend = RedisBackend.from_url(TOKEN_STORE_URL) if TOKEN_STORE_URL.startswith(
+                ("redis://", "rediss://", "unix://")) else None
+            _store = TokenStore(backend)
+        return _store
@@ -0,0 +1,101 @@
+"""
+Non-blocking Spotify Web API client (httpx) sharing the rate-limit scheduler
+"""
+
+import asyncio
+import weakref
+from typing import Dict, Optional
+
+from spotify_smart_playlist_creator import metrics
+from spotify_smart_playlist_creator.tools.spotify_client import (
+    IDEMPOTENT_METHODS,
+    POOL_MAX_PER_HOST,
+    REQUEST_TIMEOUT,
+    SpotifyResponse,
+    endpoint_template,
+    get_client,
+    get_token_provider,
+)
+
+ASYNC_POOL_MAX_CONNECTIONS = POOL_MAX_PER_HOST * 4
+
+# -----------------------------------------------------------------------------
+# Async Spotify Client
+# -----------------------------------------------------------------------------
+
+class AsyncSpotifyClient:
+    """Sends requests on a pooled httpx.AsyncClient bound to one event loop.
+
+    Throttling goes through the same RequestScheduler as the blocking client,
+    so sync and async callers share one set of rate limits.
+    """
+
+    def __init__(self, max_connections: int = ASYNC_POOL_MAX_CONNECTIONS, timeout: float = REQUEST_TIMEOUT,
+                 transport=None):
+        try:
+            import httpx
+        except ImportError as e:
+            raise ImportError("AsyncSpotifyClient requires the 'httpx' package (pip install httpx)") from e
+        self._httpx = httpx
+        self.scheduler = get_client().scheduler
+        self.base_url = get_client().base_url
+        self._client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            transport=transport,  # e.g. httpx.MockTransport in tests
+        )
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        token: Optional[str] = None,
+        body: Optional[str] = None,
+        headers: Optional[Dict[str, str]] = None,
+        base_url: Optional[str] = None,
+    ) -> SpotifyResponse:
+        """Async counterpart of SpotifyClient.request (token lookups and refreshes run in a thread)."""
+        provider = get_token_provider()
+        if token and provider is not None:
+            token = await asyncio.to_thread(provider.current, token)
+        res = await self._request(method, path, token, body, headers, base_url)
+        if res.status == 401 and token and provider is not None:
+            fresh = await asyncio.to_thread(provider.refresh, token)
+            if fresh and fresh != token:
+                res = await self._request(method, path, fresh, body, headers, base_url)
+        return res
+
+    async def _request(self, method: str, path: str, token: Optional[str], body: Optional[str],
+                       headers: Optional[Dict[str, str]], base_url: Optional[str]) -> SpotifyResponse:
+        request_headers = dict(headers or {})
+        if token:
+            request_headers["Authorization"] = f"Bearer {token}"
+        if body is not None:
+            request_headers.setdefault("Content-Type", "application/json")
+        url = f"{base_url or self.base_url}{path}"
+
+        with metrics.http_call(method, endpoint_template(path), len(body or "")) as call:
+            async def send():
+                res = await self._client.request(method, url, content=body, headers=request_headers)
+                return call.record(SpotifyResponse(res.status_code, res.headers, res.content))
+
+            return await self.scheduler.execute_async(
+                token, send,
+                idempotent=method in IDEMPOTENT_METHODS,
+                network_errors=(OSError, self._httpx.TransportError),
+            )
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+# httpx.AsyncClient connections belong to the loop that opened them, so keep one client per loop
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncSpotifyClient]" = weakref.WeakKeyDictionary()
+
+def get_async_client() -> AsyncSpotifyClient:
+    """Return the AsyncSpotifyClient shared by everything running on the current event loop."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        client = _clients[loop] = AsyncSpotifyClient()
+    return client
@@ -1,14 +1,85 @@
 """
 Custom Spotify tools for CrewAI agents
+
+Every tool has a blocking `_run` and an async `_arun` that shares the same
+response formatting; `_arun` uses the pooled httpx client so one event loop
+can drive many concurrent calls.
+Calls are timed per tool (see metrics.py) by the SpotifyTool base class.
+Observations are compact JSON built from the models in results.py; failures
+are {"error": <code>, "message": ...}.
 """
 
-import os
-import json
-import http.client
-from typing import Type, List
+import re
+from typing import List, Optional, Type
 from pydantic import BaseModel, Field
 from crewai.tools import BaseTool
 
+from spotify_smart_playlist_creator import metrics
+from spotify_smart_playlist_creator.progress import report
+from spotify_smart_playlist_creator.tools.profile_cache import aget_profile, amarket_for, get_profile, market_for
+from spotify_smart_playlist_creator.tools.results import (
+    ErrorCode,
+    PlaylistResult,
+    SearchResults,
+    ToolError,
+    TrackMatch,
+    compact_json,
+)
+from spotify_smart_playlist_creator.tools.spotify_api import (
+    SpotifyAPIError,
+    _decode,
+    aadd_tracks_chunked,
+    acreate_playlist,
+    add_tracks_chunked,
+    create_playlist,
+)
+from spotify_smart_playlist_creator.tools.track_cache import get_track_cache, track_key
+from spotify_smart_playlist_creator.tools.track_resolver import (
+    SEARCH_LIMIT,
+    Song,
+    aresolve_songs,
+    asearch_request,
+    best_match,
+    compact_track,
+    dedupe_matches,
+    index_items,
+    is_playable,
+    local_match,
+    parse_song,
+    rank_candidates,
+    resolve_songs,
+    search_path,
+    search_request,
+)
+
+# -----------------------------------------------------------------------------
+# Instrumented Base Tool
+# -----------------------------------------------------------------------------
+
+class SpotifyTool(BaseTool):
+    """Base for the Spotify tools: every call is timed for /metrics and the job's trace."""
+
+    def run(self, *args, **kwargs):
+        with metrics.tool_call(self.name) as call:
+            return call.record(super().run(*args, **kwargs))
+
+    def to_structured_tool(self):
+        # Agents invoke the structured tool's func (our _run) directly, bypassing run()
+        structured = super().to_structured_tool()
+        func = structured.func
+
+        def timed_func(*args, **kwargs):
+            with metrics.tool_call(self.name) as call:
+                return call.record(func(*args, **kwargs))
+
+        structured.func = timed_func
+        return structured
+
+    async def arun(self, *args, **kwargs):
+        """Async counterpart of `run`, awaiting the tool's `_arun`."""
+        with metrics.tool_call(self.name) as call:
+            return call.record(await self._arun(*args, **kwargs))
+
 # -----------------------------------------------------------------------------
 # Spotify Create Playlist Tool
 # -----------------------------------------------------------------------------
@@ -20,7 +91,7 @@ class SpotifyCreatePlaylistInput(BaseModel):
     description: str = Field(..., description="Description of the playlist")
     public: bool = Field(False, description="Whether the playlist should be public")
 
-class SpotifyCreatePlaylistTool(BaseTool):
+class SpotifyCreatePlaylistTool(SpotifyTool):
     """Tool to create a new Spotify playlist for a user."""
     name: str = "Spotify Create Playlist Tool"
     description: str = (
@@ -29,29 +100,26 @@ class SpotifyCreatePlaylistTool(BaseTool):
     args_schema: Type[BaseModel] = SpotifyCreatePlaylistInput
 
     def _run(self, token: str, user_id: str, name: str, description: str, public: bool) -> str:
-        conn = http.client.HTTPSConnection("api.spotify.com")
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json"
-        }
-        body = json.dumps({
-            "name": name,
-            "description": description,
-            "public": public
-        })
-        url = f"/v1/users/{user_id}/playlists"
-        conn.request("POST", url, body, headers)
-        res = conn.getresponse()
-        data = res.read()
-        response = json.loads(data.decode("utf-8"))
-        if res.status != 201:
-            return f"❌ Failed to create playlist: {response}"
-        return json.dumps({
-            "playlist_id": response.get("id"),
-            "playlist_url": response.get("external_urls", {}).get("spotify"),
-            "name": response.get("name"),
-            "description": response.get("description")
-        }, indent=2)
+        try:
+            response = create_playlist(token, user_id, name, description, public)
+        except SpotifyAPIError as e:
+            return ToolError(code=ErrorCode.API_ERROR, message=f"Failed to create playlist: {e}").to_llm()
+        return self._format(response)
+
+    async def _arun(self, token: str, user_id: str, name: str, description: str, public: bool) -> str:
+        try:
+            response = await acreate_playlist(token, user_id, name, description, public)
+        except SpotifyAPIError as e:
+            return ToolError(code=ErrorCode.API_ERROR, message=f"Failed to create playlist: {e}").to_llm()
+        return self._format(response)
+
+    def _format(self, response: dict) -> str:
+        report(f"🎵 Playlist \"{response.get('name')}\" created")
+        return PlaylistResult(
+            playlist_id=response.get("id"),
+            playlist_url=response.get("external_urls", {}).get("spotify"),
+            name=response.get("name"),
+        ).to_llm()
 
 # -----------------------------------------------------------------------------
 # Spotify Search Tool
@@ -59,48 +127,123 @@ class SpotifyCreatePlaylistTool(BaseTool):
 
 class SpotifySearchInput(BaseModel):
     token: str = Field(..., description="OAuth access token passed to the task as the 'token' input. Do NOT generate manually.")
-    query: str = Field(..., description="Search query, e.g. 'artist:Radiohead track:Creep'")
+    query: str = Field(..., description="Search query, e.g. 'track:Creep artist:Radiohead'")
     search_type: str = Field(..., description="Comma-separated list of item types (e.g. 'track,artist')")
-    market: str = Field(default="US", description="Market country code (e.g. 'US')")
-    limit: int = Field(default=5, description="Max number of results (1-50)")
+    market: Optional[str] = Field(default=None, description="Market country code (e.g. 'BR'); leave empty to use the user's country")
+    limit: int = Field(default=SEARCH_LIMIT, description="Number of candidates to fetch and re-rank (1-50)")
     offset: int = Field(default=0, description="Index of the first result")
 
-class SpotifySearchTool(BaseTool):
+def _split_fielded_query(query: str):
+    """Split an 'artist:X track:Y' style query into (title, artist) for cache keys and ranking."""
+    match_track = re.search(r"track:(.+?)(?=\s+\w+:|$)", query)
+    match_artist = re.search(r"artist:(.+?)(?=\s+\w+:|$)", query)
+    if not match_track:
+        return query, ""
+    return match_track.group(1), match_artist.group(1) if match_artist else ""
+
+class SpotifySearchTool(SpotifyTool):
     """Tool to search Spotify's catalog for tracks, artists, albums, etc."""
     name: str = "Spotify Search Tool"
     description: str = (
-        "Searches Spotify's catalog using a query string. You can search across tracks, artists, albums, playlists, etc."
+        "Searches Spotify's catalog using a query string. You can search across tracks, artists, albums, playlists, etc. "
+        "For tracks, use 'track:<title> artist:<artist>'; candidates are re-ranked and the best match's "
+        "track URI is returned with a confidence score, so there is no need to retry a search that returned a match."
     )
     args_schema: Type[BaseModel] = SpotifySearchInput
 
-    def _run(self, token: str, query: str, search_type: str, market: str = "US", limit: int = 5, offset: int = 0) -> str:
-        query_encoded = query.replace(" ", "%20")
-        path = f"/v1/search?q={query_encoded}&type={search_type}&market={market}&limit={limit}&offset={offset}"
-        curl_cmd = (
-            f"curl --request GET \\\n"
-            f"  --url 'https://api.spotify.com{path}' \\\n"
-            f"  --header 'Authorization: Bearer {token}'"
-        )
-        print("\n🐚 cURL request:")
-        print(curl_cmd)
-        print("\n🎧 [SpotifySearchTool] Running with parameters:")
-        print(f"  token: {token}...")  # only the first characters, for security
-        print(f"  query: {query}")
-        print(f"  search_type: {search_type}")
-        print(f"  market: {market}")
-        print(f"  limit: {limit}")
-        print(f"  offset: {offset}")
-        conn = http.client.HTTPSConnection("api.spotify.com")
-        headers = {"Authorization": f"Bearer {token}"}
-        conn.request("GET", path, headers=headers)
-        res = conn.getresponse()
-        data = res.read()
-        response = json.loads(data.decode("utf-8"))
+    def _run(self, token: str, query: str, search_type: str, market: Optional[str] = None, limit: int = SEARCH_LIMIT, offset: int = 0) -> str:
+        market = market or market_for(token)
+        path, song, key, cached = self._prepare(token, query, search_type, market, limit, offset)
+        if cached is not None:
+            return cached
+        return self._handle(search_request(token, path), song, key, market)
+
+    async def _arun(self, token: str, query: str, search_type: str, market: Optional[str] = None, limit: int = SEARCH_LIMIT, offset: int = 0) -> str:
+        market = market or await amarket_for(token)
+        path, song, key, cached = self._prepare(token, query, search_type, market, limit, offset)
+        if cached is not None:
+            return cached
+        return self._handle(await asearch_request(token, path), song, key, market)
+
+    def _prepare(self, token, query, search_type, market, limit, offset):
+        """Build the request path, the song to rank against and its cache key.
+
+        Returns (path, song, key, cached_result_or_None).
+        """
+        title, artist = _split_fielded_query(query)
+        song = Song(title.strip(), artist.strip())
+        path = search_path(query, market, search_type, limit, offset)
+        report(f"🔎 Searching Spotify for {query}")
+        key = None
+        if search_type == "track" and offset == 0:
+            key = track_key(song.title, song.artist, market)
+            found, track = get_track_cache().get(key)
+            if not found:
+                track = local_match(song, market)
+                found = track is not None
+                if found:
+                    get_track_cache().set(key, track)
+            if found:
+                return path, song, key, TrackMatch.from_track(song, track).to_llm()
+        return path, song, key, None
+
+    def _handle(self, res, song, key, market) -> str:
+        if res.status != 200:
+            return ToolError(code=ErrorCode.SEARCH_FAILED, message=f"HTTP {res.status} - {res.text}").to_llm()
+        response = _decode(res)
+        if not isinstance(response, dict):  # a proxy or error page instead of JSON
+            return ToolError(code=ErrorCode.SEARCH_FAILED, message=f"Invalid search response: {res.text[:200]}").to_llm()
         items = response.get("tracks", {}).get("items", [])
-        if not items:
-            return ""
-        # Returns the public Spotify URL (not URI like `spotify:track:id`)
-        return items[0]["external_urls"]["spotify"]
+        if key:
+            index_items(items, market)
+        track = best_match(song, items)
+        if key:
+            get_track_cache().set(key, track)
+        match = TrackMatch.from_track(song, track)
+        playable = [item for item in items if is_playable(item)]
+        if not match.found and playable:
+            confidence, item = rank_candidates(song, playable)[0]
+            candidate = Song(item.get("name", ""), ", ".join(compact_track(item)["artists"]))
+            return compact_json({"song": match.song, "error": match.error,
+                                 "best_candidate": str(candidate), "confidence": confidence})
+        return match.to_llm()
+
+# -----------------------------------------------------------------------------
+# Spotify Batch Search Tool
+# -----------------------------------------------------------------------------
+
+class SpotifyBatchSearchInput(BaseModel):
+    token: str = Field(..., description="OAuth access token passed to the task as the 'token' input. Do NOT generate manually.")
+    songs: List[str] = Field(..., description='The full list of songs, each formatted as \'"Song Title" by Artist\'')
+    market: Optional[str] = Field(default=None, description="Market country code (e.g. 'BR'); leave empty to use the user's country")
+
+class SpotifyBatchSearchTool(SpotifyTool):
+    """Tool to resolve a whole song list to Spotify track URIs in one call."""
+    name: str = "Spotify Batch Search Tool"
+    description: str = (
+        "Searches Spotify for every song in a list concurrently and returns all track URIs at once. "
+        "Pass the complete song list in a single call instead of searching one song at a time."
+    )
+    args_schema: Type[BaseModel] = SpotifyBatchSearchInput
+
+    def _run(self, token: str, songs: List[str], market: Optional[str] = None) -> str:
+        parsed = [(line, parse_song(line)) for line in songs]
+        valid = [song for _, song in parsed if song]
+        return self._format(parsed, resolve_songs(token, valid, market))
+
+    async def _arun(self, token: str, songs: List[str], market: Optional[str] = None) -> str:
+        parsed = [(line, parse_song(line)) for line in songs]
+        valid = [song for _, song in parsed if song]
+        return self._format(parsed, await aresolve_songs(token, valid, market))
+
+    def _format(self, parsed, found: List[TrackMatch]) -> str:
+        resolved = iter(found)
+        results = SearchResults(matches=dedupe_matches([
+            next(resolved) if song else TrackMatch(title=line, artist="", error=ErrorCode.INVALID_INPUT)
+            for line, song in parsed
+        ]))
+        report(f"🎧 Found {len(results.uris)}/{len(parsed)} songs on Spotify")
+        return results.to_llm()
 
 # -----------------------------------------------------------------------------
 # Spotify Add Tracks To Playlist Tool
@@ -112,38 +255,31 @@ class SpotifyAddTracksInput(BaseModel):
     uris: List[str] = Field(..., description="A list of Spotify track URIs to add (e.g. ['spotify:track:123', ...])")
     position: int = Field(default=0, description="Position in the playlist where tracks should be inserted (0 = beginning)")
 
-class SpotifyAddTracksToPlaylistTool(BaseTool):
+class SpotifyAddTracksToPlaylistTool(SpotifyTool):
     """Tool to add tracks to a Spotify playlist."""
     name: str = "Spotify Add Tracks Tool"
     description: str = (
-        "Adds a list of Spotify track URIs to a specific playlist, at the specified position (default is beginning)."
+        "Adds a list of Spotify track URIs to a specific playlist, at the specified position (default is beginning). "
+        "Any number of tracks can be passed in one call; they are sent in batches of 100 automatically."
     )
     args_schema: Type[BaseModel] = SpotifyAddTracksInput
 
     def _run(self, token: str, playlist_id: str, uris: List[str], position: int = 0) -> str:
-        conn = http.client.HTTPSConnection("api.spotify.com")
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json"
-        }
-        payload = json.dumps({
-            "uris": uris,
-            "position": position
+        return self._format(add_tracks_chunked(token, playlist_id, uris, position), uris)
+
+    async def _arun(self, token: str, playlist_id: str, uris: List[str], position: int = 0) -> str:
+        return self._format(await aadd_tracks_chunked(token, playlist_id, uris, position), uris)
+
+    def _format(self, result: dict, uris: List[str]) -> str:
+        if uris and not result["added"]:
+            return ToolError(code=ErrorCode.API_ERROR, message=f"Failed to add tracks: {result['failed_chunks']}").to_llm()
+        report(f"🎵 Added {result['added']}/{len(uris)} tracks to the playlist")
+        return compact_json({
+            "added": result["added"],
+            "requested": len(uris),
+            "snapshot_id": result["snapshot_id"],
+            "failed_chunks": [chunk["start"] for chunk in result["failed_chunks"]],
         })
-        path = f"/v1/playlists/{playlist_id}/tracks"
-        conn.request("POST", path, body=payload, headers=headers)
-        res = conn.getresponse()
-        data = res.read()
-        try:
-            response = json.loads(data.decode("utf-8"))
-        except Exception:
-            return f"❌ Could not parse Spotify response: {data}"
-        if res.status != 201:
-            return f"❌ Failed to add tracks: {response}"
-        return json.dumps({
-            "snapshot_id": response.get("snapshot_id", "unknown"),
-            "status": "Tracks added successfully"
-        }, indent=2)
 
 # -----------------------------------------------------------------------------
 # Spotify Get Current User Tool
@@ -152,27 +288,29 @@ class SpotifyAddTracksToPlaylistTool(BaseTool):
 class SpotifyGetCurrentUserInput(BaseModel):
     token: str = Field(..., description="Spotify OAuth access token with 'user-read-private' scope")
 
-class SpotifyGetCurrentUserTool(BaseTool):
+class SpotifyGetCurrentUserTool(SpotifyTool):
     """Tool to fetch the current authenticated user's Spotify profile."""
     name: str = "Spotify Get Current User Tool"
     description: str = (
-        "Fetches the current authenticated user's Spotify profile using the /me endpoint. "
-        "Returns the user ID, display name, and profile URL."
+        "Fetches the current authenticated user's Spotify profile using the /me endpoint (cached per token). "
+        "Returns the user ID and display name."
     )
     args_schema: Type[BaseModel] = SpotifyGetCurrentUserInput
 
     def _run(self, token: str) -> str:
-        conn = http.client.HTTPSConnection("api.spotify.com")
-        headers = {"Authorization": f"Bearer {token}"}
-        conn.request("GET", "/v1/me", headers=headers)
-        res = conn.getresponse()
-        data = res.read()
-        if res.status != 200:
-            return f"❌ Failed to fetch user profile: HTTP {res.status} - {data.decode('utf-8')}"
-        user_info = json.loads(data.decode("utf-8"))
-        result = {
-            "id": user_info.get("id"),
-            "display_name": user_info.get("display_name"),
-            "profile_url": user_info.get("external_urls", {}).get("spotify")
-        }
-        return json.dumps(result, indent=2)
\ No newline at end of file
+        try:
+            user_info = get_profile(token)
+        except SpotifyAPIError as e:
+            return ToolError(code=ErrorCode.API_ERROR, message=f"Failed to fetch user profile: {e}").to_llm()
+        return self._format(user_info)
+
+    async def _arun(self, token: str) -> str:
+        try:
+            user_info = await aget_profile(token)
+        except SpotifyAPIError as e:
+            return ToolError(code=ErrorCode.API_ERROR, message=f"Failed to fetch user profile: {e}").to_llm()
+        return self._format(user_info)
+
+    def _format(self, user_info: dict) -> str:
+        report("👤 User profile retrieved")
+        return compact_json({"id": user_info.get("id"), "display_name": user_info.get("display_name")})
\ No newline at end of file
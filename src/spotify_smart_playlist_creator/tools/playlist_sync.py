@@ -0,0 +1,215 @@
+"""
+Incremental playlist updates: diff the current items against a new track list and apply the fewest writes
+"""
+
+import os
+import re
+from bisect import bisect_left
+from collections import Counter
+from typing import List, NamedTuple, Optional, Sequence, Set
+
+from spotify_smart_playlist_creator.tools.spotify_api import (
+    MAX_TRACKS_PER_REQUEST,
+    add_tracks,
+    get_playlist,
+    remove_tracks,
+    reorder_tracks,
+    replace_tracks,
+)
+
+# -----------------------------------------------------------------------------
+# Configuration & Constants
+# -----------------------------------------------------------------------------
+
+# A write costs about as much as sending this many URIs; used to choose between a diff and a rewrite
+PLAYLIST_WRITE_COST = int(os.environ.get("PLAYLIST_WRITE_COST", "10"))
+
+# -----------------------------------------------------------------------------
+# Operations
+# -----------------------------------------------------------------------------
+
+REMOVE, MOVE, ADD, REPLACE = "remove", "move", "add", "replace"
+
+# A bare playlist ID, a spotify:playlist: URI or an open.spotify.com/playlist/ link
+PLAYLIST_ID_RE = re.compile(r"^(?:spotify:playlist:|https?://open\.spotify\.com/(?:[\w-]+/)?playlist/)?(?P<id>[A-Za-z0-9]{22})(?:[?#].*)?$")
+
+
+class Op(NamedTuple):
+    """One playlist write; `position` is the insert position (add) or range start (move)."""
+    kind: str
+    uris: tuple = ()
+    position: int = 0
+    insert_before: int = 0
+
+
+def parse_playlist_id(text: str) -> Optional[str]:
+    """The playlist ID in a pasted ID, URI or share link, or None if there is none."""
+    match = PLAYLIST_ID_RE.match((text or "").strip())
+    return match.group("id") if match else None
+
+
+def _chunks(items: Sequence[str], size: int) -> List[tuple]:
+    return [tuple(items[start:start + size]) for start in range(0, len(items), size)]
+
+
+def _longest_increasing(values: Sequence[int]) -> Set[int]:
+    """Indexes of one longest strictly increasing subsequence of `values` (O(n log n))."""
+    tails, tail_index, previous = [], [], [-1] * len(values)
+    for index, value in enumerate(values):
+        slot = bisect_left(tails, value)
+        if slot:
+            previous[index] = tail_index[slot - 1]
+        if slot == len(tails):
+            tails.append(value)
+            tail_index.append(index)
+        else:
+            tails[slot], tail_index[slot] = value, index
+    chain, index = set(), tail_index[-1] if tail_index else -1
+    while index != -1:
+        chain.add(index)
+        index = previous[index]
+    return chain
+
+# -----------------------------------------------------------------------------
+# Diff Planning
+# -----------------------------------------------------------------------------
+
+def plan_diff(current: Sequence[str], wanted: Sequence[str],
+              chunk_size: int = MAX_TRACKS_PER_REQUEST) -> List[Op]:
+    """Edits that turn the `current` item URIs into `wanted` (duplicates in `wanted` are dropped).
+
+    `current` must not hold URI-less items (None): they cannot be removed by
+    URI, so positions computed around them would be wrong (see plan_update).
+
+    Tracks that are no longer wanted are removed in batches, tracks kept but
+    out of order are moved one by one (only those outside the longest run
+    already in the right order), and new tracks are inserted in contiguous
+    runs.
+    """
+    wanted = list(dict.fromkeys(wanted))
+    rank = {uri: index for index, uri in enumerate(wanted)}
+    copies = Counter(current)
+    # Removal is by URI and drops every copy, so a repeated track is removed and added back once
+    kept = [uri for uri in current if uri in rank and copies[uri] == 1]
+    kept_set = set(kept)
+    in_order = {kept[index] for index in _longest_increasing([rank[uri] for uri in kept])}
+
+    removed = [uri for uri in dict.fromkeys(current) if uri not in kept_set]
+    ops = [Op(REMOVE, chunk) for chunk in _chunks(removed, chunk_size)]
+
+    # Place each out-of-order track right after its predecessor in the new list
+    order = list(kept)
+    target = [uri for uri in wanted if uri in kept_set]
+    for index, uri in enumerate(target):
+        if uri in in_order:
+            continue
+        start = order.index(uri)
+        before = order.index(target[index - 1]) + 1 if index else 0
+        if start in (before, before - 1):
+            continue
+        ops.append(Op(MOVE, position=start, insert_before=before))
+        order.insert(before - 1 if start < before else before, order.pop(start))
+
+    # The kept tracks are now in order; insert each run of new ones where it belongs
+    run_start = None
+    for index, uri in enumerate(wanted + [None]):
+        if uri is not None and uri not in kept_set:
+            run_start = index if run_start is None else run_start
+        elif run_start is not None:
+            for offset, chunk in enumerate(_chunks(wanted[run_start:index], chunk_size)):
+                ops.append(Op(ADD, chunk, position=run_start + offset * chunk_size))
+            run_start = None
+    return ops
+
+
+def plan_rewrite(wanted: Sequence[str], chunk_size: int = MAX_TRACKS_PER_REQUEST) -> List[Op]:
+    """A replace of the first 100 items, then appends of the rest."""
+    wanted = list(dict.fromkeys(wanted))
+    ops = [Op(REPLACE, tuple(wanted[:chunk_size]))]
+    ops += [Op(ADD, chunk, position=chunk_size * (offset + 1))
+            for offset, chunk in enumerate(_chunks(wanted[chunk_size:], chunk_size))]
+    return ops
+
+
+def plan_cost(ops: Sequence[Op]) -> int:
+    """PLAYLIST_WRITE_COST per request plus one per URI sent (a move sends none but shifts one item)."""
+    return sum(PLAYLIST_WRITE_COST + (len(op.uris) if op.kind != MOVE else 1) for op in ops)
+
+
+def diff_counts(ops: Sequence[Op]) -> dict:
+    """Tracks added, removed and moved by a plan_diff() plan."""
+    return {
+        "added": sum(len(op.uris) for op in ops if op.kind == ADD),
+        "removed": sum(len(op.uris) for op in ops if op.kind == REMOVE),
+        "moved": sum(op.kind == MOVE for op in ops),
+    }
+
+
+def plan_update(current: Sequence[str], wanted: Sequence[str],
+                chunk_size: int = MAX_TRACKS_PER_REQUEST) -> List[Op]:
+    """The plan_diff() edits, or a plan_rewrite() when that is strictly cheaper by plan_cost().
+
+    A rewrite sends every wanted URI, so it only wins when most of the
+    playlist changes or it is moved around a lot; small edits to a long
+    playlist stay edits. A playlist holding URI-less items (local files,
+    unavailable tracks) is always rewritten, which also drops them.
+    """
+    rewrite = plan_rewrite(wanted, chunk_size)
+    if None in current:
+        return rewrite
+    diff = plan_diff(current, wanted, chunk_size)
+    return rewrite if plan_cost(rewrite) < plan_cost(diff) else diff
+
+# -----------------------------------------------------------------------------
+# Applying Updates
+# -----------------------------------------------------------------------------
+
+def apply_update(token: str, playlist_id: str, ops: Sequence[Op], snapshot_id: Optional[str] = None) -> dict:
+    """Send the planned writes in order; positions assume each earlier write succeeded.
+
+    The report counts the URIs each kind of write sent (a rewrite "adds"
+    every track). Raises SpotifyAPIError on the first failed write (the client
+    has already retried throttling and server errors).
+    """
+    report = {"snapshot_id": snapshot_id, "added": 0, "removed": 0, "moved": 0, "replaced": False,
+              "requests": 0}
+    for op in ops:
+        if op.kind == REMOVE:
+            response = remove_tracks(token, playlist_id, list(op.uris), report["snapshot_id"])
+            report["removed"] += len(op.uris)
+        elif op.kind == MOVE:
+            response = reorder_tracks(token, playlist_id, op.position, op.insert_before,
+                                      snapshot_id=report["snapshot_id"])
+            report["moved"] += 1
+        elif op.kind == REPLACE:
+            response = replace_tracks(token, playlist_id, list(op.uris))
+            report["replaced"] = True
+            report["added"] += len(op.uris)
+        else:
+            response = add_tracks(token, playlist_id, list(op.uris), op.position)
+            report["added"] += len(op.uris)
+        report["requests"] += 1
+        if isinstance(response, dict):
+            report["snapshot_id"] = response.get("snapshot_id", report["snapshot_id"])
+    return report
+
+
+def sync_playlist(token: str, playlist_id: str, uris: Sequence[str]) -> dict:
+    """Make an existing playlist hold exactly `uris`, in order, with as few writes as possible.
+
+    Returns the apply_update() report plus the playlist's `name`, `url`, the
+    number of tracks it had before (`previous`) and the reads it took. Its
+    `added`, `removed` and `moved` describe the diff between the old and new
+    track lists, also when the playlist was rewritten.
+    """
+    playlist = get_playlist(token, playlist_id)
+    current = playlist["uris"]
+    ops = plan_update(current, uris)
+    report = apply_update(token, playlist_id, ops, playlist.get("snapshot_id"))
+    if report["replaced"]:
+        # Count what changed, not the URIs the rewrite sent
+        report.update(diff_counts(plan_diff([uri for uri in current if uri], uris)))
+        report["removed"] += current.count(None)
+    report["requests"] += 1 + max(0, (len(current) - 1) // MAX_TRACKS_PER_REQUEST)
+    return dict(report, name=playlist.get("name"), previous=len(current),
+                url=playlist.get("external_urls", {}).get("spotify"))
@@ -0,0 +1,93 @@
+"""
+Per-token cache of the user's Spotify profile (/v1/me): user ID, country and product
+"""
+
+import os
+import hashlib
+import threading
+from typing import Optional
+
+from spotify_smart_playlist_creator.tools.spotify_api import SpotifyAPIError, aget_current_user, get_current_user
+from spotify_smart_playlist_creator.tools.track_cache import LRUCache, TrackCache
+
+# -----------------------------------------------------------------------------
+# Configuration & Constants
+# -----------------------------------------------------------------------------
+
+PROFILE_CACHE_TTL = float(os.environ.get("PROFILE_CACHE_TTL", "3600"))  # about an access token's lifetime
+PROFILE_CACHE_SIZE = int(os.environ.get("PROFILE_CACHE_SIZE", "10000"))
+DEFAULT_MARKET = os.environ.get("SPOTIFY_DEFAULT_MARKET", "US")
+
+# -----------------------------------------------------------------------------
+# Profile Cache
+# -----------------------------------------------------------------------------
+
+_cache: Optional[TrackCache] = None
+_cache_lock = threading.Lock()
+
+def get_profile_cache() -> TrackCache:
+    """Return the process-wide profile cache (memory only; profiles are cheap to re-fetch)."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = TrackCache(LRUCache(PROFILE_CACHE_SIZE), ttl=PROFILE_CACHE_TTL)
+        return _cache
+
+
+def _key(token: str) -> str:
+    # Tokens are not kept in memory as keys
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def compact_profile(user: dict) -> dict:
+    """Keep the profile fields the app uses."""
+    return {
+        "id": user.get("id"),
+        "display_name": user.get("display_name"),
+        "country": user.get("country"),
+        "product": user.get("product"),
+    }
+
+
+def remember_profile(token: str, user: dict) -> dict:
+    """Cache a /v1/me answer already fetched for `token` (e.g. during the OAuth callback)."""
+    profile = compact_profile(user)
+    get_profile_cache().set(_key(token), profile)
+    return profile
+
+
+def get_profile(token: str) -> dict:
+    """The token owner's compact profile, from the cache or GET /v1/me."""
+    found, profile = get_profile_cache().get(_key(token))
+    if found and profile:
+        return profile
+    return remember_profile(token, get_current_user(token))
+
+
+async def aget_profile(token: str) -> dict:
+    """Async version of get_profile()."""
+    found, profile = get_profile_cache().get(_key(token))
+    if found and profile:
+        return profile
+    return remember_profile(token, await aget_current_user(token))
+
+
+def user_market(profile: Optional[dict], default: str = DEFAULT_MARKET) -> str:
+    """Market to search in for this user: their profile country, else `default`."""
+    return (profile or {}).get("country") or default
+
+
+def market_for(token: str) -> str:
+    """The token owner's market; DEFAULT_MARKET if the profile cannot be fetched."""
+    try:
+        return user_market(get_profile(token))
+    except (SpotifyAPIError, OSError, ValueError):
+        return DEFAULT_MARKET
+
+
+async def amarket_for(token: str) -> str:
+    """Async version of market_for()."""
+    try:
+        return user_market(await aget_profile(token))
+    except (SpotifyAPIError, OSError, ValueError):
+        return DEFAULT_MARKET
@@ -0,0 +1,226 @@
+"""
+Rate-limit aware scheduling for Spotify API requests
+"""
+
+import os
+import time
+import asyncio
+import random
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+
+# -----------------------------------------------------------------------------
+# Configuration & Constants
+# -----------------------------------------------------------------------------
+
+APP_RATE = float(os.environ.get("SPOTIFY_APP_RATE", "10"))          # requests/second for the whole app
+APP_BURST = float(os.environ.get("SPOTIFY_APP_BURST", "20"))
+TOKEN_RATE = float(os.environ.get("SPOTIFY_TOKEN_RATE", "5"))       # requests/second per access token
+TOKEN_BURST = float(os.environ.get("SPOTIFY_TOKEN_BURST", "10"))
+MAX_RETRIES = int(os.environ.get("SPOTIFY_MAX_RETRIES", "4"))
+BACKOFF_BASE = float(os.environ.get("SPOTIFY_BACKOFF_BASE", "0.5"))
+BACKOFF_MAX = float(os.environ.get("SPOTIFY_BACKOFF_MAX", "30"))
+DEFAULT_RETRY_AFTER = 1.0
+MAX_TRACKED_TOKENS = 1024
+
+# -----------------------------------------------------------------------------
+# Token Bucket
+# -----------------------------------------------------------------------------
+
+class TokenBucket:
+    """Thread-safe token bucket that can also be paused until a point in time."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take one token and return how long the caller must wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(wait, self._paused_until - now)
+
+    def acquire(self) -> float:
+        """Block until a request may be sent; returns the time spent waiting."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self) -> float:
+        """Like acquire(), but yields to the event loop instead of blocking the thread."""
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def pause(self, seconds: float) -> None:
+        """Hold back every caller for `seconds` (used for Retry-After)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+# -----------------------------------------------------------------------------
+# Request Scheduler
+# -----------------------------------------------------------------------------
+
+def _retry_after(response) -> float:
+    try:
+        return float(response.headers.get("Retry-After", DEFAULT_RETRY_AFTER))
+    except (TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER
+
+
+def backoff_delay(attempt: int, base: float = BACKOFF_BASE, cap: float = BACKOFF_MAX) -> float:
+    """Full-jitter exponential backoff."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class RequestScheduler:
+    """Paces requests per app and per token, honours 429 Retry-After and retries 5xx."""
+
+    def __init__(self, app_rate: float = APP_RATE, app_burst: float = APP_BURST,
+                 token_rate: float = TOKEN_RATE, token_burst: float = TOKEN_BURST,
+                 max_retries: int = MAX_RETRIES):
+        self.app_bucket = TokenBucket(app_rate, app_burst)
+        self.token_rate = token_rate
+        self.token_burst = token_burst
+        self.max_retries = max_retries
+        self._token_buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._metrics = {
+            "requests": 0,
+            "throttled": 0,
+            "server_errors": 0,
+            "network_errors": 0,
+            "retries": 0,
+            "gave_up": 0,
+            "queue_delay_total": 0.0,
+            "queue_delay_max": 0.0,
+            "retry_after_total": 0.0,
+        }
+
+    def _token_bucket(self, token: Optional[str]) -> Optional[TokenBucket]:
+        if not token:
+            return None
+        key = hashlib.sha256(token.encode()).hexdigest()[:16]
+        with self._lock:
+            bucket = self._token_buckets.get(key)
+            if bucket is None:
+                bucket = TokenBucket(self.token_rate, self.token_burst)
+                self._token_buckets[key] = bucket
+                while len(self._token_buckets) > MAX_TRACKED_TOKENS:
+                    self._token_buckets.popitem(last=False)
+            else:
+                self._token_buckets.move_to_end(key)
+            return bucket
+
+    def _record(self, **increments) -> None:
+        with self._lock:
+            for name, value in increments.items():
+                self._metrics[name] += value
+
+    def _wait_for_slot(self, token_bucket: Optional[TokenBucket]) -> None:
+        waited = self.app_bucket.acquire()
+        if token_bucket is not None:
+            waited += token_bucket.acquire()
+        self._record_slot(waited)
+
+    async def _wait_for_slot_async(self, token_bucket: Optional[TokenBucket]) -> None:
+        waited = await self.app_bucket.acquire_async()
+        if token_bucket is not None:
+            waited += await token_bucket.acquire_async()
+        self._record_slot(waited)
+
+    def _record_slot(self, waited: float) -> None:
+        with self._lock:
+            self._metrics["requests"] += 1
+            self._metrics["queue_delay_total"] += waited
+            self._metrics["queue_delay_max"] = max(self._metrics["queue_delay_max"], waited)
+
+    def _on_error(self, attempt: int, idempotent: bool) -> Optional[float]:
+        """Record a network error; return the backoff delay, or None to re-raise."""
+        self._record(network_errors=1)
+        if attempt == self.max_retries or not idempotent:
+            self._record(gave_up=1)
+            return None
+        self._record(retries=1)
+        return backoff_delay(attempt)
+
+    def _on_response(self, response, attempt: int, idempotent: bool) -> Optional[float]:
+        """Record a response; return the delay before retrying, or None to return it."""
+        if response.status == 429:
+            delay = _retry_after(response)
+            self._record(throttled=1, retry_after_total=delay)
+            # Spotify rate limits per app, so every request waits out Retry-After
+            self.app_bucket.pause(delay)
+            delay = 0.0  # the paused bucket does the waiting
+        elif response.status >= 500 and idempotent:
+            self._record(server_errors=1)
+            delay = backoff_delay(attempt)
+        else:
+            if response.status >= 500:
+                self._record(server_errors=1)
+            return None
+        if attempt == self.max_retries:
+            self._record(gave_up=1)
+            return None
+        self._record(retries=1)
+        return delay
+
+    def execute(self, token: Optional[str], send: Callable[[], Any], idempotent: bool = True):
+        """Call `send()` under the rate limits, retrying throttled and failed attempts.
+
+        A 429 means the request was not processed, so it is always retried.
+        Server and network errors are only retried when `idempotent` is set.
+        """
+        token_bucket = self._token_bucket(token)
+        attempt = 0
+        while True:
+            self._wait_for_slot(token_bucket)
+            try:
+                response = send()
+            except OSError:
+                delay = self._on_error(attempt, idempotent)
+                if delay is None:
+                    raise
+            else:
+                delay = self._on_response(response, attempt, idempotent)
+                if delay is None:
+                    return response
+            time.sleep(delay)
+            attempt += 1
+
+    async def execute_async(self, token: Optional[str], send: Callable[[], Awaitable[Any]],
+                            idempotent: bool = True, network_errors: tuple = (OSError,)):
+        """Async version of execute(); `send` is a coroutine function."""
+        token_bucket = self._token_bucket(token)
+        attempt = 0
+        while True:
+            await self._wait_for_slot_async(token_bucket)
+            try:
+                response = await send()
+            except network_errors:
+                delay = self._on_error(attempt, idempotent)
+                if delay is None:
+                    raise
+            else:
+                delay = self._on_response(response, attempt, idempotent)
+                if delay is None:
+                    return response
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def metrics(self) -> dict:
+        """Snapshot of throttling, retry and queueing-delay counters."""
+        with self._lock:
+            return dict(self._metrics, tracked_tokens=len(self._token_buckets))
@@ -0,0 +1,135 @@
+"""
+Typed results passed between pipeline stages, with compact serializations for the LLM
+"""
+
+import json
+from typing import Any, List, Optional
+
+from pydantic import BaseModel
+
+# -----------------------------------------------------------------------------
+# Error Codes
+# -----------------------------------------------------------------------------
+
+class ErrorCode:
+    """Machine-readable reasons a result is missing."""
+    NOT_FOUND = "not_found"            # search succeeded, no confident match
+    SEARCH_FAILED = "search_failed"    # HTTP or network error after retries
+    API_ERROR = "api_error"            # any other Spotify API call failed
+    INVALID_INPUT = "invalid_input"    # a line or argument the tool could not use
+    NO_RESULT = "no_result"            # the crew finished without a usable answer
+
+
+def compact_json(data: Any) -> str:
+    """JSON without whitespace, the form every tool observation is sent in."""
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+# -----------------------------------------------------------------------------
+# Result Models
+# -----------------------------------------------------------------------------
+
+class ToolError(BaseModel):
+    """A failed tool call, reported to the LLM as {"error": code, "message": ...}."""
+    code: str
+    message: str = ""
+
+    def to_llm(self) -> str:
+        return compact_json({"error": self.code, "message": self.message[:300]})
+
+
+class TrackMatch(BaseModel):
+    """Outcome of resolving one curated song to a Spotify track."""
+    title: str
+    artist: str
+    track_id: Optional[str] = None
+    uri: Optional[str] = None
+    name: Optional[str] = None
+    artists: List[str] = []
+    duration_ms: Optional[int] = None
+    popularity: Optional[int] = None
+    url: Optional[str] = None
+    confidence: Optional[float] = None
+    error: Optional[str] = None
+
+    @property
+    def found(self) -> bool:
+        return self.uri is not None
+
+    @property
+    def song(self) -> str:
+        return f'"{self.title}" by {self.artist}' if self.artist else self.title
+
+    @classmethod
+    def from_track(cls, song, track: Optional[dict], error: str = ErrorCode.NOT_FOUND) -> "TrackMatch":
+        """Build from a Song and a compact track dict (None means not found / `error`)."""
+        if not track:
+            return cls(title=song.title, artist=song.artist, error=error)
+        return cls(
+            title=song.title,
+            artist=song.artist,
+            track_id=track.get("id"),
+            uri=track.get("uri"),
+            name=track.get("name"),
+            artists=track.get("artists") or [],
+            duration_ms=track.get("duration_ms"),
+            popularity=track.get("popularity"),
+            url=track.get("url"),
+            confidence=track.get("confidence"),
+        )
+
+    def to_llm(self) -> str:
+        if not self.found:
+            return compact_json({"song": self.song, "error": self.error})
+        return compact_json({"uri": self.uri, "confidence": self.confidence})
+
+
+class SearchResults(BaseModel):
+    """Matches for a whole song list, in the list's order."""
+    matches: List[TrackMatch] = []
+
+    @property
+    def uris(self) -> List[str]:
+        return [match.uri for match in self.matches if match.found]
+
+    @property
+    def missing(self) -> List[TrackMatch]:
+        return [match for match in self.matches if not match.found]
+
+    def to_llm(self) -> str:
+        return compact_json({
+            "uris": ",".join(self.uris),
+            "missing": [{"song": match.song, "error": match.error} for match in self.missing],
+        })
+
+
+class PlaylistResult(BaseModel):
+    """The playlist a job built (or why it could not)."""
+    playlist_url: Optional[str] = None
+    name: Optional[str] = None
+    playlist_id: Optional[str] = None
+    added: Optional[int] = None
+    removed: Optional[int] = None
+    moved: Optional[int] = None
+    requested: Optional[int] = None
+    duration_ms: Optional[int] = None
+    error: Optional[str] = None
+
+    def to_llm(self) -> str:
+        return compact_json(self.model_dump(exclude_none=True))
+
+    @classmethod
+    def from_crew_output(cls, output) -> "PlaylistResult":
+        """Read the crew's final answer (structured when available, else its JSON text)."""
+        if isinstance(getattr(output, "pydantic", None), cls):
+            return output.pydantic
+        data = getattr(output, "json_dict", None)
+        if not data:
+            raw = (getattr(output, "raw", None) or str(output or "")).strip()
+            start, end = raw.find("{"), raw.rfind("}")
+            try:
+                data = json.loads(raw[start:end + 1]) if start != -1 and end > start else None
+            except ValueError:
+                data = None
+        if not isinstance(data, dict) or not data.get("playlist_url"):
+            return cls(error=ErrorCode.NO_RESULT)
+        return cls(**{key: value for key, value in data.items() if key in cls.model_fields})
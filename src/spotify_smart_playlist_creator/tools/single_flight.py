@@ -0,0 +1,98 @@
+"""
+Coalescing of concurrent identical requests: one in-flight call per key, its result shared by every caller
+"""
+
+import asyncio
+import threading
+import weakref
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+# -----------------------------------------------------------------------------
+# Single Flight
+# -----------------------------------------------------------------------------
+
+class _Call:
+    """A call in flight; waiters block on `done` and then read its outcome."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time; callers arriving meanwhile get its result.
+
+    Threads coalesce with threads and coroutines with coroutines on the same
+    event loop. Only calls that overlap are shared: nothing is cached once the
+    call returns. `do()` and `ado()` return (result, shared), so a caller can
+    redo a shared call whose outcome depended on another caller's token.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._async_calls: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Hashable, asyncio.Future]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self.counters = {"calls": 0, "coalesced": 0}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            self.counters["calls" if leader else "coalesced"] += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    async def ado(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Async version of do(); `fn` returns the awaitable to share."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            calls = self._async_calls.setdefault(loop, {})
+            future = calls.get(key)
+            leader = future is None
+            if leader:
+                future = calls[key] = loop.create_future()
+            self.counters["calls" if leader else "coalesced"] += 1
+        if not leader:
+            try:
+                return await asyncio.shield(future), True
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise  # this caller was cancelled
+            return await self.ado(key, fn)  # the leader was cancelled; run it again
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # retrieved, even if no one else was waiting
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            with self._lock:
+                calls.pop(key, None)
+        return result, False
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self.counters, in_flight=len(self._calls) + sum(map(len, self._async_calls.values())))
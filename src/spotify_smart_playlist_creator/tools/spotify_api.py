@@ -0,0 +1,221 @@
+"""
+Plain Python wrappers around the Spotify Web API endpoints used by the crew
+"""
+
+import json
+import time
+import asyncio
+import urllib.parse
+from typing import List, Optional
+
+from spotify_smart_playlist_creator.tools.async_spotify_client import get_async_client
+from spotify_smart_playlist_creator.tools.spotify_client import get_client
+
+# -----------------------------------------------------------------------------
+# Configuration & Constants
+# -----------------------------------------------------------------------------
+
+MAX_TRACKS_PER_REQUEST = 100  # Spotify's limit for playlist item writes and item pages
+CHUNK_RETRIES = 2
+
+# -----------------------------------------------------------------------------
+# Errors
+# -----------------------------------------------------------------------------
+
+class SpotifyAPIError(Exception):
+    """Raised when Spotify answers with an unexpected HTTP status."""
+
+    def __init__(self, status: int, response):
+        super().__init__(f"HTTP {status} - {response}")
+        self.status = status
+        self.response = response
+
+def _decode(res):
+    try:
+        return res.json()
+    except ValueError:
+        return res.text
+
+def _expect(res, status: int):
+    """Return the decoded body, or raise SpotifyAPIError if the status is not `status`."""
+    response = _decode(res)
+    if res.status != status:
+        raise SpotifyAPIError(res.status, response)
+    return response
+
+def _playlist_body(name: str, description: str, public: bool) -> str:
+    return json.dumps({
+        "name": name,
+        "description": description,
+        "public": public
+    })
+
+def _tracks_body(uris: List[str], position: int) -> str:
+    return json.dumps({
+        "uris": uris,
+        "position": position
+    })
+
+def _with_snapshot(body: dict, snapshot_id: Optional[str]) -> str:
+    if snapshot_id:
+        body["snapshot_id"] = snapshot_id
+    return json.dumps(body)
+
+def _chunk_retryable(e: Exception) -> bool:
+    # Adding tracks is not idempotent: after a timeout or 5xx the chunk may already be in the
+    # playlist, so only a 429 (rejected before it was applied) is safe to send again
+    return isinstance(e, SpotifyAPIError) and e.status == 429
+
+# -----------------------------------------------------------------------------
+# Endpoints
+# -----------------------------------------------------------------------------
+
+def get_current_user(token: str) -> dict:
+    """GET /v1/me"""
+    res = get_client().request("GET", "/v1/me", token=token)
+    return _expect(res, 200)
+
+
+def create_playlist(token: str, user_id: str, name: str, description: str, public: bool = False) -> dict:
+    """POST /v1/users/{user_id}/playlists"""
+    body = _playlist_body(name, description, public)
+    res = get_client().request("POST", f"/v1/users/{user_id}/playlists", token=token, body=body)
+    return _expect(res, 201)
+
+
+def add_tracks(token: str, playlist_id: str, uris: List[str], position: int = 0) -> dict:
+    """POST /v1/playlists/{playlist_id}/tracks"""
+    payload = _tracks_body(uris, position)
+    res = get_client().request("POST", f"/v1/playlists/{playlist_id}/tracks", token=token, body=payload)
+    return _expect(res, 201)
+
+
+def add_tracks_chunked(token: str, playlist_id: str, uris: List[str], position: int = 0,
+                       chunk_size: int = MAX_TRACKS_PER_REQUEST, retries: int = CHUNK_RETRIES) -> dict:
+    """Add any number of tracks in <=100-item requests, keeping their order.
+
+    Chunks are sent one after another over the pooled connection: each insert
+    position depends on how many tracks the previous chunks actually added.
+    Only throttled chunks (429) are retried; a chunk that fails otherwise, or
+    is still throttled after `retries`, is reported and skipped. No request is
+    made for an empty `uris`.
+    """
+    report = {"snapshot_id": None, "added": 0, "chunks": 0, "failed_chunks": []}
+    for start in range(0, len(uris), chunk_size):
+        chunk = uris[start:start + chunk_size]
+        chunk_position = position + report["added"]
+        for attempt in range(retries + 1):
+            try:
+                response = add_tracks(token, playlist_id, chunk, chunk_position)
+                break
+            except (SpotifyAPIError, OSError) as e:
+                if attempt < retries and _chunk_retryable(e):
+                    time.sleep(0.5 * 2 ** attempt)
+                    continue
+                report["failed_chunks"].append({"start": start, "size": len(chunk), "error": str(e)})
+                response = None
+                break
+        report["chunks"] += 1
+        if response is not None:
+            report["added"] += len(chunk)
+            report["snapshot_id"] = response.get("snapshot_id", report["snapshot_id"])
+    return report
+
+
+def get_playlist(token: str, playlist_id: str) -> dict:
+    """GET /v1/playlists/{playlist_id}, plus every item URI in order (paginated reads of 100).
+
+    Only the fields the update mode needs are requested; the result has `id`,
+    `name`, `snapshot_id`, `external_urls` and `uris`. Local files and
+    unavailable items have no URI and are kept as None, so list positions
+    match the playlist's.
+    """
+    fields = urllib.parse.quote("id,name,snapshot_id,external_urls,tracks(total,items(track(uri)))")
+    res = get_client().request("GET", f"/v1/playlists/{playlist_id}?fields={fields}", token=token)
+    playlist = _expect(res, 200)
+    page = playlist.pop("tracks", None) or {}
+    items, total = page.get("items") or [], page.get("total") or 0
+    item_fields = urllib.parse.quote("items(track(uri))")
+    while len(items) < total:
+        path = (f"/v1/playlists/{playlist_id}/tracks?fields={item_fields}"
+                f"&limit={MAX_TRACKS_PER_REQUEST}&offset={len(items)}")
+        more = _expect(get_client().request("GET", path, token=token), 200).get("items") or []
+        if not more:
+            break
+        items.extend(more)
+    playlist["uris"] = [(item.get("track") or {}).get("uri") or None for item in items]
+    return playlist
+
+
+def remove_tracks(token: str, playlist_id: str, uris: List[str], snapshot_id: Optional[str] = None) -> dict:
+    """DELETE /v1/playlists/{playlist_id}/tracks (every occurrence of each URI)"""
+    body = _with_snapshot({"tracks": [{"uri": uri} for uri in uris]}, snapshot_id)
+    res = get_client().request("DELETE", f"/v1/playlists/{playlist_id}/tracks", token=token, body=body)
+    return _expect(res, 200)
+
+
+def reorder_tracks(token: str, playlist_id: str, range_start: int, insert_before: int,
+                   range_length: int = 1, snapshot_id: Optional[str] = None) -> dict:
+    """PUT /v1/playlists/{playlist_id}/tracks, moving `range_length` items to before `insert_before`"""
+    body = _with_snapshot({"range_start": range_start, "insert_before": insert_before,
+                           "range_length": range_length}, snapshot_id)
+    res = get_client().request("PUT", f"/v1/playlists/{playlist_id}/tracks", token=token, body=body)
+    return _expect(res, 200)
+
+
+def replace_tracks(token: str, playlist_id: str, uris: List[str]) -> dict:
+    """PUT /v1/playlists/{playlist_id}/tracks, replacing all items with `uris` (at most 100)"""
+    res = get_client().request("PUT", f"/v1/playlists/{playlist_id}/tracks", token=token,
+                               body=json.dumps({"uris": uris}))
+    response = _decode(res)
+    if res.status not in (200, 201):  # Spotify has answered both for a replace
+        raise SpotifyAPIError(res.status, response)
+    return response
+
+# -----------------------------------------------------------------------------
+# Async Endpoints
+# -----------------------------------------------------------------------------
+
+async def aget_current_user(token: str) -> dict:
+    """Async GET /v1/me"""
+    res = await get_async_client().request("GET", "/v1/me", token=token)
+    return _expect(res, 200)
+
+
+async def acreate_playlist(token: str, user_id: str, name: str, description: str, public: bool = False) -> dict:
+    """Async POST /v1/users/{user_id}/playlists"""
+    body = _playlist_body(name, description, public)
+    res = await get_async_client().request("POST", f"/v1/users/{user_id}/playlists", token=token, body=body)
+    return _expect(res, 201)
+
+
+async def aadd_tracks(token: str, playlist_id: str, uris: List[str], position: int = 0) -> dict:
+    """Async POST /v1/playlists/{playlist_id}/tracks"""
+    payload = _tracks_body(uris, position)
+    res = await get_async_client().request("POST", f"/v1/playlists/{playlist_id}/tracks", token=token, body=payload)
+    return _expect(res, 201)
+
+
+async def aadd_tracks_chunked(token: str, playlist_id: str, uris: List[str], position: int = 0,
+                              chunk_size: int = MAX_TRACKS_PER_REQUEST, retries: int = CHUNK_RETRIES) -> dict:
+    """Async version of add_tracks_chunked()."""
+    report = {"snapshot_id": None, "added": 0, "chunks": 0, "failed_chunks": []}
+    for start in range(0, len(uris), chunk_size):
+        chunk = uris[start:start + chunk_size]
+        chunk_position = position + report["added"]
+        for attempt in range(retries + 1):
+            try:
+                response = await aadd_tracks(token, playlist_id, chunk, chunk_position)
+                break
+            except (SpotifyAPIError, OSError) as e:
+                if attempt < retries and _chunk_retryable(e):
+                    await asyncio.sleep(0.5 * 2 ** attempt)
+                    continue
+                report["failed_chunks"].append({"start": start, "size": len(chunk), "error": str(e)})
+                response = None
+                break
+        report["chunks"] += 1
+        if response is not None:
+            report["added"] += len(chunk)
+            report["snapshot_id"] = response.get("snapshot_id", report["snapshot_id"])
+    return report
@@ -0,0 +1,270 @@
+"""
+Shared, thread-safe HTTP client for the Spotify Web API
+"""
+
+import os
+import re
+import json
+import threading
+import http.client
+import urllib.parse
+from collections import deque
+from typing import Dict, Mapping, Optional, Tuple
+
+from spotify_smart_playlist_creator import metrics
+from spotify_smart_playlist_creator.tools.rate_limit import RequestScheduler
+
+# -----------------------------------------------------------------------------
+# Configuration & Constants
+# -----------------------------------------------------------------------------
+
+# Point at a local stand-in (see mock_spotify.py) with e.g. http://127.0.0.1:8899
+SPOTIFY_API_BASE_URL = os.environ.get("SPOTIFY_API_BASE_URL", "https://api.spotify.com").rstrip("/")
+POOL_MAX_PER_HOST = int(os.environ.get("SPOTIFY_POOL_MAX_PER_HOST", "4"))
+POOL_TIMEOUT = float(os.environ.get("SPOTIFY_POOL_TIMEOUT", "30"))
+REQUEST_TIMEOUT = float(os.environ.get("SPOTIFY_REQUEST_TIMEOUT", "15"))
+IDEMPOTENT_METHODS = {"GET", "HEAD", "PUT", "DELETE"}
+
+# Errors that mean a kept-alive connection was closed by the server between
+# two requests. Idempotent requests are retried once on a fresh connection;
+# others only when nothing was sent, since the server may have acted on them.
+_STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.CannotSendRequest,
+    http.client.ResponseNotReady,
+    ConnectionResetError,
+    BrokenPipeError,
+)
+
+# Path segments that are ids, collapsed so metric labels stay low-cardinality
+_ID_SEGMENT_RE = re.compile(r"/(users|playlists|tracks|albums|artists)/[^/?]+")
+
+
+def endpoint_template(path: str) -> str:
+    """'/v1/playlists/abc/tracks?x=1' -> '/v1/playlists/{id}/tracks', for metric labels."""
+    return _ID_SEGMENT_RE.sub(r"/\1/{id}", path.split("?", 1)[0])
+
+# -----------------------------------------------------------------------------
+# Response
+# -----------------------------------------------------------------------------
+
+class SpotifyResponse:
+    """Fully read HTTP response returned by SpotifyClient.request."""
+
+    def __init__(self, status: int, headers: Mapping[str, str], body: bytes):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    @property
+    def text(self) -> str:
+        return self.body.decode("utf-8", errors="replace")
+
+    def json(self):
+        """Decode the body as JSON, returning {} for an empty body."""
+        if not self.body:
+            return {}
+        return json.loads(self.body.decode("utf-8"))
+
+# -----------------------------------------------------------------------------
+# Connection Pool
+# -----------------------------------------------------------------------------
+
+class HostConnectionPool:
+    """Bounded LIFO pool of keep-alive HTTP(S) connections to a single host."""
+
+    def __init__(self, host: str, max_size: int = POOL_MAX_PER_HOST, timeout: float = REQUEST_TIMEOUT,
+                 scheme: str = "https"):
+        self.host = host
+        self.connection_class = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        self.max_size = max_size
+        self.timeout = timeout
+        self._idle = deque()
+        self._open = 0
+        self._cond = threading.Condition()
+        self.created = 0
+        self.reused = 0
+
+    def acquire(self, wait: float = POOL_TIMEOUT) -> http.client.HTTPConnection:
+        """Take an idle connection, open a new one, or wait for one to be released."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._idle or self._open < self.max_size, timeout=wait):
+                raise TimeoutError(f"No connection to {self.host} available after {wait}s")
+            if self._idle:
+                self.reused += 1
+                return self._idle.pop()
+            self._open += 1
+            self.created += 1
+        return self.connection_class(self.host, timeout=self.timeout)
+
+    def release(self, conn: http.client.HTTPConnection, reusable: bool = True) -> None:
+        """Return a connection to the pool, or close it if it cannot be reused."""
+        with self._cond:
+            if reusable:
+                self._idle.append(conn)
+            else:
+                conn.close()
+                self._open -= 1
+            self._cond.notify()
+
+    def close(self) -> None:
+        """Close all idle connections."""
+        with self._cond:
+            while self._idle:
+                self._idle.pop().close()
+                self._open -= 1
+            self._cond.notify_all()
+
+# -----------------------------------------------------------------------------
+# Spotify Client
+# -----------------------------------------------------------------------------
+
+class SpotifyClient:
+    """Routes Spotify API requests through a rate-limit scheduler and per-host keep-alive pools."""
+
+    def __init__(self, max_per_host: int = POOL_MAX_PER_HOST, timeout: float = REQUEST_TIMEOUT,
+                 scheduler: Optional[RequestScheduler] = None, base_url: str = SPOTIFY_API_BASE_URL):
+        self.base_url = base_url
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.scheduler = scheduler or RequestScheduler()
+        self._pools: Dict[str, HostConnectionPool] = {}
+        self._lock = threading.Lock()
+
+    def _pool(self, base_url: str) -> HostConnectionPool:
+        with self._lock:
+            pool = self._pools.get(base_url)
+            if pool is None:
+                parsed = urllib.parse.urlsplit(base_url)
+                pool = HostConnectionPool(parsed.netloc, self.max_per_host, self.timeout, parsed.scheme)
+                self._pools[base_url] = pool
+            return pool
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        token: Optional[str] = None,
+        body: Optional[str] = None,
+        headers: Optional[Dict[str, str]] = None,
+        base_url: Optional[str] = None,
+    ) -> SpotifyResponse:
+        """Send a request through the scheduler and return the fully read response.
+
+        429 responses are retried by the scheduler; 5xx and network errors are
+        only retried for idempotent methods. The last response is returned if
+        every attempt was throttled or failed. A 401 is retried once if the
+        token provider (see set_token_provider) can refresh the token.
+        """
+        provider = _token_provider
+        if token and provider is not None:
+            token = provider.current(token)
+        res = self._request(method, path, token, body, headers, base_url)
+        if res.status == 401 and token and provider is not None:
+            # Expired or revoked mid-job: retry once with a refreshed token
+            fresh = provider.refresh(token)
+            if fresh and fresh != token:
+                res = self._request(method, path, fresh, body, headers, base_url)
+        return res
+
+    def _request(self, method: str, path: str, token: Optional[str], body: Optional[str],
+                 headers: Optional[Dict[str, str]], base_url: Optional[str]) -> SpotifyResponse:
+        request_headers = dict(headers or {})
+        if token:
+            request_headers["Authorization"] = f"Bearer {token}"
+        if body is not None:
+            request_headers.setdefault("Content-Type", "application/json")
+        base_url = base_url or self.base_url
+        with metrics.http_call(method, endpoint_template(path), len(body or "")) as call:
+            return self.scheduler.execute(
+                token,
+                lambda: call.record(self._send(method, path, body, request_headers, base_url)),
+                idempotent=method in IDEMPOTENT_METHODS,
+            )
+
+    def _send(self, method: str, path: str, body: Optional[str], request_headers: Dict[str, str],
+              base_url: str) -> SpotifyResponse:
+        pool = self._pool(base_url)
+        for attempt in range(2):
+            conn = pool.acquire()
+            try:
+                conn.request(method, path, body=body, headers=request_headers)
+                res = conn.getresponse()
+                data = res.read()
+            except _STALE_CONNECTION_ERRORS as e:
+                pool.release(conn, reusable=False)
+                unsent = isinstance(e, http.client.CannotSendRequest)
+                if attempt == 0 and (method in IDEMPOTENT_METHODS or unsent):
+                    continue
+                if not isinstance(e, OSError):
+                    # CannotSendRequest/ResponseNotReady are HTTPExceptions; callers and the
+                    # scheduler treat network failures as OSError
+                    raise ConnectionError(f"{type(e).__name__} on a fresh connection") from e
+                raise
+            except Exception:
+                pool.release(conn, reusable=False)
+                raise
+            pool.release(conn, reusable=not res.will_close)
+            return SpotifyResponse(res.status, res.msg, data)  # res.msg: case-insensitive headers
+
+    def stats(self) -> Dict[str, Tuple[int, int]]:
+        """Return (created, reused) connection counts per base URL."""
+        with self._lock:
+            return {host: (pool.created, pool.reused) for host, pool in self._pools.items()}
+
+    def metric_samples(self):
+        """Scheduler and connection-pool counters as metric families for /metrics."""
+        scheduler = self.scheduler.metrics()
+        pools = self.stats()
+        return [
+            ("spotify_scheduler_requests_total", "counter", "Attempts sent through the rate-limit scheduler",
+             [({}, scheduler["requests"])]),
+            ("spotify_scheduler_throttled_total", "counter", "Attempts answered with 429",
+             [({}, scheduler["throttled"])]),
+            ("spotify_scheduler_gave_up_total", "counter", "Calls that failed after every retry",
+             [({}, scheduler["gave_up"])]),
+            ("spotify_scheduler_queue_delay_seconds_total", "counter", "Time spent waiting for rate-limit tokens",
+             [({}, scheduler["queue_delay_total"])]),
+            ("spotify_pool_connections_created_total", "counter", "Connections opened per base URL",
+             [({"base_url": url}, created) for url, (created, _) in pools.items()]),
+            ("spotify_pool_connections_reused_total", "counter", "Requests served on a kept-alive connection",
+             [({"base_url": url}, reused) for url, (_, reused) in pools.items()]),
+        ]
+
+    def close(self) -> None:
+        with self._lock:
+            for pool in self._pools.values():
+                pool.close()
+
+
+_client: Optional[SpotifyClient] = None
+_client_lock = threading.Lock()
+
+def get_client() -> SpotifyClient:
+    """Return the process-wide SpotifyClient shared by all tools."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = SpotifyClient()
+        return _client
+
+# -----------------------------------------------------------------------------
+# Token Provider
+# -----------------------------------------------------------------------------
+
+# Object with current(token) -> token and refresh(token) -> Optional[token]
+# (token_store.TokenStore); None sends tokens exactly as given
+_token_provider = None
+
+def set_token_provider(provider) -> None:
+    """Let `provider` swap stale access tokens for fresh ones on every request.
+
+    Both clients call `provider.current(token)` before sending, so a token
+    close to expiry is refreshed first, and `provider.refresh(token)` after a
+    401, resending the request once with the new token.
+    """
+    global _token_provider
+    _token_provider = provider
+
+def get_token_provider():
+    return _token_provider
@@ -0,0 +1,212 @@
+"""
+Two-tier (in-process LRU + SQLite) cache for song -> Spotify track resolutions
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+# -----------------------------------------------------------------------------
+# Configuration & Constants
+# -----------------------------------------------------------------------------
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "spotify_smart_playlist_creator", "tracks.sqlite3"
+)
+TRACK_CACHE_PATH = os.environ.get("TRACK_CACHE_PATH", DEFAULT_CACHE_PATH)  # empty string disables the disk tier
+TRACK_CACHE_TTL = float(os.environ.get("TRACK_CACHE_TTL", str(7 * 24 * 3600)))
+TRACK_CACHE_NEGATIVE_TTL = float(os.environ.get("TRACK_CACHE_NEGATIVE_TTL", str(6 * 3600)))
+TRACK_CACHE_MEMORY_SIZE = int(os.environ.get("TRACK_CACHE_MEMORY_SIZE", "5000"))
+TRACK_CACHE_DISK_SIZE = int(os.environ.get("TRACK_CACHE_DISK_SIZE", "200000"))
+
+# Stored for "searched, but Spotify had no match" so misses are not re-queried
+NOT_FOUND = None
+
+# -----------------------------------------------------------------------------
+# Key Normalization
+# -----------------------------------------------------------------------------
+
+def normalize_text(text: str) -> str:
+    """Lowercase and strip accents, punctuation and extra whitespace."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = re.sub(r"[^\w\s]", " ", text.lower())
+    return " ".join(text.split())
+
+
+def track_key(title: str, artist: str, market: str) -> str:
+    """Build the cache key for a (title, artist, market) lookup."""
+    return f"{(market or '').upper()}|{normalize_text(title)}|{normalize_text(artist)}"
+
+# -----------------------------------------------------------------------------
+# In-process LRU Tier
+# -----------------------------------------------------------------------------
+
+class LRUCache:
+    """Thread-safe, size-bounded LRU with per-entry expiry."""
+
+    def __init__(self, max_size: int = TRACK_CACHE_MEMORY_SIZE):
+        self.max_size = max_size
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return False, None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._data[key]
+                return False, None
+            self._data.move_to_end(key)
+            return True, value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._data[key] = (time.time() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+# -----------------------------------------------------------------------------
+# SQLite Tier
+# -----------------------------------------------------------------------------
+
+class SQLiteCache:
+    """Persistent JSON key/value store with expiry and least-recently-used eviction."""
+
+    def __init__(self, path: str = TRACK_CACHE_PATH, max_rows: int = TRACK_CACHE_DISK_SIZE):
+        self.path = path
+        self.max_rows = max_rows
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY, value TEXT, expires_at REAL, accessed_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed_at)")
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return False, None
+            if row[1] < now:
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                return False, None
+            self._conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+        return True, json.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now + ttl, now),
+            )
+            self._writes += 1
+            if self._writes % 100 == 0:
+                self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        self._conn.execute("DELETE FROM cache WHERE expires_at < ?", (now,))
+        overflow = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0] - self.max_rows
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed_at LIMIT ?)",
+                (overflow,),
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+# -----------------------------------------------------------------------------
+# Two-tier Track Cache
+# -----------------------------------------------------------------------------
+
+class TrackCache:
+    """Consults the memory tier, then the disk tier, and counts hits and misses."""
+
+    def __init__(self, memory: LRUCache, disk: Optional[SQLiteCache] = None,
+                 ttl: float = TRACK_CACHE_TTL, negative_ttl: float = TRACK_CACHE_NEGATIVE_TTL):
+        self.memory = memory
+        self.disk = disk
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "negative_hits": 0, "misses": 0}
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.counters[name] += 1
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """Return (found, value); value is NOT_FOUND for a cached negative result."""
+        found, value = self.memory.get(key)
+        if found:
+            self._count("memory_hits")
+        elif self.disk is not None:
+            found, value = self.disk.get(key)
+            if found:
+                self._count("disk_hits")
+                ttl = self.ttl if value is not NOT_FOUND else self.negative_ttl
+                self.memory.set(key, value, ttl)
+        if not found:
+            self._count("misses")
+        elif value is NOT_FOUND:
+            self._count("negative_hits")
+        return found, value
+
+    def set(self, key: str, value: Any) -> None:
+        ttl = self.ttl if value is not NOT_FOUND else self.negative_ttl
+        self.memory.set(key, value, ttl)
+        if self.disk is not None:
+            self.disk.set(key, value, ttl)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self.counters)
+
+    def clear(self) -> None:
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+
+_cache: Optional[TrackCache] = None
+_cache_lock = threading.Lock()
+
+def get_track_cache() -> TrackCache:
+    """Return the process-wide TrackCache configured from the environment."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            disk = SQLiteCache(TRACK_CACHE_PATH) if TRACK_CACHE_PATH else None
+            _cache = TrackCache(LRUCache(), disk)
+        return _cache
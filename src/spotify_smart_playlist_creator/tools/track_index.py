@@ -0,0 +1,207 @@
+"""
+Local index of every track seen in Spotify search responses (SQLite + FTS5)
+
+Search results are added as they arrive, so later jobs can find candidates for
+a song by fuzzy title/artist lookup before making any network call. Tracks not
+seen in a search for TRACK_INDEX_TTL are pruned, and so are the least recently
+seen ones beyond TRACK_INDEX_MAX_ROWS.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from typing import Iterable, List, Optional
+
+from spotify_smart_playlist_creator.tools.track_cache import normalize_text
+
+# -----------------------------------------------------------------------------
+# Configuration & Constants
+# -----------------------------------------------------------------------------
+
+DEFAULT_INDEX_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "spotify_smart_playlist_creator", "track_index.sqlite3"
+)
+TRACK_INDEX_PATH = os.environ.get("TRACK_INDEX_PATH", DEFAULT_INDEX_PATH)  # empty string disables the index
+TRACK_INDEX_CANDIDATES = int(os.environ.get("TRACK_INDEX_CANDIDATES", "10"))  # rows returned per lookup
+TRACK_INDEX_TTL = float(os.environ.get("TRACK_INDEX_TTL", str(30 * 24 * 3600)))  # since a track was last seen
+TRACK_INDEX_MAX_ROWS = int(os.environ.get("TRACK_INDEX_MAX_ROWS", "500000"))
+PRUNE_EVERY = 100  # add_items() calls between prunes
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS tracks ("
+    " rowid INTEGER PRIMARY KEY, track_id TEXT UNIQUE NOT NULL, uri TEXT, name TEXT, artists TEXT,"
+    " title_norm TEXT, artist_norm TEXT, duration_ms INTEGER, popularity INTEGER, url TEXT,"
+    " markets TEXT NOT NULL DEFAULT ' ', updated_at REAL)",
+    "CREATE INDEX IF NOT EXISTS tracks_updated ON tracks (updated_at)",
+    # External-content FTS table over the normalized names, kept in sync by triggers
+    "CREATE VIRTUAL TABLE IF NOT EXISTS tracks_fts USING fts5("
+    " title_norm, artist_norm, content='tracks', content_rowid='rowid', tokenize='unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS tracks_ai AFTER INSERT ON tracks BEGIN"
+    " INSERT INTO tracks_fts (rowid, title_norm, artist_norm) VALUES (new.rowid, new.title_norm, new.artist_norm);"
+    " END",
+    "CREATE TRIGGER IF NOT EXISTS tracks_au AFTER UPDATE OF title_norm, artist_norm ON tracks BEGIN"
+    " INSERT INTO tracks_fts (tracks_fts, rowid, title_norm, artist_norm)"
+    " VALUES ('delete', old.rowid, old.title_norm, old.artist_norm);"
+    " INSERT INTO tracks_fts (rowid, title_norm, artist_norm) VALUES (new.rowid, new.title_norm, new.artist_norm);"
+    " END",
+    "CREATE TRIGGER IF NOT EXISTS tracks_ad AFTER DELETE ON tracks BEGIN"
+    " INSERT INTO tracks_fts (tracks_fts, rowid, title_norm, artist_norm)"
+    " VALUES ('delete', old.rowid, old.title_norm, old.artist_norm);"
+    " END",
+)
+
+UPSERT = (
+    "INSERT INTO tracks (track_id, uri, name, artists, title_norm, artist_norm, duration_ms, popularity,"
+    " url, markets, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+    " ON CONFLICT(track_id) DO UPDATE SET"
+    " uri = excluded.uri, name = excluded.name, artists = excluded.artists,"
+    " title_norm = excluded.title_norm, artist_norm = excluded.artist_norm,"
+    " duration_ms = excluded.duration_ms, popularity = excluded.popularity, url = excluded.url,"
+    " markets = CASE WHEN instr(tracks.markets, excluded.markets) THEN tracks.markets"
+    "           ELSE tracks.markets || ltrim(excluded.markets) END,"
+    " updated_at = excluded.updated_at"
+)
+
+# -----------------------------------------------------------------------------
+# Query Building
+# -----------------------------------------------------------------------------
+
+def _terms(text: str) -> List[str]:
+    # Quoted so words like AND/NOT/NEAR are matched literally
+    return [f'"{word}"' for word in normalize_text(text).split()]
+
+
+def match_query(title: str, artist: str = "") -> Optional[str]:
+    """FTS5 query: every title word (the last one as a prefix) and any artist word."""
+    title_terms = _terms(title)
+    if not title_terms:
+        return None
+    title_terms[-1] += "*"
+    query = f"title_norm : ({' AND '.join(title_terms)})"
+    artist_terms = _terms(artist)
+    if artist_terms:
+        query += f" AND artist_norm : ({' OR '.join(artist_terms)})"
+    return query
+
+
+def _market_tag(market: Optional[str]) -> str:
+    """Market as stored in the space-separated `markets` column (e.g. ' BR '); ' ' matches any."""
+    return f" {market.upper()} " if market else " "
+
+# -----------------------------------------------------------------------------
+# Track Index
+# -----------------------------------------------------------------------------
+
+class TrackIndex:
+    """Tracks by id with the markets they were playable in, searchable by fuzzy title and artist."""
+
+    def __init__(self, path: str = TRACK_INDEX_PATH, ttl: float = TRACK_INDEX_TTL,
+                 max_rows: int = TRACK_INDEX_MAX_ROWS):
+        self.path = path
+        self.ttl = ttl
+        self.max_rows = max_rows
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in SCHEMA:
+            self._conn.execute(statement)
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.prune()
+
+    def add_items(self, items: Iterable[dict], market: Optional[str]) -> int:
+        """Upsert Spotify track items (as returned by /v1/search) playable in `market`."""
+        now = time.time()
+        rows = []
+        for item in items:
+            if not item.get("id"):
+                continue
+            artists = [artist.get("name") or "" for artist in item.get("artists", [])]
+            rows.append((
+                item["id"], item.get("uri"), item.get("name"), json.dumps(artists, ensure_ascii=False),
+                normalize_text(item.get("name") or ""), normalize_text(" ".join(artists)),
+                item.get("duration_ms"), item.get("popularity"),
+                item.get("external_urls", {}).get("spotify"), _market_tag(market), now,
+            ))
+        if not rows:
+            return 0
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(UPSERT, rows)
+            except sqlite3.Error:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            self._writes += 1
+            if self._writes % PRUNE_EVERY == 0:
+                self._prune(now)
+        return len(rows)
+
+    def prune(self) -> int:
+        """Delete tracks not seen within the TTL, then the least recently seen beyond max_rows."""
+        with self._lock:
+            return self._prune(time.time())
+
+    def _prune(self, now: float) -> int:
+        deleted = self._conn.execute("DELETE FROM tracks WHERE updated_at < ?", (now - self.ttl,)).rowcount
+        overflow = self._conn.execute("SELECT COUNT(*) FROM tracks").fetchone()[0] - self.max_rows
+        if overflow > 0:
+            deleted += self._conn.execute(
+                "DELETE FROM tracks WHERE rowid IN (SELECT rowid FROM tracks ORDER BY updated_at LIMIT ?)",
+                (overflow,),
+            ).rowcount
+        return deleted
+
+    def candidates(self, title: str, artist: str, market: Optional[str],
+                   limit: int = TRACK_INDEX_CANDIDATES) -> List[dict]:
+        """Best FTS matches playable in `market`, shaped like Spotify search items."""
+        query = match_query(title, artist)
+        if not query:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT t.track_id, t.uri, t.name, t.artists, t.duration_ms, t.popularity, t.url"
+                " FROM tracks_fts JOIN tracks t ON t.rowid = tracks_fts.rowid"
+                " WHERE tracks_fts MATCH ? AND instr(t.markets, ?) AND t.updated_at >= ?"
+                " ORDER BY tracks_fts.rank LIMIT ?",
+                (query, _market_tag(market), time.time() - self.ttl, limit),
+            ).fetchall()
+        return [{
+            "id": track_id,
+            "uri": uri,
+            "name": name,
+            "artists": [{"name": artist_name} for artist_name in json.loads(artists or "[]")],
+            "duration_ms": duration_ms,
+            "popularity": popularity,
+            "external_urls": {"spotify": url} if url else {},
+        } for track_id, uri, name, artists, duration_ms, popularity, url in rows]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM tracks")  # the delete trigger empties tracks_fts
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM tracks").fetchone()[0]
+
+
+_index: Optional[TrackIndex] = None
+_index_disabled = not TRACK_INDEX_PATH
+_index_lock = threading.Lock()
+
+def get_track_index() -> Optional[TrackIndex]:
+    """Return the process-wide TrackIndex, or None if it is disabled or SQLite lacks FTS5."""
+    global _index, _index_disabled
+    with _index_lock:
+        if _index is None and not _index_disabled:
+            try:
+                _index = TrackIndex(TRACK_INDEX_PATH)
+            except sqlite3.OperationalError as e:
+                print(f"⚠️ Local track index disabled: {e}")
+                _index_disabled = True
+        return _index
@@ -0,0 +1,454 @@
+"""
+Concurrent resolution of curated song lists to Spotify tracks
+"""
+
+import os
+import re
+import asyncio
+import sqlite3
+import contextvars
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from difflib import SequenceMatcher
+from typing import List, NamedTuple, Optional, Tuple
+
+from spotify_smart_playlist_creator.progress import report
+from spotify_smart_playlist_creator.tools.async_spotify_client import get_async_client
+from spotify_smart_playlist_creator.tools.profile_cache import amarket_for, market_for
+from spotify_smart_playlist_creator.tools.results import ErrorCode, TrackMatch
+from spotify_smart_playlist_creator.tools.single_flight import SingleFlight
+from spotify_smart_playlist_creator.tools.spotify_api import SpotifyAPIError
+from spotify_smart_playlist_creator.tools.spotify_client import get_client, POOL_MAX_PER_HOST
+from spotify_smart_playlist_creator.tools.track_cache import get_track_cache, normalize_text, track_key, NOT_FOUND
+from spotify_smart_playlist_creator.tools.track_index import get_track_index
+
+# -----------------------------------------------------------------------------
+# Configuration & Constants
+# -----------------------------------------------------------------------------
+
+SEARCH_CONCURRENCY = int(os.environ.get("SPOTIFY_SEARCH_CONCURRENCY", str(POOL_MAX_PER_HOST)))
+SEARCH_LIMIT = int(os.environ.get("SPOTIFY_SEARCH_LIMIT", "5"))  # candidates fetched per song for re-ranking
+MIN_MATCH_CONFIDENCE = float(os.environ.get("SPOTIFY_MIN_MATCH_CONFIDENCE", "0.65"))
+# Local index matches skip the network, so they must be more certain than search results
+INDEX_MIN_CONFIDENCE = float(os.environ.get("TRACK_INDEX_MIN_CONFIDENCE", "0.85"))
+# Concurrent identical searches share one request unless this is "0"
+COALESCE_SEARCHES = os.environ.get("SPOTIFY_COALESCE_SEARCHES", "1") != "0"
+
+# Candidate scoring weights (sum to 1)
+TITLE_WEIGHT, ARTIST_WEIGHT, POPULARITY_WEIGHT, DURATION_WEIGHT = 0.55, 0.35, 0.05, 0.05
+VERSION_PENALTY = 0.15
+SIMILARITY_FLOOR = 0.5  # below this, two names are treated as unrelated rather than "a bit similar"
+
+# Versions that are rarely what a curator means unless the title asks for them
+VERSION_WORDS = ("live", "remix", "karaoke", "instrumental", "acoustic", "cover", "demo", "sped up", "slowed")
+# " - Remastered 2011", "(feat. X)", "[Live]" and similar suffixes
+TITLE_SUFFIX_RE = re.compile(r"\s*(?:\([^)]*\)|\[[^\]]*\]|\s-\s.*)$")
+ARTIST_SPLIT_RE = re.compile(r"\s*(?:,|&|\bfeat\.?|\bft\.?|\bfeaturing\b|\bwith\b|\band\b|\be\b|\bx\b)\s*", re.IGNORECASE)
+
+# Matches curator lines such as `- "Basket Case" by Green Day` or `3. "Creep" - Radiohead`
+SONG_LINE_RE = re.compile(
+    r'^\s*(?:[-*•]|\d+[.)])?\s*["“](?P<title>[^"”]+)["”]\s*(?:by|-|–|—)\s*(?P<artist>.+?)\s*$',
+    re.IGNORECASE,
+)
+
+# -----------------------------------------------------------------------------
+# Song Parsing
+# -----------------------------------------------------------------------------
+
+class Song(NamedTuple):
+    title: str
+    artist: str
+
+    def __str__(self) -> str:
+        return f'"{self.title}" by {self.artist}'
+
+
+def parse_song(line: str) -> Optional[Song]:
+    """Parse a single `"Song Title" by Artist` line, or return None."""
+    match = SONG_LINE_RE.match(line)
+    if not match:
+        return None
+    return Song(match.group("title").strip(), match.group("artist").strip())
+
+
+def parse_song_list(text: str) -> List[Song]:
+    """Parse every `"Song Title" by Artist` line in a block of curator output."""
+    songs = []
+    for line in text.splitlines():
+        song = parse_song(line)
+        if song:
+            songs.append(song)
+    return songs
+
+# -----------------------------------------------------------------------------
+# Candidate Ranking
+# -----------------------------------------------------------------------------
+
+def _strip_suffixes(title: str) -> str:
+    previous = None
+    while previous != title:
+        previous, title = title, TITLE_SUFFIX_RE.sub("", title)
+    return title or previous
+
+
+def text_similarity(a: str, b: str) -> float:
+    """Fuzzy 0-1 similarity of two names, ignoring case, accents and punctuation."""
+    a, b = normalize_text(a), normalize_text(b)
+    if not a or not b:
+        return 0.0
+    if a == b:
+        return 1.0
+    words_a, words_b = set(a.split()), set(b.split())
+    containment = len(words_a & words_b) / min(len(words_a), len(words_b))
+    return max(SequenceMatcher(None, a, b).ratio(), 0.9 * containment)
+
+
+def title_similarity(wanted: str, candidate: str) -> float:
+    return max(text_similarity(wanted, candidate),
+               text_similarity(_strip_suffixes(wanted), _strip_suffixes(candidate)))
+
+
+def artist_similarity(wanted: str, candidates: List[str]) -> float:
+    """Best match between any credited artist and any artist named in `wanted`."""
+    wanted_parts = [part for part in ARTIST_SPLIT_RE.split(wanted) if part] or [wanted]
+    pairs = [(w, c) for w in wanted_parts for c in candidates]
+    best = max((text_similarity(w, c) for w, c in pairs), default=0.0)
+    return max(best, text_similarity(wanted, ", ".join(candidates)))
+
+
+def _duration_score(duration_ms: Optional[int]) -> float:
+    """Interludes and very long live jams are unlikely picks."""
+    if not duration_ms:
+        return 0.5
+    if duration_ms < 60_000:
+        return 0.2
+    if duration_ms > 12 * 60_000:
+        return 0.5
+    return 1.0
+
+
+def _unrequested_version(wanted: str, candidate: str) -> bool:
+    wanted, candidate = normalize_text(wanted), normalize_text(candidate)
+    return any(re.search(rf"\b{word}\b", candidate) and not re.search(rf"\b{word}\b", wanted)
+               for word in VERSION_WORDS)
+
+
+def _floor(similarity: float) -> float:
+    return similarity if similarity >= SIMILARITY_FLOOR else 0.0
+
+
+def match_confidence(song: Song, item: dict) -> float:
+    """0-1 confidence that a search result is the requested song."""
+    name = item.get("name") or ""
+    artists = [artist.get("name", "") for artist in item.get("artists", [])]
+    title = _floor(title_similarity(song.title, name))
+    if song.artist:
+        score = TITLE_WEIGHT * title + ARTIST_WEIGHT * _floor(artist_similarity(song.artist, artists))
+    else:
+        score = (TITLE_WEIGHT + ARTIST_WEIGHT) * title
+    score += POPULARITY_WEIGHT * (item.get("popularity") or 0) / 100
+    score += DURATION_WEIGHT * _duration_score(item.get("duration_ms"))
+    if _unrequested_version(song.title, name):
+        score -= VERSION_PENALTY
+    return round(min(max(score, 0.0), 1.0), 3)
+
+
+def rank_candidates(song: Song, items: List[dict]) -> List[Tuple[float, dict]]:
+    """(confidence, item) pairs, best first; Spotify's order breaks ties."""
+    scored = [(match_confidence(song, item), -index, item) for index, item in enumerate(items)]
+    scored.sort(key=lambda entry: entry[:2], reverse=True)
+    return [(confidence, item) for confidence, _, item in scored]
+
+
+def is_playable(item: dict) -> bool:
+    """Whether a search item can be played in the searched market.
+
+    With a `market`, Spotify relinks tracks to a version available there and
+    flags the rest with is_playable=false; without one the flag is absent.
+    """
+    return item.get("is_playable") is not False
+
+
+def best_match(song: Song, items: List[dict], min_confidence: float = MIN_MATCH_CONFIDENCE) -> Optional[dict]:
+    """Compact best playable candidate with its `confidence`, or NOT_FOUND if none is confident enough."""
+    ranked = rank_candidates(song, [item for item in items if is_playable(item)])
+    if not ranked or ranked[0][0] < min_confidence:
+        return NOT_FOUND
+    confidence, item = ranked[0]
+    return dict(compact_track(item), confidence=confidence)
+
+# -----------------------------------------------------------------------------
+# Deduplication
+# -----------------------------------------------------------------------------
+
+def duplicate_key(name: str, artists: List[str]) -> str:
+    """Same key for remasters, live cuts and other versions of one song by the same lead artist."""
+    title = normalize_text(_strip_suffixes(name))
+    for word in VERSION_WORDS:
+        title = re.sub(rf"\b{word}\b", " ", title)
+    lead = normalize_text(artists[0]) if artists else ""
+    return f"{' '.join(title.split())}|{lead}"
+
+
+def dedupe_matches(matches: List[TrackMatch]) -> List[TrackMatch]:
+    """Drop found tracks that repeat an earlier one (same track or a near-identical version)."""
+    seen, kept = set(), []
+    for match in matches:
+        if match.found:
+            keys = {match.track_id or match.uri, duplicate_key(match.name or match.title, match.artists)}
+            if keys & seen:
+                continue
+            seen |= keys
+        kept.append(match)
+    return kept
+
+# -----------------------------------------------------------------------------
+# Local Index
+# -----------------------------------------------------------------------------
+
+def index_items(items: List[dict], market: Optional[str]) -> None:
+    """Add the playable items of a search response to the local track index."""
+    index = get_track_index()
+    if index is None:
+        return
+    try:
+        index.add_items([item for item in items if is_playable(item)], market)
+    except sqlite3.Error as e:
+        print(f"⚠️ Could not update the local track index: {e}")
+
+
+def local_match(song: Song, market: Optional[str]) -> Optional[dict]:
+    """Best track for a song from the local index, or NOT_FOUND if none is confident enough."""
+    index = get_track_index()
+    if index is None:
+        return NOT_FOUND
+    try:
+        items = index.candidates(song.title, song.artist, market)
+    except sqlite3.Error as e:
+        print(f"⚠️ Local track index lookup failed: {e}")
+        return NOT_FOUND
+    return best_match(song, items, INDEX_MIN_CONFIDENCE)
+
+# -----------------------------------------------------------------------------
+# Search
+# -----------------------------------------------------------------------------
+
+def compact_track(item: dict) -> dict:
+    """Keep only the track fields the pipeline uses, so cache entries stay small."""
+    return {
+        "id": item.get("id"),
+        "uri": item.get("uri"),
+        "name": item.get("name"),
+        "artists": [artist.get("name") for artist in item.get("artists", [])],
+        "duration_ms": item.get("duration_ms"),
+        "popularity": item.get("popularity"),
+        "url": item.get("external_urls", {}).get("spotify"),
+    }
+
+
+def fielded_query(title: str, artist: str = "") -> str:
+    """Spotify field filters; quotes are dropped since they would end the field value."""
+    title, artist = title.replace('"', " ").strip(), artist.replace('"', " ").strip()
+    return f"track:{title} artist:{artist}" if artist else f"track:{title}"
+
+
+def search_path(query: str, market: str, search_type: str = "track", limit: int = SEARCH_LIMIT,
+                offset: int = 0) -> str:
+    """URL-encoded /v1/search path (so '&', '#' or '?' in titles are safe)."""
+    params = urllib.parse.urlencode({
+        "q": query,
+        "type": search_type,
+        "market": market,
+        "limit": max(1, min(limit, 50)),
+        "offset": offset,
+    })
+    return f"/v1/search?{params}"
+
+
+_search_flight = SingleFlight()
+
+def get_search_flight() -> SingleFlight:
+    """Return the process-wide SingleFlight that coalesces identical /v1/search requests."""
+    return _search_flight
+
+
+def search_flight_key(path: str) -> tuple:
+    """Search identity: query (case and spacing ignored), type, market, limit and offset."""
+    params = dict(urllib.parse.parse_qsl(urllib.parse.urlsplit(path).query))
+    query = " ".join(params.get("q", "").lower().split())
+    return (query, params.get("type"), (params.get("market") or "").upper(), params.get("limit"), params.get("offset"))
+
+
+def _needs_own_request(res, error: Optional[BaseException]) -> bool:
+    # The leader's failure may be its own (its token, its connection), so a follower tries once itself
+    return error is not None or res.status in (401, 403)
+
+
+def search_request(token: str, path: str):
+    """GET a /v1/search path, sharing the response with identical searches already in flight.
+
+    A shared call that raised or failed authorization ran with another
+    caller's token, so it is retried once with this caller's own.
+    """
+    def send():
+        try:
+            return get_client().request("GET", path, token=token), None
+        except Exception as e:
+            return None, e
+
+    if not COALESCE_SEARCHES:
+        return get_client().request("GET", path, token=token)
+    (res, error), shared = _search_flight.do(search_flight_key(path), send)
+    if shared and _needs_own_request(res, error):
+        return get_client().request("GET", path, token=token)
+    if error is not None:
+        raise error
+    return res
+
+
+async def asearch_request(token: str, path: str):
+    """Async version of search_request()."""
+    async def send():
+        try:
+            return await get_async_client().request("GET", path, token=token), None
+        except Exception as e:
+            return None, e
+
+    if not COALESCE_SEARCHES:
+        return await get_async_client().request("GET", path, token=token)
+    (res, error), shared = await _search_flight.ado(search_flight_key(path), send)
+    if shared and _needs_own_request(res, error):
+        return await get_async_client().request("GET", path, token=token)
+    if error is not None:
+        raise error
+    return res
+
+
+def search_metric_samples():
+    """Coalescing counters as metric families for /metrics."""
+    stats = _search_flight.stats()
+    return [
+        ("spotify_search_requests_total", "counter", "Searches sent to Spotify by a coalescing leader",
+         [({}, stats["calls"])]),
+        ("spotify_search_coalesced_total", "counter", "Searches that shared an identical in-flight request",
+         [({}, stats["coalesced"])]),
+        ("spotify_search_in_flight", "gauge", "Distinct searches currently in flight", [({}, stats["in_flight"])]),
+    ]
+
+
+def _search_path(song: Song, market: str) -> str:
+    return search_path(fielded_query(song.title, song.artist), market)
+
+
+def _track_from_response(res, song: Song, market: Optional[str]) -> Optional[dict]:
+    """Best re-ranked track from a search response, or NOT_FOUND; raises SpotifyAPIError if the search failed.
+
+    Every playable candidate is also added to the local track index.
+    """
+    if res.status != 200:
+        raise SpotifyAPIError(res.status, res.text)
+    items = res.json().get("tracks", {}).get("items", [])
+    index_items(items, market)
+    return best_match(song, items)
+
+
+def _match(song: Song, search) -> TrackMatch:
+    """Run one search and wrap its outcome, reporting progress either way."""
+    try:
+        track = search()
+    except (OSError, ValueError, SpotifyAPIError) as e:
+        report(f"⚠️ Search failed for {song}: {e}")
+        return TrackMatch.from_track(song, None, ErrorCode.SEARCH_FAILED)
+    _report_result(song, track)
+    return TrackMatch.from_track(song, track)
+
+
+def _report_result(song: Song, track: Optional[dict]) -> None:
+    if not track:
+        report(f"🔎 {song} - not found")
+    elif track.get("confidence") is not None:
+        report(f"🔎 {song} ✓ ({track['confidence']:.0%} match)")
+    else:
+        report(f"🔎 {song} ✓")
+
+
+def search_track(token: str, song: Song, market: Optional[str] = None) -> Optional[dict]:
+    """Return the best playable compact track for a song, from the cache, the local index or Spotify search.
+
+    `market` defaults to the token owner's country; cache entries are per market.
+    Raises SpotifyAPIError if the search itself failed (failures are not cached).
+    """
+    market = market or market_for(token)
+    cache = get_track_cache()
+    key = track_key(song.title, song.artist, market)
+    found, track = cache.get(key)
+    if found:
+        return track
+    track = local_match(song, market)
+    if track:
+        cache.set(key, track)
+        return track
+
+    res = search_request(token, _search_path(song, market))
+    track = _track_from_response(res, song, market)
+    cache.set(key, track)
+    return track
+
+
+def resolve_songs(token: str, songs: List[Song], market: Optional[str] = None,
+                  max_workers: int = SEARCH_CONCURRENCY) -> List[TrackMatch]:
+    """Search all songs concurrently in `market` (default: the user's); results keep the order of `songs`."""
+    if not songs:
+        return []
+    market = market or market_for(token)
+
+    def search(song):
+        return _match(song, lambda: search_track(token, song, market))
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(songs))) as executor:
+        # Each search runs in a copy of the caller's context so progress reaches its job
+        futures = [executor.submit(contextvars.copy_context().run, search, song) for song in songs]
+        return [future.result() for future in futures]
+
+# -----------------------------------------------------------------------------
+# Async Search
+# -----------------------------------------------------------------------------
+
+async def asearch_track(token: str, song: Song, market: Optional[str] = None) -> Optional[dict]:
+    """Async version of search_track()."""
+    market = market or await amarket_for(token)
+    cache = get_track_cache()
+    key = track_key(song.title, song.artist, market)
+    found, track = cache.get(key)
+    if found:
+        return track
+    track = local_match(song, market)
+    if track:
+        cache.set(key, track)
+        return track
+
+    res = await asearch_request(token, _search_path(song, market))
+    track = _track_from_response(res, song, market)
+    cache.set(key, track)
+    return track
+
+
+async def aresolve_songs(token: str, songs: List[Song], market: Optional[str] = None,
+                         max_concurrency: int = SEARCH_CONCURRENCY) -> List[TrackMatch]:
+    """Search all songs on the current event loop, at most `max_concurrency` at a time."""
+    if not songs:
+        return []
+    market = market or await amarket_for(token)
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def search(song):
+        async with semaphore:
+            try:
+                track = await asearch_track(token, song, market)
+            except (OSError, ValueError, SpotifyAPIError) as e:
+                report(f"⚠️ Search failed for {song}: {e}")
+                return TrackMatch.from_track(song, None, ErrorCode.SEARCH_FAILED)
+        _report_result(song, track)
+        return TrackMatch.from_track(song, track)
+
+    return list(await asyncio.gather(*(search(song) for song in songs)))
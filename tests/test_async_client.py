@@ -0,0 +1,117 @@
+import asyncio
+import json
+
+import httpx
+
+from spotify_smart_playlist_creator.tools import async_spotify_client, spotify_client, track_resolver
+from spotify_smart_playlist_creator.tools.async_spotify_client import AsyncSpotifyClient, get_async_client
+from spotify_smart_playlist_creator.tools.single_flight import SingleFlight
+from spotify_smart_playlist_creator.tools.spotify_api import aadd_tracks_chunked
+from spotify_smart_playlist_creator.tools.track_resolver import asearch_request
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Answers with `handler(request)` after `delay` seconds and keeps every request."""
+
+    def __init__(self, handler, delay=0.0):
+        self.handler, self.delay, self.requests = handler, delay, []
+
+    async def handle_async_request(self, request):
+        self.requests.append(request)
+        await asyncio.sleep(self.delay)
+        return self.handler(request)
+
+
+def run_with(handler, coro_fn, delay=0.0):
+    """Run `coro_fn()` on a fresh loop whose shared async client answers with `handler`."""
+    transport = RecordingTransport(handler, delay)
+
+    async def main():
+        client = AsyncSpotifyClient(transport=transport)
+        async_spotify_client._clients[asyncio.get_running_loop()] = client
+        try:
+            return await coro_fn()
+        finally:
+            await client.aclose()
+
+    return asyncio.run(main()), transport.requests
+
+
+def uris(count):
+    return [f"spotify:track:{n}" for n in range(count)]
+
+
+def test_chunks_are_added_in_order():
+    def handler(request):
+        return httpx.Response(201, json={"snapshot_id": f"s{json.loads(request.content)['position']}"})
+
+    report, requests = run_with(handler, lambda: aadd_tracks_chunked("t", "p", uris(250), position=5))
+    bodies = [json.loads(request.content) for request in requests]
+    assert [(len(body["uris"]), body["position"]) for body in bodies] == [(100, 5), (100, 105), (50, 205)]
+    assert requests[0].url.path == "/v1/playlists/p/tracks"
+    assert requests[0].headers["Authorization"] == "Bearer t"
+    assert report["added"] == 250 and report["snapshot_id"] == "s205"
+
+
+def test_chunk_that_may_have_been_applied_is_not_resent():
+    statuses = [503, 201]
+
+    def handler(request):
+        return httpx.Response(statuses.pop(0), json={"snapshot_id": "s1"})
+
+    report, requests = run_with(handler, lambda: aadd_tracks_chunked("t", "p", uris(150)))
+    assert len(requests) == 2  # the failed chunk once, then the next chunk at position 0
+    assert json.loads(requests[1].content)["position"] == 0
+    assert report["added"] == 50
+    assert report["failed_chunks"][0]["start"] == 0
+
+
+class FakeProvider:
+    def __init__(self):
+        self.refreshed = []
+
+    def current(self, token):
+        return token
+
+    def refresh(self, token):
+        self.refreshed.append(token)
+        return "fresh"
+
+
+def test_401_refreshes_the_token_and_retries_once(monkeypatch):
+    provider = FakeProvider()
+    monkeypatch.setattr(spotify_client, "_token_provider", provider)
+
+    def handler(request):
+        if request.headers["Authorization"] == "Bearer stale":
+            return httpx.Response(401, json={"error": {"status": 401}})
+        return httpx.Response(200, json={"id": "alice"})
+
+    res, requests = run_with(handler, lambda: get_async_client().request("GET", "/v1/me", token="stale"))
+    assert res.status == 200 and res.json() == {"id": "alice"}
+    assert [request.headers["Authorization"] for request in requests] == ["Bearer stale", "Bearer fresh"]
+    assert provider.refreshed == ["stale"]
+
+
+def test_identical_async_searches_share_one_request(monkeypatch):
+    monkeypatch.setattr(track_resolver, "_search_flight", SingleFlight())
+    monkeypatch.setattr(track_resolver, "COALESCE_SEARCHES", True)
+
+    def handler(request):
+        return httpx.Response(200, json={"tracks": {"items": []}})
+
+    results, requests = run_with(handler, lambda: asyncio.gather(
+        asearch_request("t", "/v1/search?q=Hey+Jude&type=track"),
+        asearch_request("t", "/v1/search?q=hey++jude&type=track")), delay=0.01)
+    assert len(requests) == 1
+    assert [res.status for res in results] == [200, 200]
+
+
+def test_each_event_loop_gets_its_own_client():
+    async def client_pair():
+        return get_async_client(), get_async_client()
+
+    first, again = asyncio.run(client_pair())
+    second, _ = asyncio.run(client_pair())
+    assert first is again
+    assert first is not second
@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+from spotify_smart_playlist_creator import batch
+from spotify_smart_playlist_creator.batch import DONE, FAILED, ResultsFile, load_jobs, run_batch
+
+
+def write(path, text):
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def test_load_jobs_from_jsonl_and_csv(tmp_path):
+    jsonl = write(tmp_path / "prompts.jsonl", '{"prompt": "rock"}\n\n{"id": "b", "user_prompt": "jazz", '
+                  '"target_minutes": "45", "market": "br"}\n')
+    assert load_jobs(jsonl) == [
+        {"id": "1", "user_prompt": "rock"},
+        {"id": "b", "user_prompt": "jazz", "target_minutes": 45.0, "market": "BR"},
+    ]
+    csv = write(tmp_path / "prompts.csv", "id,prompt,playlist_id\nx,lo-fi,spotify:playlist:37i9dQZF1DXcBWIGoYBM5M\n")
+    assert load_jobs(csv) == [{"id": "x", "user_prompt": "lo-fi", "playlist_id": "37i9dQZF1DXcBWIGoYBM5M"}]
+
+
+@pytest.mark.parametrize("text, error", [
+    ('{"prompt": ""}\n', "no prompt"),
+    ('{"id": 1, "prompt": "a"}\n{"id": 1, "prompt": "b"}\n', "Duplicate job id"),
+    ('{"prompt": "a", "playlist_id": "not a playlist"}\n', "invalid playlist_id"),
+])
+def test_load_jobs_rejects_bad_rows(tmp_path, text, error):
+    with pytest.raises(ValueError, match=error):
+        load_jobs(write(tmp_path / "prompts.jsonl", text))
+
+
+def test_completed_uses_the_latest_record_and_ignores_a_torn_line(tmp_path):
+    path = write(tmp_path / "results.jsonl", "\n".join([
+        json.dumps({"id": "a", "status": FAILED}),
+        json.dumps({"id": "a", "status": DONE}),
+        json.dumps({"id": "b", "status": DONE}),
+        json.dumps({"id": "b", "status": FAILED}),
+        '{"id": "c", "stat',  # crashed mid-write
+    ]))
+    results = ResultsFile(path)
+    assert results.completed() == {"a"}
+    results.append({"id": "c", "status": DONE})
+    assert results.completed() == {"a", "c"}
+
+
+def test_run_batch_skips_done_jobs_and_retries_failed_ones(tmp_path, monkeypatch):
+    ran = []
+
+    def fake_run_job(job, token, mode, log_dir):
+        ran.append(job["id"])
+        return {"id": job["id"], "status": FAILED if job["id"] == "bad" else DONE}
+
+    monkeypatch.setattr(batch, "run_job", fake_run_job)
+    jobs = [{"id": name, "user_prompt": name} for name in ("a", "b", "bad")]
+    results = ResultsFile(str(tmp_path / "results.jsonl"))
+    results.append({"id": "a", "status": DONE})
+    results.append({"id": "bad", "status": FAILED})
+
+    summary = run_batch(jobs, results, "token", "fast", workers=2)
+    assert sorted(ran) == ["b", "bad"]
+    assert (summary[DONE], summary[FAILED], summary["skipped"]) == (1, 1, 1)
+    assert results.completed() == {"a", "b"}
@@ -0,0 +1,30 @@
+import pytest
+
+from spotify_smart_playlist_creator.curator_cache import normalize_prompt, prompt_key
+
+
+@pytest.mark.parametrize("a, b", [
+    ("Create a playlist of 90s rock songs", "90s Rock!"),
+    ("make me a playlist with chill lo-fi and jazz", "Chill lo-fi, jazz"),
+    ("Crie uma playlist de músicas de samba", "samba"),
+])
+def test_equivalent_prompts_share_a_key(a, b):
+    assert prompt_key(a) == prompt_key(b)
+
+
+@pytest.mark.parametrize("a, b", [
+    ("80s rock", "90s rock"),
+    ("12 rock songs", "20 rock songs"),
+    ("45 minutes of rock", "rock"),
+    ("happy not sad", "sad not happy"),
+    ("rock then jazz", "jazz then rock"),
+])
+def test_different_requests_get_different_keys(a, b):
+    assert prompt_key(a) != prompt_key(b)
+
+
+def test_key_carries_the_requested_size():
+    assert prompt_key("12 acoustic and folk songs").startswith("n12|")
+    assert prompt_key("30 minutos de samba").startswith("m30|")
+    assert prompt_key("samba").startswith("default|")
+    assert normalize_prompt("12 acoustic and folk songs") == "acoustic folk"
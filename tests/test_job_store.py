@@ -0,0 +1,111 @@
+import threading
+import time
+
+import fakeredis
+import pytest
+
+from spotify_smart_playlist_creator.job_store import MemoryJobStore, RedisJobStore, create_job_store
+from spotify_smart_playlist_creator.log_channel import LogChannel
+
+
+@pytest.fixture(params=["memory", "redis"])
+def store(request):
+    if request.param == "memory":
+        return MemoryJobStore(max_log_entries=3)
+    return RedisJobStore(fakeredis.FakeRedis(), max_log_entries=3)
+
+
+def messages(entries):
+    return [entry['message'] for entry in entries]
+
+
+def test_log_is_capped_and_ids_keep_increasing(store):
+    store.create("job")
+    for n in range(5):
+        store.append_log("job", f"line {n}")
+    entries, finished = store.wait_for_logs("job", 0, timeout=0)
+    assert messages(entries) == ["line 2", "line 3", "line 4"]
+    assert [entry['id'] for entry in entries] == [3, 4, 5]
+    assert not finished
+    assert messages(store.wait_for_logs("job", 4, timeout=0)[0]) == ["line 4"]
+
+
+def test_result_finishes_the_job(store):
+    store.create("job")
+    assert store.get_result("job") == (False, None)
+    store.append_log("job", "done soon")
+    store.set_result("job", "https://open.spotify.com/playlist/p")
+    assert store.get_result("job") == (True, "https://open.spotify.com/playlist/p")
+    entries, finished = store.wait_for_logs("job", 0, timeout=0)
+    assert messages(entries) == ["done soon"] and finished
+
+
+def test_cancel_request_is_visible_until_the_job_is_deleted(store):
+    store.create("job")
+    assert not store.cancel_requested("job")
+    store.request_cancel("job")
+    assert store.cancel_requested("job")
+    store.delete("job")
+    assert not store.exists("job")
+    assert not store.cancel_requested("job")
+    assert store.wait_for_logs("job", 0, timeout=0) == ([], True)
+
+
+def test_waiter_wakes_on_a_log_line_from_another_thread(store):
+    store.create("job")
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(store.wait_for_logs("job", 0, timeout=5)))
+    started = time.monotonic()
+    waiter.start()
+    time.sleep(0.05)
+    store.append_log("job", "hello")
+    waiter.join()
+    entries, finished = results[0]
+    assert messages(entries) == ["hello"] and not finished
+    assert time.monotonic() - started < 2
+
+
+def test_wait_times_out_without_new_entries(store):
+    store.create("job")
+    store.append_log("job", "old")
+    assert store.wait_for_logs("job", 1, timeout=0.05) == ([], False)
+
+
+def test_redis_keys_expire_with_the_job_ttl():
+    client = fakeredis.FakeRedis()
+    store = RedisJobStore(client, ttl=60, prefix="test")
+    store.create("job")
+    store.append_log("job", "hello")
+    store.set_result("job", "url")
+    store.request_cancel("job")
+    for name in ("seq", "logs", "result", "cancel"):
+        assert 0 < client.ttl(f"test:job:{name}") <= 60
+
+
+def test_memory_store_evicts_the_oldest_jobs():
+    store = MemoryJobStore(max_jobs=2)
+    for job_id in ("a", "b", "c"):
+        store.create(job_id)
+    assert [store.exists(job_id) for job_id in ("a", "b", "c")] == [False, True, True]
+
+
+def test_memory_store_evicts_expired_jobs():
+    store = MemoryJobStore(ttl=0.01)
+    store.create("job")
+    time.sleep(0.02)
+    assert not store.exists("job")
+
+
+def test_create_job_store_defaults_to_memory():
+    assert isinstance(create_job_store(""), MemoryJobStore)
+
+
+def test_log_channel_wakes_waiters_and_drains_after_close():
+    channel = LogChannel(max_entries=2)
+    assert channel.wait(0, timeout=0.01) == ([], False)
+    for n in range(3):
+        channel.publish(f"line {n}")
+    assert messages(channel.since(0)) == ["line 1", "line 2"]
+    channel.close()
+    entries, closed = channel.wait(2)
+    assert messages(entries) == ["line 2"] and closed
@@ -0,0 +1,60 @@
+import threading
+import time
+
+import pytest
+
+from spotify_smart_playlist_creator.jobs import DONE, TIMEOUT, JobCancelled, JobScheduler
+
+
+def wait_for(job, timeout=5):
+    deadline = time.monotonic() + timeout
+    while job.finished_at is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_queue_wait_does_not_count_against_the_timeout():
+    scheduler = JobScheduler(workers=1, default_timeout=1.5)
+    release = threading.Event()
+    blocker = scheduler.submit("blocker", lambda job: release.wait(5), timeout=30)
+    queued = scheduler.submit("queued", lambda job: "ran")
+    time.sleep(2.5)  # longer than the queued job's timeout
+    assert queued.deadline is None
+    release.set()
+    wait_for(queued)
+    assert (blocker.status, queued.status, queued.result) == (DONE, DONE, "ran")
+
+
+def test_running_job_past_its_deadline_times_out():
+    scheduler = JobScheduler(workers=1)
+    timed_out = []
+
+    def slow(job):
+        while True:
+            job.check_cancelled()
+            time.sleep(0.01)
+
+    job = scheduler.submit("slow", slow, timeout=0.2, on_timeout=timed_out.append)
+    wait_for(job)
+    assert job.status == TIMEOUT
+    assert job.deadline == job.started_at + 0.2
+    assert timed_out == [job]
+
+
+def test_cancelled_job_stops_at_its_next_check():
+    scheduler = JobScheduler(workers=1)
+    started = threading.Event()
+
+    def run(job):
+        started.set()
+        while True:
+            job.check_cancelled()
+            time.sleep(0.01)
+
+    job = scheduler.submit("job", run)
+    started.wait(5)
+    assert scheduler.cancel("job")
+    wait_for(job)
+    assert job.status == "cancelled"
+    assert not scheduler.cancel("job")
+    with pytest.raises(JobCancelled):
+        job.check_cancelled()
@@ -0,0 +1,88 @@
+import itertools
+import random
+
+import pytest
+
+from spotify_smart_playlist_creator.planner import (
+    format_duration,
+    overgenerate_prompt,
+    parse_target_minutes,
+    plan_to_duration,
+)
+from spotify_smart_playlist_creator.tools.results import TrackMatch
+
+
+def tracks(*seconds):
+    return [TrackMatch(title=f"song {index}", artist="a", uri=f"spotify:track:{index}",
+                       duration_ms=None if length is None else length * 1000)
+            for index, length in enumerate(seconds)]
+
+
+def titles(matches):
+    return [match.title for match in matches]
+
+
+def total(matches):
+    return sum(match.duration_ms for match in matches) // 1000
+
+
+@pytest.mark.parametrize("prompt, minutes", [
+    ("a 45 minute workout mix", 45),
+    ("1 hour of jazz", 60),
+    ("2 hrs and 15 min of rock", 135),
+    ("uma playlist de 1,5 horas", 90),
+    ("1h30 of lo-fi", 90),
+    ("30 minutos de samba", 30),
+    ("20 songs from the 90s", None),
+    ("20 songs under 4 minutes each", None),
+    ("songs of 3 min per song, 1 hour in total", 60),
+    ("each song under 5 minutes, 45 minutes of punk", 45),
+    ("músicas de até 4 minutos cada", None),
+    ("every morning 30 minutes of yoga music", 30),
+])
+def test_parse_target_minutes(prompt, minutes):
+    assert parse_target_minutes(prompt) == minutes
+
+
+def test_overgenerate_prompt_asks_for_extra_songs():
+    assert "30% more songs than 45 minutes" in overgenerate_prompt("rock", 45)
+
+
+def test_short_lists_are_kept_whole_without_unknown_durations():
+    matches = tracks(200, None, 180) + [TrackMatch(title="missing", artist="a")]
+    assert titles(plan_to_duration(matches, 10)) == ["song 0", "song 2"]
+
+
+def test_exact_total_in_curator_order():
+    chosen = plan_to_duration(tracks(300, 200, 250, 100, 150), 10, tolerance_seconds=0)
+    assert total(chosen) == 600
+    assert titles(chosen) == ["song 0", "song 1", "song 3"]  # the later songs are dropped first
+
+
+def test_overshoot_within_tolerance_beats_a_farther_undershoot():
+    # 500 s is 100 s short; 630 s is 30 s over and within a 60 s tolerance
+    assert total(plan_to_duration(tracks(400, 230, 100), 10, tolerance_seconds=60)) == 630
+    assert total(plan_to_duration(tracks(400, 230, 100), 10, tolerance_seconds=0)) == 500
+
+
+def test_equal_distance_prefers_the_longer_total():
+    assert total(plan_to_duration(tracks(590, 610, 700), 10, tolerance_seconds=10)) == 610
+
+
+def test_matches_brute_force_on_random_lists():
+    rng = random.Random(3)
+    for _ in range(100):
+        seconds = [rng.randint(60, 400) for _ in range(rng.randint(1, 9))]
+        target, tolerance = rng.randint(1, 25), rng.choice([0, 30, 90])
+        limit = target * 60 + tolerance
+        best = min((sum(subset) for size in range(len(seconds) + 1)
+                    for subset in itertools.combinations(seconds, size) if sum(subset) <= limit),
+                   key=lambda length: (abs(length - target * 60), -length))
+        chosen = plan_to_duration(tracks(*seconds), target, tolerance)
+        assert total(chosen) == (sum(seconds) if sum(seconds) <= limit else best)
+        assert titles(chosen) == sorted(titles(chosen), key=lambda title: int(title.split()[1]))
+
+
+@pytest.mark.parametrize("duration_ms, text", [(59_400, "0:59"), (245_000, "4:05"), (3_723_000, "1:02:03")])
+def test_format_duration(duration_ms, text):
+    assert format_duration(duration_ms) == text
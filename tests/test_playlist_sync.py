@@ -0,0 +1,151 @@
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from spotify_smart_playlist_creator.tools import playlist_sync, spotify_api
+from spotify_smart_playlist_creator.tools.playlist_sync import (
+    ADD,
+    MOVE,
+    REMOVE,
+    REPLACE,
+    parse_playlist_id,
+    plan_update,
+    sync_playlist,
+)
+
+
+def uris(count, prefix="t"):
+    return [f"spotify:track:{prefix}{n:03d}" for n in range(count)]
+
+
+def apply(items, ops):
+    """Apply the ops to a list the way Spotify applies them to a playlist."""
+    items = list(items)
+    for op in ops:
+        if op.kind == REMOVE:
+            items = [uri for uri in items if uri not in op.uris]  # every copy
+        elif op.kind == MOVE:
+            item = items[op.position]
+            items.insert(op.insert_before, item)
+            del items[op.position if op.position < op.insert_before else op.position + 1]
+        elif op.kind == REPLACE:
+            items = list(op.uris)
+        else:
+            items[op.position:op.position] = op.uris
+    return items
+
+
+def kinds(ops):
+    return [op.kind for op in ops]
+
+
+CURRENT = uris(180)
+
+
+@pytest.mark.parametrize("wanted, expected", [
+    (CURRENT, []),
+    (CURRENT[:50] + ["spotify:track:new"] + CURRENT[50:], [ADD]),
+    (CURRENT[:50] + CURRENT[51:], [REMOVE]),
+    (CURRENT[:10] + [CURRENT[150]] + CURRENT[11:150] + [CURRENT[10]] + CURRENT[151:], [MOVE, MOVE]),
+    (CURRENT[1:] + CURRENT[:1], [MOVE]),
+])
+def test_small_edits_to_a_long_playlist_stay_edits(wanted, expected):
+    ops = plan_update(CURRENT, wanted)
+    assert kinds(ops) == expected
+    assert apply(CURRENT, ops) == wanted
+
+
+def test_a_few_mixed_edits_do_not_rewrite():
+    wanted = list(CURRENT)
+    wanted.insert(20, "spotify:track:new")
+    wanted.remove(CURRENT[90])
+    wanted[100], wanted[170] = wanted[170], wanted[100]
+    ops = plan_update(CURRENT, wanted)
+    assert REPLACE not in kinds(ops)
+    assert apply(CURRENT, ops) == wanted
+
+
+def test_reversal_and_replacement_are_rewritten_in_chunks():
+    ops = plan_update(CURRENT, CURRENT[::-1])
+    assert kinds(ops) == [REPLACE, ADD]
+    assert [len(op.uris) for op in ops] == [100, 80]
+    assert apply(CURRENT, ops) == CURRENT[::-1]
+    assert kinds(plan_update(CURRENT, uris(180, "n"))) == [REPLACE, ADD]
+
+
+def test_repeated_track_is_removed_and_added_back_once():
+    current = ["spotify:track:a", "spotify:track:b", "spotify:track:a", "spotify:track:c"]
+    wanted = ["spotify:track:a", "spotify:track:b", "spotify:track:c"]
+    assert apply(current, plan_update(current, wanted)) == wanted
+
+
+def test_random_plans_reach_the_wanted_order():
+    rng = random.Random(7)
+    for _ in range(200):
+        current = rng.sample(uris(300), rng.randint(0, 250))
+        wanted = rng.sample(uris(300), rng.randint(0, 250))
+        if rng.random() < 0.5:  # mostly the same list with a few edits
+            wanted = list(current)
+            for _ in range(rng.randint(0, 5)):
+                wanted.insert(rng.randint(0, len(wanted)), f"spotify:track:x{rng.random()}")
+            head = wanted[:rng.randint(0, 5)]
+            rng.shuffle(head)
+            wanted[:len(head)] = head
+        assert apply(current, plan_update(current, wanted)) == wanted
+
+
+def test_sync_reports_the_diff_when_rewriting(monkeypatch):
+    writes = []
+    monkeypatch.setattr(playlist_sync, "get_playlist", lambda token, playlist_id: {
+        "uris": list(CURRENT), "snapshot_id": "s0", "name": "Mix", "external_urls": {}})
+    monkeypatch.setattr(playlist_sync, "replace_tracks",
+                        lambda token, playlist_id, items: writes.append(REPLACE) or {"snapshot_id": "s1"})
+    monkeypatch.setattr(playlist_sync, "add_tracks",
+                        lambda token, playlist_id, items, position: writes.append(ADD) or {"snapshot_id": "s2"})
+
+    report = sync_playlist("t", "p", CURRENT[::-1])
+    assert writes == [REPLACE, ADD]
+    assert report["replaced"] is True
+    assert (report["added"], report["removed"]) == (0, 0)
+    assert 0 < report["moved"] < 180
+    assert report["requests"] == 2 + 2  # two reads of 100 items, two writes
+    assert report["snapshot_id"] == "s2"
+
+
+@pytest.mark.parametrize("text", [
+    "37i9dQZF1DXcBWIGoYBM5M",
+    "spotify:playlist:37i9dQZF1DXcBWIGoYBM5M",
+    "https://open.spotify.com/playlist/37i9dQZF1DXcBWIGoYBM5M?si=abc",
+    "https://open.spotify.com/intl-pt/playlist/37i9dQZF1DXcBWIGoYBM5M",
+])
+def test_parse_playlist_id(text):
+    assert parse_playlist_id(text) == "37i9dQZF1DXcBWIGoYBM5M"
+
+
+def test_parse_playlist_id_rejects_other_links():
+    assert parse_playlist_id("https://open.spotify.com/album/37i9dQZF1DXcBWIGoYBM5M") is None
+    assert parse_playlist_id("") is None
+
+
+def test_get_playlist_keeps_a_placeholder_for_items_without_a_uri(monkeypatch):
+    # An unavailable track comes back as null, a local file here without a URI
+    page = {"id": "p", "name": "Mix", "snapshot_id": "s0", "tracks": {"total": 3, "items": [
+        {"track": {"uri": "spotify:track:a"}}, {"track": None}, {"track": {"uri": ""}}]}}
+    client = SimpleNamespace(request=lambda method, path, token=None: SimpleNamespace(status=200, json=lambda: page))
+    monkeypatch.setattr(spotify_api, "get_client", lambda: client)
+    assert spotify_api.get_playlist("t", "p")["uris"] == ["spotify:track:a", None, None]
+
+
+def test_playlist_with_unavailable_items_is_rewritten(monkeypatch):
+    current = ["spotify:track:a", None, "spotify:track:b", "spotify:track:c"]
+    wanted = ["spotify:track:a", "spotify:track:c", "spotify:track:new"]
+    ops = plan_update(current, wanted)
+    assert kinds(ops) == [REPLACE]
+    assert apply(current, ops) == wanted
+
+    monkeypatch.setattr(playlist_sync, "get_playlist", lambda token, playlist_id: {
+        "uris": current, "snapshot_id": "s0", "name": "Mix", "external_urls": {}})
+    monkeypatch.setattr(playlist_sync, "replace_tracks", lambda token, playlist_id, items: {"snapshot_id": "s1"})
+    report = sync_playlist("t", "p", wanted)
+    assert (report["added"], report["removed"], report["replaced"]) == (1, 2, True)
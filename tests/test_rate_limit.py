@@ -0,0 +1,132 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from spotify_smart_playlist_creator.tools import rate_limit
+from spotify_smart_playlist_creator.tools.rate_limit import RequestScheduler, TokenBucket, backoff_delay
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_burst_then_paced_waits(clock):
+    bucket = TokenBucket(rate=2, capacity=3)
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.reserve() == pytest.approx(0.5)
+    assert bucket.reserve() == pytest.approx(1.0)  # waits queue up behind earlier reservations
+
+
+def test_tokens_refill_up_to_capacity(clock):
+    bucket = TokenBucket(rate=2, capacity=3)
+    for _ in range(3):
+        bucket.reserve()
+    clock[0] += 60
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.reserve() == pytest.approx(0.5)
+
+
+def test_pause_holds_back_callers_with_tokens_left(clock):
+    bucket = TokenBucket(rate=2, capacity=3)
+    bucket.pause(4)
+    bucket.pause(1)  # a shorter pause does not cut the longer one short
+    assert bucket.reserve() == pytest.approx(4)
+    clock[0] += 4
+    assert bucket.reserve() == 0.0
+
+
+def test_backoff_delay_is_capped_full_jitter():
+    for attempt in range(8):
+        assert 0 <= backoff_delay(attempt, base=0.5, cap=10) <= min(10, 0.5 * 2 ** attempt)
+
+
+@pytest.fixture
+def sleeps(clock, monkeypatch):
+    """Sleeping advances the fake clock; backoff is a fixed 0.25s."""
+    slept = []
+
+    def sleep(seconds):
+        slept.append(seconds)
+        clock[0] += seconds
+
+    async def async_sleep(seconds):
+        sleep(seconds)
+
+    monkeypatch.setattr(rate_limit.time, "sleep", sleep)
+    monkeypatch.setattr(rate_limit.asyncio, "sleep", async_sleep)
+    monkeypatch.setattr(rate_limit, "backoff_delay", lambda attempt: 0.25)
+    return slept
+
+
+def fake_send(clock, *outcomes):
+    """A send() returning (or raising) each outcome in turn; statuses become responses."""
+    outcomes, calls = list(outcomes), []
+
+    def send():
+        calls.append(clock[0])
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        status, headers = outcome if isinstance(outcome, tuple) else (outcome, {})
+        return SimpleNamespace(status=status, headers=headers)
+
+    return send, calls
+
+
+def test_429_is_retried_after_retry_after(clock, sleeps):
+    scheduler = RequestScheduler(max_retries=2)
+    send, calls = fake_send(clock, (429, {"Retry-After": "3"}), 200)
+    assert scheduler.execute("token-a", send, idempotent=False).status == 200  # nothing was applied
+    assert calls == [100.0, 103.0]
+    metrics = scheduler.metrics()
+    assert (metrics["throttled"], metrics["retries"], metrics["retry_after_total"]) == (1, 1, 3.0)
+
+
+def test_429_pauses_other_tokens_too(clock, sleeps):
+    scheduler = RequestScheduler(max_retries=0)
+    send, _ = fake_send(clock, (429, {"Retry-After": "5"}))
+    assert scheduler.execute("token-a", send).status == 429
+    assert scheduler.metrics()["gave_up"] == 1
+    send, calls = fake_send(clock, 200)
+    scheduler.execute("token-b", send)
+    assert calls == [105.0]
+
+
+def test_non_idempotent_calls_are_not_retried(clock, sleeps):
+    scheduler = RequestScheduler()
+    send, calls = fake_send(clock, 503)
+    assert scheduler.execute("t", send, idempotent=False).status == 503
+    send, more_calls = fake_send(clock, ConnectionResetError("reset"))
+    with pytest.raises(ConnectionResetError):
+        scheduler.execute("t", send, idempotent=False)
+    assert (len(calls), len(more_calls), sleeps) == (1, 1, [])
+    metrics = scheduler.metrics()
+    assert (metrics["server_errors"], metrics["network_errors"], metrics["retries"]) == (1, 1, 0)
+
+
+def test_idempotent_calls_retry_with_backoff_then_give_up(clock, sleeps):
+    scheduler = RequestScheduler(max_retries=2)
+    send, calls = fake_send(clock, 503, 502, 500)
+    assert scheduler.execute("t", send).status == 500
+    assert len(calls) == 3 and sleeps == [0.25, 0.25]
+    send, calls = fake_send(clock, TimeoutError("timed out"), 200)
+    assert scheduler.execute("t", send).status == 200
+    metrics = scheduler.metrics()
+    assert (metrics["retries"], metrics["gave_up"], metrics["requests"]) == (3, 1, 5)
+
+
+def test_async_network_errors_give_up_after_the_last_retry(clock, sleeps):
+    scheduler = RequestScheduler(max_retries=1)
+    send, calls = fake_send(clock, OSError("down"), OSError("down"))
+
+    async def async_send():
+        return send()
+
+    with pytest.raises(OSError):
+        asyncio.run(scheduler.execute_async("t", async_send))
+    assert len(calls) == 2
+    assert scheduler.metrics()["gave_up"] == 1
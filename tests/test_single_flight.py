@@ -0,0 +1,135 @@
+import time
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from spotify_smart_playlist_creator.tools import track_resolver
+from spotify_smart_playlist_creator.tools.single_flight import SingleFlight
+from spotify_smart_playlist_creator.tools.track_resolver import search_flight_key, search_request
+
+
+def wait_until(condition):
+    deadline = time.monotonic() + 5
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+
+def run_together(count, target):
+    """Start `count` threads on `target` and return their results in start order."""
+    results = [None] * count
+
+    def run(index):
+        results[index] = target()
+
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def test_overlapping_calls_share_one_result():
+    flight, release, calls = SingleFlight(), threading.Event(), []
+
+    def fn():
+        calls.append(1)
+        release.wait(5)
+        return "result"
+
+    threads, results = run_together(4, lambda: flight.do("key", fn))
+    wait_until(lambda: flight.stats()["calls"] + flight.stats()["coalesced"] == 4)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True]
+    assert {result for result, _ in results} == {"result"}
+    assert flight.stats() == {"calls": 1, "coalesced": 3, "in_flight": 0}
+
+
+def test_calls_after_the_first_returns_are_not_cached():
+    flight = SingleFlight()
+    assert flight.do("key", lambda: 1) == (1, False)
+    assert flight.do("key", lambda: 2) == (2, False)
+
+
+def test_leader_error_is_raised_and_cleared():
+    flight = SingleFlight()
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        flight.do("key", fail)
+    assert flight.do("key", lambda: "ok") == ("ok", False)
+
+
+def test_async_calls_coalesce_on_one_loop():
+    flight, calls = SingleFlight(), []
+
+    async def fn():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def main():
+        return await asyncio.gather(*(flight.ado("key", fn) for _ in range(3)))
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert [shared for _, shared in results] == [False, True, True]
+
+
+@pytest.mark.parametrize("path, other", [
+    ("/v1/search?q=Hey+Jude&type=track&market=us&limit=5&offset=0",
+     "/v1/search?q=hey++jude&type=track&market=US&limit=5&offset=0"),
+])
+def test_search_key_ignores_case_and_spacing(path, other):
+    assert search_flight_key(path) == search_flight_key(other)
+    assert search_flight_key(path) != search_flight_key(path.replace("market=us", "market=BR"))
+
+
+class FakeClient:
+    """Answers searches after `release` is set; `outcomes` maps a token to a status or an exception."""
+
+    def __init__(self, outcomes):
+        self.outcomes, self.tokens, self.release = outcomes, [], threading.Event()
+
+    def request(self, method, path, token=None):
+        self.tokens.append(token)
+        self.release.wait(5)
+        outcome = self.outcomes[token]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return SimpleNamespace(status=outcome)
+
+
+@pytest.mark.parametrize("leader_outcome", [401, ConnectionResetError("reset")])
+def test_follower_retries_a_failed_shared_search_with_its_own_token(monkeypatch, leader_outcome):
+    client = FakeClient({"leader": leader_outcome, "follower": 200})
+    flight = SingleFlight()
+    monkeypatch.setattr(track_resolver, "get_client", lambda: client)
+    monkeypatch.setattr(track_resolver, "_search_flight", flight)
+    monkeypatch.setattr(track_resolver, "COALESCE_SEARCHES", True)
+    results = {}
+
+    def search(token):
+        try:
+            results[token] = search_request(token, "/v1/search?q=x&type=track").status
+        except Exception as e:
+            results[token] = type(e)
+
+    leader = threading.Thread(target=search, args=("leader",))
+    leader.start()
+    wait_until(lambda: client.tokens)
+    follower = threading.Thread(target=search, args=("follower",))
+    follower.start()
+    wait_until(lambda: flight.stats()["coalesced"])
+    client.release.set()
+    leader.join()
+    follower.join()
+
+    assert client.tokens == ["leader", "follower"]
+    assert results["follower"] == 200
+    assert results["leader"] == (401 if leader_outcome == 401 else ConnectionResetError)
@@ -0,0 +1,56 @@
+import pytest
+
+from spotify_smart_playlist_creator.tools import spotify_api
+from spotify_smart_playlist_creator.tools.spotify_api import SpotifyAPIError, add_tracks_chunked
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Record add_tracks calls; a queued exception is raised by the next call instead."""
+    recorded, errors = [], []
+
+    def fake_add_tracks(token, playlist_id, uris, position=0):
+        recorded.append((list(uris), position))
+        if errors:
+            raise errors.pop(0)
+        return {"snapshot_id": f"s{len(recorded)}"}
+
+    monkeypatch.setattr(spotify_api, "add_tracks", fake_add_tracks)
+    monkeypatch.setattr(spotify_api.time, "sleep", lambda seconds: None)
+    return recorded, errors
+
+
+def uris(count):
+    return [f"spotify:track:{n}" for n in range(count)]
+
+
+def test_chunks_of_100_keep_order(calls):
+    recorded, _ = calls
+    report = add_tracks_chunked("t", "p", uris(250), position=5)
+    assert [(len(chunk), position) for chunk, position in recorded] == [(100, 5), (100, 105), (50, 205)]
+    assert report["added"] == 250
+    assert report["snapshot_id"] == "s3"
+
+
+def test_empty_list_makes_no_request(calls):
+    recorded, _ = calls
+    assert add_tracks_chunked("t", "p", [])["added"] == 0
+    assert recorded == []
+
+
+def test_throttled_chunk_is_retried(calls):
+    recorded, errors = calls
+    errors.append(SpotifyAPIError(429, "slow down"))
+    report = add_tracks_chunked("t", "p", uris(10))
+    assert len(recorded) == 2
+    assert report["added"] == 10 and not report["failed_chunks"]
+
+
+@pytest.mark.parametrize("error", [SpotifyAPIError(503, "unavailable"), TimeoutError("timed out")])
+def test_chunk_that_may_have_been_applied_is_not_resent(calls, error):
+    recorded, errors = calls
+    errors.append(error)
+    report = add_tracks_chunked("t", "p", uris(150))
+    assert len(recorded) == 2  # the failed chunk once, then the next chunk
+    assert report["added"] == 50
+    assert report["failed_chunks"][0]["start"] == 0
@@ -0,0 +1,82 @@
+import http.client
+
+import pytest
+
+from spotify_smart_playlist_creator.tools.spotify_client import SpotifyClient
+
+
+class FakeResponse:
+    status = 201
+    msg = {}
+    will_close = False
+
+    def read(self):
+        return b"{}"
+
+
+class FakeConnection:
+    def __init__(self, error=None):
+        self.error = error
+        self.sent = 0
+
+    def request(self, method, path, body=None, headers=None):
+        self.sent += 1
+        if self.error is http.client.CannotSendRequest:
+            raise self.error()
+
+    def getresponse(self):
+        if self.error is http.client.RemoteDisconnected:
+            raise self.error("closed")
+        if self.error is http.client.ResponseNotReady:
+            raise self.error("Idle")
+        return FakeResponse()
+
+    def close(self):
+        pass
+
+
+class FakePool:
+    def __init__(self, *connections):
+        self.connections = list(connections)
+        self.acquired = 0
+
+    def acquire(self):
+        self.acquired += 1
+        return self.connections.pop(0)
+
+    def release(self, conn, reusable=True):
+        pass
+
+
+def send(method, pool):
+    client = SpotifyClient()
+    client._pool = lambda base_url: pool
+    return client._send(method, "/v1/x", None, {}, "http://mock")
+
+
+def test_stale_connection_is_retried_for_idempotent_requests():
+    pool = FakePool(FakeConnection(http.client.RemoteDisconnected), FakeConnection())
+    assert send("GET", pool).status == 201
+    assert pool.acquired == 2
+
+
+def test_stale_connection_is_not_resent_for_post():
+    pool = FakePool(FakeConnection(http.client.RemoteDisconnected), FakeConnection())
+    with pytest.raises(http.client.RemoteDisconnected):
+        send("POST", pool)
+    assert pool.acquired == 1
+
+
+def test_post_is_resent_when_nothing_was_written():
+    pool = FakePool(FakeConnection(http.client.CannotSendRequest), FakeConnection())
+    assert send("POST", pool).status == 201
+    assert pool.acquired == 2
+
+
+@pytest.mark.parametrize("error", [http.client.CannotSendRequest, http.client.ResponseNotReady])
+def test_connection_state_errors_surface_as_connection_errors(error):
+    pool = FakePool(FakeConnection(error), FakeConnection(error))
+    with pytest.raises(ConnectionError) as raised:
+        send("GET", pool)
+    assert isinstance(raised.value.__cause__, error)
+    assert pool.acquired == 2
@@ -0,0 +1,102 @@
+import threading
+import time
+
+import fakeredis
+import pytest
+from cryptography.fernet import Fernet
+
+from spotify_smart_playlist_creator import token_store
+from spotify_smart_playlist_creator.token_store import MemoryBackend, RedisBackend, TokenSet, TokenStore
+from spotify_smart_playlist_creator.tools.spotify_api import SpotifyAPIError
+
+KEY = Fernet.generate_key()
+
+
+def tokens(access_token="old", expires_in=3600, user_id="alice"):
+    return TokenSet(access_token=access_token, refresh_token="refresh", expires_at=time.time() + expires_in,
+                    user_id=user_id)
+
+
+@pytest.fixture(params=["memory", "redis"])
+def backend(request):
+    return MemoryBackend() if request.param == "memory" else RedisBackend(fakeredis.FakeRedis())
+
+
+def test_tokens_round_trip_encrypted(backend):
+    store = TokenStore(backend, key=KEY)
+    saved = tokens()
+    store.save(saved)
+    assert store.get("alice") == saved
+    assert b"refresh" not in backend.get("user:alice")
+    # A store with another key cannot read the records
+    assert TokenStore(backend, key=Fernet.generate_key()).get("alice") is None
+
+
+def test_access_tokens_map_back_to_their_user():
+    store = TokenStore(key=KEY)
+    store.save(tokens())
+    assert store.user_for("old") == "alice"
+    assert store.user_for("unknown") is None
+    assert store.current("unknown") == "unknown"
+    assert store.current("old") == "old"
+
+
+def test_save_requires_a_user_id():
+    with pytest.raises(ValueError):
+        TokenStore(key=KEY).save(tokens(user_id=None))
+
+
+def fake_refresh(calls, delay=0.0, error=None):
+    def refresh(previous):
+        calls.append(previous.access_token)
+        time.sleep(delay)
+        if error:
+            raise error
+        return previous.model_copy(update={"access_token": f"new{len(calls)}", "expires_at": time.time() + 3600})
+    return refresh
+
+
+def test_expiring_tokens_are_refreshed_before_use(monkeypatch):
+    calls = []
+    monkeypatch.setattr(token_store, "refresh_tokens", fake_refresh(calls))
+    store = TokenStore(key=KEY, refresh_margin=120)
+    store.save(tokens(expires_in=60))
+    assert store.current("old") == "new1"
+    assert store.user_for("new1") == "alice"
+    assert store.current("old") == "new1"  # superseded tokens still find the user
+    assert calls == ["old"] and store.refreshes == 1
+
+
+def test_concurrent_401s_refresh_once_under_the_user_lock(monkeypatch):
+    calls = []
+    monkeypatch.setattr(token_store, "refresh_tokens", fake_refresh(calls, delay=0.05))
+    store = TokenStore(key=KEY)
+    store.save(tokens())
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(store.refresh("old"))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert calls == ["old"]
+    assert results == ["new1"] * 4
+    assert store._locks == {}  # locks are dropped once nobody holds them
+
+
+@pytest.mark.parametrize("status", [400, 401])
+def test_revoked_refresh_token_deletes_the_user(monkeypatch, status):
+    monkeypatch.setattr(token_store, "refresh_tokens", fake_refresh([], error=SpotifyAPIError(status, "invalid_grant")))
+    store = TokenStore(key=KEY)
+    store.save(tokens())
+    assert store.refresh("old") is None
+    assert store.get("alice") is None
+    assert store.user_for("old") is None
+    assert store.refresh_failures == 1
+
+
+def test_transient_refresh_failure_keeps_the_user(monkeypatch):
+    monkeypatch.setattr(token_store, "refresh_tokens", fake_refresh([], error=SpotifyAPIError(503, "unavailable")))
+    store = TokenStore(key=KEY)
+    store.save(tokens())
+    assert store.refresh("old") is None
+    assert store.get("alice") is not None
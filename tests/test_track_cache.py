@@ -0,0 +1,59 @@
+import pytest
+
+from spotify_smart_playlist_creator.tools import track_cache
+from spotify_smart_playlist_creator.tools.track_cache import LRUCache, SQLiteCache, normalize_text, track_key
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(track_cache.time, "time", lambda: now[0])
+    return now
+
+
+def test_normalized_keys_ignore_case_accents_and_punctuation():
+    assert normalize_text("  Águas de Março!! ") == "aguas de marco"
+    assert track_key("Don't Stop", "Queen", "br") == track_key("don't  STOP", "QUEEN", "BR") == "BR|don t stop|queen"
+
+
+def test_lru_expires_entries_and_evicts_the_least_recently_used(clock):
+    cache = LRUCache(max_size=2)
+    cache.set("a", 1, ttl=10)
+    cache.set("b", 2, ttl=100)
+    assert cache.get("a") == (True, 1)  # "b" is now the least recently used
+    cache.set("c", 3, ttl=100)
+    assert cache.get("b") == (False, None)
+    clock[0] += 11
+    assert cache.get("a") == (False, None)
+    assert cache.get("c") == (True, 3)
+
+
+def test_lru_stores_none_as_a_value(clock):
+    cache = LRUCache()
+    cache.set("miss", None, ttl=10)
+    assert cache.get("miss") == (True, None)
+
+
+def test_sqlite_expires_entries(clock):
+    cache = SQLiteCache(":memory:")
+    cache.set("a", {"uri": "spotify:track:a"}, ttl=10)
+    assert cache.get("a") == (True, {"uri": "spotify:track:a"})
+    clock[0] += 11
+    assert cache.get("a") == (False, None)
+    assert len(cache) == 0
+
+
+def test_sqlite_evicts_expired_then_least_recently_used_rows(clock):
+    cache = SQLiteCache(":memory:", max_rows=50)
+    cache.set("short", 0, ttl=5)
+    for n in range(98):
+        clock[0] += 0.001
+        cache.set(f"k{n}", n, ttl=100)
+    clock[0] += 10
+    cache.get("k0")  # recently used, so it survives eviction
+    cache.set("last", 1, ttl=100)  # the 100th write evicts
+    assert len(cache) == 50
+    assert cache.get("short") == (False, None)
+    assert cache.get("k0") == (True, 0)
+    assert cache.get("k1") == (False, None)
+    assert cache.get("last") == (True, 1)
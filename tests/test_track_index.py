@@ -0,0 +1,66 @@
+import time
+
+import pytest
+
+from spotify_smart_playlist_creator.tools.track_index import TrackIndex, match_query
+
+
+@pytest.fixture
+def index():
+    return TrackIndex(":memory:")
+
+
+def item(track_id, name, artist, **fields):
+    return {"id": track_id, "uri": f"spotify:track:{track_id}", "name": name, "artists": [{"name": artist}], **fields}
+
+
+def test_match_query_quotes_words_and_prefixes_the_last():
+    assert match_query("Not Fade Away", "Buddy Holly") == (
+        'title_norm : ("not" AND "fade" AND "away"*) AND artist_norm : ("buddy" OR "holly")')
+    assert match_query("!!!") is None
+
+
+def test_candidates_match_fuzzy_titles_in_the_market(index):
+    index.add_items([item("a", "Basket Case", "Green Day", duration_ms=181000)], "US")
+    index.add_items([item("b", "Basket Case - Live", "Green Day")], "BR")
+    assert [c["id"] for c in index.candidates("basket cas", "green day", "US")] == ["a"]
+    assert {c["id"] for c in index.candidates("Basket Case", "Green Day", None)} == {"a", "b"}
+    assert index.candidates("Basket Case", "Green Day", "US")[0]["duration_ms"] == 181000
+
+
+def test_markets_accumulate_on_upsert(index):
+    index.add_items([item("a", "Creep", "Radiohead")], "US")
+    index.add_items([item("a", "Creep", "Radiohead")], "BR")
+    assert len(index) == 1
+    assert [c["id"] for c in index.candidates("Creep", "Radiohead", "BR")] == ["a"]
+    assert [c["id"] for c in index.candidates("Creep", "Radiohead", "US")] == ["a"]
+
+
+def test_prune_drops_stale_rows_and_the_oldest_overflow(monkeypatch):
+    index = TrackIndex(":memory:", ttl=100, max_rows=2)
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    index.add_items([item("old", "Old Song", "Band")], None)
+    now[0] = 1050.0
+    index.add_items([item("a", "Song A", "Band")], None)
+    now[0] = 1150.0
+    index.add_items([item("b", "Song B", "Band"), item("c", "Song C", "Band")], None)
+    assert index.prune() == 2  # "old" is past the TTL, then "a" is the oldest of three
+    assert len(index) == 2
+    assert index.candidates("Old Song", "Band", None) == []
+    assert index.candidates("Song A", "Band", None) == []
+    assert [c["id"] for c in index.candidates("Song B", "Band", None)] == ["b"]
+
+
+def test_candidates_skip_rows_past_the_ttl(index):
+    index.ttl = -1
+    index.add_items([item("a", "Creep", "Radiohead")], None)
+    assert index.candidates("Creep", "Radiohead", None) == []
+
+
+def test_clear_empties_the_full_text_index(index):
+    index.add_items([item("a", "Creep", "Radiohead")], None)
+    index.clear()
+    index.add_items([item("b", "Karma Police", "Radiohead")], None)
+    assert index.candidates("Creep", "Radiohead", None) == []
+    assert len(index) == 1
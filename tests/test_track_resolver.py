@@ -0,0 +1,85 @@
+import pytest
+
+from spotify_smart_playlist_creator.tools.results import TrackMatch
+from spotify_smart_playlist_creator.tools.track_cache import NOT_FOUND
+from spotify_smart_playlist_creator.tools.track_resolver import (
+    MIN_MATCH_CONFIDENCE,
+    Song,
+    best_match,
+    dedupe_matches,
+    duplicate_key,
+    parse_song,
+    parse_song_list,
+    rank_candidates,
+)
+
+
+def match(title, name, artists, track_id):
+    return TrackMatch(title=title, artist=artists[0], track_id=track_id, uri=f"spotify:track:{track_id}",
+                      name=name, artists=artists)
+
+
+def test_duplicate_key_ignores_versions_and_suffixes():
+    key = duplicate_key("Basket Case", ["Green Day"])
+    assert duplicate_key("Basket Case - Remastered 2009", ["Green Day"]) == key
+    assert duplicate_key("Basket Case (Live)", ["Green Day", "Guest"]) == key
+    assert duplicate_key("Basket Case Acoustic", ["Green Day"]) == key
+    assert duplicate_key("Basket Case", ["Avril Lavigne"]) != key
+
+
+def test_dedupe_keeps_the_first_version_and_unfound_songs():
+    matches = [
+        match("Creep", "Creep", ["Radiohead"], "a"),
+        match("Creep (Acoustic)", "Creep - Acoustic", ["Radiohead"], "b"),
+        match("Creep", "Creep", ["Radiohead"], "a"),
+        TrackMatch(title="Unknown", artist="Nobody", error="not_found"),
+        match("Creep", "Creep", ["TLC"], "c"),
+    ]
+    assert [m.track_id for m in dedupe_matches(matches)] == ["a", None, "c"]
+
+
+@pytest.mark.parametrize("line, song", [
+    ('- "Basket Case" by Green Day', Song("Basket Case", "Green Day")),
+    ('3. "Creep" - Radiohead', Song("Creep", "Radiohead")),
+    ('* “Águas de Março” by Elis Regina & Tom Jobim ', Song("Águas de Março", "Elis Regina & Tom Jobim")),
+    ("Playlist Name: Pop Punk Summer", None),
+    ("Basket Case by Green Day", None),
+])
+def test_parse_song(line, song):
+    assert parse_song(line) == song
+
+
+def test_parse_song_list_skips_other_lines():
+    text = 'Playlist Name: Mix\n- "Creep" by Radiohead\n\nSome notes\n2) "Hey Jude" – The Beatles\n'
+    assert parse_song_list(text) == [Song("Creep", "Radiohead"), Song("Hey Jude", "The Beatles")]
+
+
+def item(track_id, name, artist, popularity=50, duration_ms=200_000, **fields):
+    return {"id": track_id, "uri": f"spotify:track:{track_id}", "name": name, "artists": [{"name": artist}],
+            "popularity": popularity, "duration_ms": duration_ms, **fields}
+
+
+def test_rank_candidates_prefers_the_requested_version_and_artist():
+    song = Song("Creep", "Radiohead")
+    items = [
+        item("cover", "Creep", "Some Cover Band", popularity=90),
+        item("live", "Creep - Live", "Radiohead", popularity=80),
+        item("studio", "Creep", "Radiohead"),
+    ]
+    ranked = rank_candidates(song, items)
+    assert [candidate["id"] for _, candidate in ranked] == ["studio", "live", "cover"]
+    assert ranked[0][0] > MIN_MATCH_CONFIDENCE > ranked[-1][0]
+
+
+def test_rank_candidates_keeps_spotify_order_on_ties():
+    items = [item("first", "Creep", "Radiohead"), item("second", "Creep", "Radiohead")]
+    assert [candidate["id"] for _, candidate in rank_candidates(Song("Creep", "Radiohead"), items)] == [
+        "first", "second"]
+
+
+def test_best_match_skips_unplayable_tracks_and_weak_matches():
+    song = Song("Creep", "Radiohead")
+    items = [item("blocked", "Creep", "Radiohead", is_playable=False), item("ok", "Creep", "Radiohead")]
+    assert best_match(song, items)["id"] == "ok"
+    assert best_match(song, items[:1]) is NOT_FOUND
+    assert best_match(Song("Yesterday", "The Beatles"), items) is NOT_FOUND